@@ -67,10 +67,36 @@ Determining how to keep track of the pawn's position on the board.
         representing the player is passed into the method.
 """
 
+import time
+from collections import namedtuple
+
+import bitboard
+from bitboard import Bitboard
+import diagnostics as diag
+import profiling
+import zobrist
+from state import GameState
+
+# Everything about a pawn move, worked out once by get_move_context()
+#   probe: (check_x, check_y, check_vec) for the fence that could block the
+#       move, or None if the pawn isn't moving
+MoveContext = namedtuple('MoveContext', ['player', 'coord', 'x', 'y',
+                                         'x_curr', 'y_curr', 'move_x',
+                                         'move_y', 'opp_loc', 'probe'])
+
+# Every move vector a pawn could be allowed to make: steps, vertical jumps
+# and diagonal moves.  Horizontal jumps are never allowed.
+PAWN_VECTORS = [(0, 1), (0, -1), (1, 0), (-1, 0), (0, 2), (0, -2),
+                (1, 1), (-1, 1), (1, -1), (-1, -1)]
+
 
 class QuoridorGame:
     """Play the game called Quoridor.  Create an object for the game to
     be played."""
+    # No __dict__ for each game, so many games can be kept at once
+    __slots__ = ('_winner', '_turn', '_p1_fences', '_p2_fences', '_p1', '_p2',
+                 '_board', '_paths', '_fields', '_history', '_key',
+                 '_diagnostics', '_profiler', '_recorder')
 
     def __init__(self):
         """
@@ -78,7 +104,7 @@ class QuoridorGame:
         (four edges) and pawns (P1 and P2) placed in the correct positions.
 
         Moves are expressed as (x,y), where x is column, y is row.
-        This is important because the board is expressed as (row, column)
+        The fences are stored in a Bitboard using the same (x,y) layout.
         """
         self._winner = None
         self._turn = 1
@@ -86,40 +112,112 @@ class QuoridorGame:
         self._p2_fences = 10  # Player 2 fences left to play
         self._p1 = (4, 0)  # Player 1 starting position
         self._p2 = (4, 8)  # Player 2 starting position
-        # Represents the fence locations for the Quoridor board
-        self._board = [['vh', 'h', 'h', 'h', 'h', 'h', 'h', 'h', 'h'],
-                       ['v', '-', '-', '-', '-', '-', '-', '-', '-'],
-                       ['v', '-', '-', '-', '-', '-', '-', '-', '-'],
-                       ['v', '-', '-', '-', '-', '-', '-', '-', '-'],
-                       ['v', '-', '-', '-', '-', '-', '-', '-', '-'],
-                       ['v', '-', '-', '-', '-', '-', '-', '-', '-'],
-                       ['v', '-', '-', '-', '-', '-', '-', '-', '-'],
-                       ['v', '-', '-', '-', '-', '-', '-', '-', '-'],
-                       ['v', '-', '-', '-', '-', '-', '-', '-', '-'],
-                       ['vh', 'h', 'h', 'h', 'h', 'h', 'h', 'h', 'h']]
+        # Represents the fence locations for the Quoridor board.  The fences
+        # are stored as bit masks, see bitboard.py for the layout.
+        self._board = Bitboard()
+        # Last shortest path to the goal row for each player, as a tuple of
+        # (mask of cells on the path, mask of edges the path crosses)
+        self._paths = [None, None, None]
+        # Distance from every cell to the goal row for each player, only
+        # worked out again after the fences change
+        self._fields = [None, None, None]
+        # Moves played, with what is needed to take them back with pop()
+        self._history = []
+        # Zobrist hash of the position, updated by push() and pop()
+        self._key = zobrist.hash_position(self._p1, self._p2,
+                                          *self._board.get_masks(),
+                                          self._p1_fences, self._p2_fences,
+                                          self._turn)
+        # Receives the events for each move, does nothing by default
+        self._diagnostics = diag.NULL_DIAGNOSTICS
+        # Counts calls and times the phases of each move, off by default
+        self._profiler = profiling.NULL_PROFILER
+        # Receives every move that is played, see records.py
+        self._recorder = None
 
     def print_board(self):
         """Method to print out the board.  Doesn't take any parameters.
         The board doesn't contain the players, so before printing the
         players are added onto the board.  They are removed after printing."""
 
-        # Store string for current board
-        board_str_1 = self._board[self._p1[1]][self._p1[0]]
-        board_str_2 = self._board[self._p2[1]][self._p2[0]]
+        # Get the fences as a list of strings
+        board = self._board.to_rows()
 
         # Add player 1 onto board
-        self._board[self._p1[1]][self._p1[0]] += '1'
+        board[self._p1[1]][self._p1[0]] += '1'
 
         # Add player 2 onto board
-        self._board[self._p2[1]][self._p2[0]] += '2'
+        board[self._p2[1]][self._p2[0]] += '2'
+
+        print(board)
+
+    def set_diagnostics(self, diagnostics):
+        """
+        Set the object that receives the events for each move, such as a
+        RingBufferDiagnostics or LoggerDiagnostics from diagnostics.py.
+        Passing None turns the diagnostics off.  Does not return anything.
+        """
+        if diagnostics is None:
+            diagnostics = diag.NULL_DIAGNOSTICS
+        self._diagnostics = diagnostics
+
+    def get_diagnostics(self):
+        """Return the object that receives the events for each move"""
+        return self._diagnostics
+
+    def report(self, kind, reason, player, **detail):
+        """
+        Send an event to the diagnostics.  No Event is created when the
+        diagnostics are turned off.
+
+        :param kind: 'reject', 'move' or 'fence'
+        :param reason: str from diagnostics.py for a rejected move, else None
+        :param player: int of 1 or 2 for the player making the move, or None
+        :param detail: extra information about the move, such as coord
+        """
+        if self._diagnostics.enabled:
+            self._diagnostics.record(diag.Event(kind, reason, player, detail))
+
+    def set_profiler(self, profiler):
+        """
+        Set the object that counts the calls and times the phases of each
+        move, such as a PhaseProfiler from profiling.py.  Passing None turns
+        the profiling off.  Does not return anything.
+        """
+        if profiler is None:
+            profiler = profiling.NULL_PROFILER
+        self._profiler = profiler
+
+    def get_profiler(self):
+        """Return the object that times the phases of each move"""
+        return self._profiler
+
+    def timed(self, phase, method, *args):
+        """
+        Call a method and add the time it took to a phase of the profiler.
+        Only called when the profiler is enabled.
 
-        print(self._board)
+        :param phase: str for the name of the phase, see profiling.py
+        :param method: the method to call
+        :param args: the arguments for the method
+        :return: what the method returns
+        """
+        start = time.perf_counter()
+        result = method(*args)
+        self._profiler.add(phase, time.perf_counter() - start)
+        return result
 
-        # Remove player 1 from board
-        self._board[self._p1[1]][self._p1[0]] = board_str_1
+    def set_recorder(self, recorder):
+        """
+        Set the object that receives every move move_pawn() and
+        place_fence() accept, such as a GameRecorder from records.py.
+        Passing None turns recording off.  Does not return anything.
+        """
+        self._recorder = recorder
 
-        # Remove player 2 from board
-        self._board[self._p2[1]][self._p2[0]] = board_str_2
+    def get_recorder(self):
+        """Return the object that receives every move, or None"""
+        return self._recorder
 
     def move_pawn(self, player, coord):
         """
@@ -136,55 +234,32 @@ class QuoridorGame:
         If the game has been already won, return False
         """
         # Initial checks (for winner and player turn)
-        pass_checks = self.initial_checks(player)
+        if self._profiler.enabled:
+            pass_checks = self.timed('initial_checks', self.initial_checks,
+                                     player)
+        else:
+            pass_checks = self.initial_checks(player)
         if not pass_checks:
             return False
 
-        # Get opponent's location
-        opp_loc = self.get_opp_location(player)
-
-        # Determine coordinates for move
-        x, y = self.get_move_coords(coord)
-
         # Ensure move is on the board
         is_location_ok = self.check_move_location(coord)
         if not is_location_ok:
             return False
 
-        # Determine move vector
-        move_x, move_y = self.get_move_vector(player, coord)
-
-        # Determine move size
-        move_size = abs(move_x) + abs(move_y)
-        print("Move size is", move_size)
-
-        # If moving diagonally, the opponent pawn must be in a vertical
-        # direction, not horizontal
-        x_curr, y_curr = self.get_curr_location(player)
-        if (abs(move_y) == 1 and abs(move_x) == 1) and \
-            opp_loc[0] - x_curr != 0:
-            print("Opponent is not vertically adjacent, can't move diag.")
+        # Work out everything about the move once, then validate it
+        ctx = self.get_move_context(player, coord)
+        reason = self.validate_move(ctx)
+        if reason is not None:
+            self.report('reject', reason, player, coord=coord)
             return False
 
-        # If move size > 2 or <1, then not valid size
-        if move_size > 2 or move_size < 1:
-            print("Move size of", move_size, "not allowed!")
-            return False
-
-        # Check for a jump and whether it passes conditions
-        jump_ok = self.check_jump(player, coord, x_curr, y_curr, opp_loc)
-        if not jump_ok: return False
-
-        # Validate the fence and pawns are in OK positions for a move
-        is_blocked = self.is_blocked(x_curr, y_curr, player, coord, opp_loc)
-        if is_blocked: return False
-
-
-        print("Valid move")
-        self.update_location(player, x, y)  # update pawn's location
-        print("Moved", player, "to:", coord)
-        self.update_winner(player, x, y)  # check if player has won
-        self.update_turn(player)  # update player's turn
+        # update pawn's location, winner and player's turn
+        move = ('p', (ctx.x, ctx.y))
+        self.push(move)
+        if self._recorder is not None:
+            self._recorder.record(self, move)
+        self.report('move', None, player, coord=coord)
         return True  # return True since move was successful
 
     def initial_checks(self, player):
@@ -196,12 +271,13 @@ class QuoridorGame:
         """
         # Check if already a winner
         if self._winner is not None:
-            print("Player", self._winner, "has already won!")
+            self.report('reject', diag.GAME_OVER, player,
+                        winner=self._winner)
             return False
 
         # Return False if not player's turn
         if player != self._turn:
-            print("It is not your turn.\n")
+            self.report('reject', diag.NOT_YOUR_TURN, player, turn=self._turn)
             return False
 
         return True
@@ -240,7 +316,7 @@ class QuoridorGame:
         x, y = self.get_move_coords(coord)
 
         if x > 8 or y > 8 or x < 0 or y < 0:
-            print("Move is off the board")
+            self.report('reject', diag.OFF_BOARD, None, coord=coord)
             return False
         return True
 
@@ -258,140 +334,136 @@ class QuoridorGame:
         return x_curr, y_curr
 
 
-    def get_move_vector(self, player, coord):
+    def get_move_context(self, player, coord):
         """
-        This method will calculate the vector for where the player
-        is trying to move.  The vector is the x and y direction
+        This method works out everything needed to validate a pawn move:
+        where the pawn is, the vector for the move, where the opponent is
+        and which fence could block the move.
 
         :param player: int representing the player number
         :param coord: tuple for the player's move coordinates
-        :return:
-            move_x: int, x vector for where the player is moving
-            move_y: int, y vector for where the player is moving
+        :return: MoveContext for the move
         """
-        # Determine coordinates for move
-        x = coord[0]  # x coordinate for move
-        y = coord[1]  # y coordinate for move
+        x, y = coord
+        x_curr, y_curr = self.get_location(player)
+        move_x = x - x_curr
+        move_y = y - y_curr
+
+        # Find the fence that could block the move, a move of size 0
+        # doesn't have one
+        if move_x == 0 and move_y == 0:
+            probe = None
+        else:
+            probe = self.fence_check(move_x, move_y, x_curr, y_curr, x, y)
 
-        # Get player's location
-        x_curr, y_curr = self.get_curr_location(player)
+        return MoveContext(player, coord, x, y, x_curr, y_curr, move_x,
+                           move_y, self.get_opp_location(player), probe)
+
+    def validate_move(self, ctx):
+        """
+        Method to validate a pawn move without changing the game.  The
+        checks are done in order from cheapest to most expensive.
+
+        :param ctx: MoveContext from get_move_context()
+        :return: None if the move is allowed, else a reason string from
+            diagnostics.py for why the move is not allowed
+        """
+        move_size = abs(ctx.move_x) + abs(ctx.move_y)
+        diagonal = abs(ctx.move_x) == 1 and abs(ctx.move_y) == 1
 
-        print("Current location is:", (x_curr, y_curr))
-        print("Plan to move to:", coord)
-        move_vector = [x - x_curr, y - y_curr]
-        move_x = move_vector[0]
-        move_y = move_vector[1]
-        print("Move vector is", move_vector)
-        return move_x, move_y
+        # If moving diagonally, the opponent pawn must be in a vertical
+        # direction, not horizontal
+        if diagonal and ctx.opp_loc[0] != ctx.x_curr:
+            return diag.DIAGONAL_NOT_VERTICAL
 
-    def check_jump(self, player, coord, x_curr, y_curr, opp_loc):
+        # If move size > 2 or <1, then not valid size
+        if move_size > 2 or move_size < 1:
+            return diag.BAD_MOVE_SIZE
+
+        # Check for a jump and whether it passes conditions, then validate
+        # the fence and pawns are in OK positions for a move
+        if self._profiler.enabled:
+            reason = self.timed('check_jump', self.check_jump, ctx, move_size)
+            if reason is not None:
+                return reason
+            return self.timed('is_blocked', self.is_blocked, ctx, diagonal)
+
+        reason = self.check_jump(ctx, move_size)
+        if reason is not None:
+            return reason
+        return self.is_blocked(ctx, diagonal)
+
+    def check_jump(self, ctx, move_size):
         """This method will check when a player is trying to jump
         the opponent's pawn whether the jump is in the vertical
         direction, and if there is a pawn to jump over.  This method
         does not check for fences.
 
+        ctx: is the MoveContext for the move
         move_size: is an integer that is an absolute value of how many
                    squares the playing is trying to move.
-        move_x: is an integer for the x position of the direction the pawn is moving
-        move_y: is an integer for the y position of the direction the pawn is moving
-        x_curr: is an integer for current x position of the pawn
-        y_curr: is an integer for current y position of the pawn
-        opp_loc: is a tuple that represents the opponents location in (x,y)
 
-        The method will return False if one of the checks fail,
-        otherwise return true.
+        The method will return a reason string if one of the checks fail,
+        otherwise return None.
         """
-        # Move Vector
-        move_x, move_y = self.get_move_vector(player, coord)
-
-        # Determine move size
-        move_size = abs(move_x) + abs(move_y)
+        # Only straight moves of size 2 are jumps
+        if move_size != 2 or (ctx.move_x != 0 and ctx.move_y != 0):
+            return None
 
         # If trying to jump, it can only be in vertical direction
-        if move_size == 2 and move_x != 0 and move_y == 0:
-            print("Can't jump horizontally")
-            return False
+        if ctx.move_y == 0:
+            return diag.HORIZONTAL_JUMP
 
         # If trying to make a jump, there needs to be a pawn in the first space
-        if move_size == 2 and (move_y == 0 or move_x == 0):
-            if (x_curr + move_x / 2, y_curr + move_y / 2) != opp_loc:
-                print("No pawn to jump")
-                return False
+        if (ctx.x_curr, ctx.y_curr + ctx.move_y // 2) != ctx.opp_loc:
+            return diag.NO_PAWN_TO_JUMP
 
-        return True
+        return None
 
-    def is_blocked(self, x_curr, y_curr, player, coord, opp_loc):
-        """ Method takes following seven parameters in order:
-            x_curr: is an integer for current x position of the pawn
-            y_curr: is an integer for current y position of the pawn
-            x: is an integer for the x position of where the pawn is moving
-            y: is an integer for the y position of where the pawn is moving
-            move_vector: is a list with the 2 integers, the difference on the
-                x axis where the player is trying to move and where they are
-                currently located.  And the the second integer is the same as
-                x but for the y axis.
-            move_size: is an integer that is an absolute value of how many
-                squares the playing is trying to move.
-            opp_loc: is a tuple that represents the opponents location in (x,y)
+    def is_blocked(self, ctx, diagonal):
+        """ Method takes following two parameters in order:
+            ctx: is the MoveContext for the move
+            diagonal: is True if the pawn is moving diagonally
 
         The purpose of the method is to determine if there is a fence or pawn
         in the player's way that would prevent them from moving to the
-        destination space.  If there is a fence blocking the path, return
-        True, else return False."""
+        destination space.  If there is something blocking the path, return
+        a reason string, else return None."""
+        board = self._board
 
-        # Determine coordinates for move
-        x, y = self.get_move_coords(coord)
+        # Check for fence blocking path
+        check_x, check_y, check_vec = ctx.probe
+        if board.has_fence(check_vec, check_x, check_y):
+            return diag.BLOCKED_BY_FENCE
 
-        # Get x, y move vector
-        move_x, move_y = self.get_move_vector(player, coord)
+        # Check for opponent pawn
+        if (ctx.x, ctx.y) == ctx.opp_loc:
+            return diag.BLOCKED_BY_PAWN
 
-        # Get x, y current location
-        x_curr, y_curr = self.get_curr_location(player)
+        # Straight moves are not blocked
+        if not diagonal:
+            return None
 
-        # Figure out which location to check for a blocking fence
-        check_x, check_y, check_vec = self.fence_check(move_x, move_y, x_curr,
-                                                       y_curr, x, y)
+        # Find difference between player's pawn and opp pawn locations
+        x_delta = ctx.opp_loc[0] - ctx.x_curr
+        y_delta = ctx.opp_loc[1] - ctx.y_curr
 
-        # Check for fence blocking path
-        if check_vec in self._board[check_y][check_x]:
-            print("Blocked by fence")
-            return True
+        # Confirm there is an opponent pawn in the direction of the move
+        if x_delta * ctx.move_x < 0 or y_delta * ctx.move_y < 0:
+            return diag.NO_PAWN_FOR_DIAGONAL
 
-        # Check for opponent pawn
-        if (x, y) == opp_loc:
-            print("Blocked by pawn")
-            return True
+        # Check if there is a fence between players
+        args = (x_delta, y_delta, ctx.x_curr, ctx.y_curr, ctx.x, ctx.y)
+        check_x, check_y, check_vec = self.pawn_fence(*args)
+        if board.has_fence(check_vec, check_x, check_y):
+            return diag.FENCE_BETWEEN_PAWNS
 
-        # If moving diagonally
-        if abs(move_y) == 1 and abs(move_x) == 1:
-            # Find difference between player's pawn and opp pawn locations
-            x_delta = opp_loc[0] - x_curr
-            y_delta = opp_loc[1] - y_curr
-
-            # Confirm there is an opponent pawn one space away
-            if x_delta * move_x < 0 or y_delta * move_y < 0:
-                print("Diag move not allowed, no opp pawn in way")
-                return True
-
-            # Check if there is a fence between players
-            check_x, check_y, check_vec = self.pawn_fence(x_delta, y_delta, \
-                                                          x_curr, y_curr, x, y)
-            if check_vec in self._board[check_y][check_x]:
-                print("A fence exists between player pawns, can't move diag.")
-                return True
-
-            # Check if there is a fence behind the opponent
-            check_x, check_y, check_vec = self.opp_fence(x_delta, y_delta, \
-                                                         x_curr, y_curr, x, y)
-            if check_vec not in self._board[check_y][check_x]:
-                print("No fence behind opponent pawn, can't move diag.")
-                return True
-
-        # Not blocked
-        else:
-            print("Not blocked")
-            return False
+        # Check if there is a fence behind the opponent
+        check_x, check_y, check_vec = self.opp_fence(*args)
+        if not board.has_fence(check_vec, check_x, check_y):
+            return diag.NO_FENCE_BEHIND_OPPONENT
 
+        return None
 
     def fence_check(self, move_x, move_y, x_curr, y_curr, x, y):
         """
@@ -581,47 +653,161 @@ class QuoridorGame:
         """
 
         # Initial checks (for winner and player turn)
-        pass_checks = self.initial_checks(player)
+        if self._profiler.enabled:
+            pass_checks = self.timed('initial_checks', self.initial_checks,
+                                     player)
+        else:
+            pass_checks = self.initial_checks(player)
         if not pass_checks:
             return False
 
         # Ensure player has a fence to play
         if self.get_fence_count(player) <= 0:
-            print("Player has no more fences to play")
+            self.report('reject', diag.NO_FENCES_LEFT, player)
             return False
 
         # Ensure fence is on the board
         x_fence = coord[0]
         y_fence = coord[1]
         if x_fence < 0 or y_fence < 0 or x_fence > 8 or y_fence > 8:
-            print("Fence can't be placed off the board")
+            self.report('reject', diag.FENCE_OFF_BOARD, player, coord=coord)
+            return False
+
+        # Ensure the fence is either horizontal or vertical
+        if angle != 'h' and angle != 'v':
+            self.report('reject', diag.BAD_FENCE_ANGLE, player, angle=angle)
             return False
 
         # Ensure no same fence already in location
-        fence_at_location = self._board[y_fence][x_fence]
-        if angle in fence_at_location:
-            print("Already same fence at location")
+        if self._board.has_fence(angle, x_fence, y_fence):
+            self.report('reject', diag.FENCE_EXISTS, player, angle=angle,
+                        coord=coord)
             return False
 
-        # Place the fence
-        board_value = self._board[y_fence][x_fence]
-        if self._board[y_fence][x_fence] == '-':
-            self._board[y_fence][x_fence] = angle
-        else:
-            self._board[y_fence][x_fence] += angle
+        # Place the fence, update player fence count and player's turn
+        self.push((angle, (x_fence, y_fence)))
 
-        # Ensure fence doesn't violate fair play rule
-        is_fair = self.find_path(player)
+        # Ensure fence doesn't violate fair play rule, take it back if it does
+        profiled = self._profiler.enabled
+        if profiled:
+            is_fair = self.timed('find_path', self.find_path, player)
+        else:
+            is_fair = self.find_path(player)
 
         if not is_fair:
-            self._board[y_fence][x_fence] = board_value
-            print("Violates fair play")
+            if profiled:
+                self.timed('fence_rollback', self.pop)
+            else:
+                self.pop()
+            self.report('reject', diag.BREAKS_FAIR_PLAY, player, angle=angle,
+                        coord=coord)
             return "breaks the fair play rule"
 
-        self.update_fence_count(player)  # update player fence count
-        self.update_turn(player)  # update player's turn
+        if self._recorder is not None:
+            self._recorder.record(self, (angle, (x_fence, y_fence)))
+        self.report('fence', None, player, angle=angle, coord=coord)
         return True
 
+    def make_move(self, player, move):
+        """
+        Method to play a move tuple for a player with the same checks as
+        move_pawn() and place_fence().
+
+        :param player: int of 1 or 2 for the player making the move
+        :param move: ('p', (x, y)), ('h', (x, y)) or ('v', (x, y))
+        :return: the result of move_pawn() or place_fence()
+        """
+        angle, coord = move
+        if angle == 'p':
+            return self.move_pawn(player, coord)
+        return self.place_fence(player, angle, coord)
+
+    def push(self, move):
+        """
+        Method to play a move for the player whose turn it is and remember
+        what is needed to take it back with pop().  The move is not
+        validated, so it should come from legal_moves().
+
+        :param move: ('p', (x, y)) to move the pawn, or ('h', (x, y)) or
+            ('v', (x, y)) to place a fence
+        """
+        player = self._turn
+        angle, (x, y) = move
+
+        # Only save what the move changes: the pawn location or the fence,
+        # the player (which gives the turn and fence count) and the winner
+        if angle == 'p':
+            location = self.get_location(player)
+            self._history.append((move, player, location, self._winner))
+            self._key ^= self.move_key(player, move, location)
+            self.update_location(player, x, y)
+            self.update_winner(player, x, y)
+        else:
+            self._history.append((move, player, None, self._winner))
+            self._key ^= self.move_key(player, move, None)
+            self._board.add_fence(angle, x, y)
+            self.update_fence_count(player)
+            self._fields = [None, None, None]
+        self.update_turn(player)
+
+    def pop(self):
+        """
+        Method to take back the last move played with push(), move_pawn()
+        or place_fence().
+
+        :return: the move tuple that was taken back
+        """
+        move, player, location, winner = self._history.pop()
+        angle, (x, y) = move
+        if angle == 'p':
+            self.update_location(player, location[0], location[1])
+        else:
+            self._board.remove_fence(angle, x, y)
+            self.update_fence_count(player, 1)
+            self._fields = [None, None, None]
+        self._key ^= self.move_key(player, move, location)
+        self._winner = winner
+        self._turn = player
+        return move
+
+    def move_key(self, player, move, location):
+        """
+        Method returns the Zobrist keys changed by a move XORed together, so
+        XORing the result into the hash plays the move or takes it back.
+
+        :param player: int of 1 or 2 for the player making the move
+        :param move: move tuple, see push()
+        :param location: (x, y) tuple the pawn moved from, None for a fence
+        :return: int for the 64-bit change to the hash
+        """
+        angle, (x, y) = move
+        if angle == 'p':
+            keys = zobrist.PAWN[player]
+            return keys[location[1] * 9 + location[0]] ^ keys[y * 9 + x] \
+                ^ zobrist.TURN
+
+        # Called while the fence count is the count from before the move
+        count = self.get_fence_count(player)
+        keys = zobrist.FENCES_LEFT[player]
+        return zobrist.FENCE[angle][y * 10 + x] ^ keys[count] \
+            ^ keys[count - 1] ^ zobrist.TURN
+
+    def get_position_key(self):
+        """
+        Method returns the 64-bit Zobrist hash of the position: the pawns,
+        the fences, the fences each player has left and whose turn it is.
+        Equal positions always have equal keys.
+        """
+        return self._key
+
+    def get_ply(self):
+        """Return the number of moves played so far as an integer"""
+        return len(self._history)
+
+    def get_history(self):
+        """Return the list of move tuples played so far, oldest first"""
+        return [record[0] for record in self._history]
+
     def get_fence_count(self, player):
         """ Method that takes a single integer representing the player number as
         a parameter and then returns the player's fence count as an integer."""
@@ -630,14 +816,15 @@ class QuoridorGame:
         else:
             return self._p2_fences
 
-    def update_fence_count(self, player):
+    def update_fence_count(self, player, change=-1):
         """ Method that takes a single integer representing the player number as
-        a parameter and then updates the player's fence count by decrementing
-        it by one.  The method does not return anything."""
+        a parameter and then updates the player's fence count by change,
+        which decrements it by one unless given.  The method does not return
+        anything."""
         if player == 1:
-            self._p1_fences -= 1
+            self._p1_fences += change
         else:
-            self._p2_fences -= 1
+            self._p2_fences += change
 
     def is_winner(self, player):
         """
@@ -650,6 +837,54 @@ class QuoridorGame:
         else:
             return False
 
+    def get_state(self):
+        """
+        Method returns a GameState for the current position, see state.py.
+        The GameState is immutable and hashable, and uses much less memory
+        than a QuoridorGame.
+        """
+        return GameState.pack(self._p1, self._p2, self._board.get_walls(),
+                              self._p1_fences, self._p2_fences, self._turn,
+                              self._winner)
+
+    def set_state(self, state):
+        """
+        Method puts the game in the position of a GameState.  The move
+        history is cleared, so pop() can't go back past this position.
+        Does not return anything.
+        """
+        self._p1 = state.get_location(1)
+        self._p2 = state.get_location(2)
+        self._board.set_masks(*state.get_masks())
+        self._p1_fences = state.get_fence_count(1)
+        self._p2_fences = state.get_fence_count(2)
+        self._turn = state.get_turn()
+        self._winner = state.get_winner()
+        self._paths = [None, None, None]
+        self._fields = [None, None, None]
+        self._history = []
+        self._key = zobrist.hash_position(self._p1, self._p2,
+                                          *self._board.get_masks(),
+                                          self._p1_fences, self._p2_fences,
+                                          self._turn)
+
+    @classmethod
+    def from_state(cls, state):
+        """Method returns a new QuoridorGame in the position of a GameState"""
+        game = cls()
+        game.set_state(state)
+        return game
+
+    def get_fence_masks(self):
+        """ Method takes no parameters and returns a tuple of the horizontal
+        and vertical fence masks, see bitboard.py for the layout."""
+        return self._board.get_masks()
+
+    def get_turn(self):
+        """ Method takes no parameters and returns the player whose turn it
+        is as an integer."""
+        return self._turn
+
     def get_winner(self):
         """ Method takes no parameters and returns the winner as an integer.
         The return will be None if there is no winner."""
@@ -657,76 +892,98 @@ class QuoridorGame:
 
     def find_path(self, player):
         """
-        Method will determine if the fence being played prevents
-        the opponent player from reaching the baseline.
+        Method will determine if the fence just played prevents either
+        player from reaching the baseline they are trying to get to.
 
-        Method takes following two parameters in order:
-            x_curr: is an integer for current x position of the pawn
-            y_curr: is an integer for current y position of the pawn
+        player: is an integer for the player who placed the fence
 
-        Use Breadth-First algorithm to find path to opponent baseline.
         Return True if the fence placement is valid.  Return False
-        if the fence placement blocks the opponent.
-            """
-        # Player is player making move, need to get opponent's information
-        player = self.get_opp_player(player)
-
-        # Get player's pawn location
-        start = self.get_location(player)
-
-        # Determine where the pawn is trying to get to
-        dest_row = self.get_goal(player)
-
-        # Get the board
-        board = self._board
-
-        visit = []
-        # Need to keep track of visited locations
-        # Set all visit locations to False to start
-        for row in range(len(board)):
-            visit.append([False] * 9)
-
-        # Create a list queue to store spaces as tuples to traverse
-        spaces = [start]
-
-        # Directions to try and move
-        directions = [[1, 0], [0, 1], [-1, 0], [0, -1]]
+        if the fence placement blocks the opponent or the player.
+        """
+        opp = self.get_opp_player(player)
+        return self.has_path(opp) and self.has_path(player)
 
-        # Continue to loop until there are no more spaces to check
-        while len(spaces) > 0:
-            space = spaces.pop()  # pop a space so it isn't checked again
-            visit[space[0]][space[1]] = 'True'  # mark space as visited
+    def has_path(self, player):
+        """
+        Method will determine if a player can still reach their goal row.
 
-            # Loop through different directions to move: u, d, l, r
-            for dir in directions:
+        Each player's last shortest path is kept, along with a mask of the
+        cells on it and a mask of the edges it crosses.  If the pawn is still
+        on that path and no fence has been placed across it, the path is
+        still open and there is nothing to search.  Otherwise use
+        Breadth-First search to find a new shortest path.
 
-                # Get the current location of the pawn
-                x_curr = space[0]
-                y_curr = space[1]
+        :param player: int of 1 or 2 for the player number
+        :return: True if the player can reach their goal row, else False
+        """
+        cell = bitboard.cell_index(*self.get_location(player))
+        walls = self._board.get_walls()
+        cached = self._paths[player]
+        if cached is not None and cached[0] >> cell & 1 \
+                and not cached[1] & walls:
+            return True
 
-                # Get the direction player is moving to
-                move_x, move_y = self.get_move_coords(dir)
+        if self._profiler.enabled:
+            expanded = [0]
+            found = bitboard.shortest_path(walls, cell, self.get_goal(player),
+                                           expanded)
+            self._profiler.count('find_path.searches')
+            self._profiler.count('find_path.nodes', expanded[0])
+        else:
+            found = bitboard.shortest_path(walls, cell, self.get_goal(player))
+        if found is None:
+            return False
+        cells, edges = found
+        self._paths[player] = (sum(1 << c for c in cells), edges)
+        return True
 
-                # Get coordinates of move
-                x = space[0] + dir[0]
-                y = space[1] + dir[1]
+    def get_path_cells(self, player):
+        """
+        Method returns a mask of the cell numbers (y * 9 + x) on the player's
+        shortest path to their goal row, or 0 if there is no path.
+        """
+        if not self.has_path(player):
+            return 0
+        return self._paths[player][0]
 
-                # Ensure the move is on the board and we have visited the location
-                # If not then skip rest of loop
-                if x < 0 or x > 8 or y < 0 or y > 8 or visit[x][y] is not False: continue
+    def get_path_edges(self, player):
+        """
+        Method returns a mask of the edges crossed by the player's shortest
+        path to their goal row, or -1 (every edge) if there is no path.
+        """
+        if not self.has_path(player):
+            return -1
+        return self._paths[player][1]
 
-                # Need to figure out what fence type to check and where to check
-                check_x, check_y, check_vec = self.fence_check(move_x, move_y, x_curr, y_curr, x, y)
+    def get_distance_field(self, player):
+        """
+        Method returns the number of steps from every cell to the player's
+        goal row, ignoring the pawns.  The distances are only searched again
+        after a fence has been placed or taken back.
 
-                # If no fence blocking move then update spaces
-                if check_vec not in self._board[check_y][check_x]:
-                    spaces.append((x, y))
+        :param player: int of 1 or 2 for the player number
+        :return: tuple of 81 ints indexed by cell number (y * 9 + x), None
+            for cells that can't reach the goal row
+        """
+        field = self._fields[player]
+        if field is None:
+            walls = self._board.get_walls()
+            field = tuple(bitboard.distance_field(walls, self.get_goal(player)))
+            self._fields[player] = field
+        return field
+
+    def get_distance(self, player, coord=None):
+        """
+        Method returns the number of steps the player needs to reach their
+        goal row, ignoring the pawns.
 
-                    # Check if reached destination
-                    if y == dest_row:
-                        print("Passed Fairplay: Destination Reached")
-                        return True
-        return False
+        :param player: int of 1 or 2 for the player number
+        :param coord: (x, y) tuple to measure from, defaults to the pawn
+        :return: int for the number of steps, None if the goal can't be reached
+        """
+        if coord is None:
+            coord = self.get_location(player)
+        return self.get_distance_field(player)[coord[1] * 9 + coord[0]]
 
     def get_goal(self, player):
         """
@@ -754,6 +1011,81 @@ class QuoridorGame:
             player = 1
         return player
 
+    def legal_moves(self):
+        """
+        Method returns every legal move for the player whose turn it is,
+        without changing the game.  Each move is a tuple:
+            ('p', (x, y)) to move the pawn to (x, y)
+            ('h', (x, y)) or ('v', (x, y)) to place a fence at (x, y)
+
+        :return: list of move tuples, empty if the game has been won
+        """
+        moves = [('p', coord) for coord in self.legal_pawn_moves()]
+        moves.extend(self.legal_fences())
+        return moves
+
+    def legal_pawn_moves(self):
+        """
+        Method returns the list of (x, y) tuples the pawn of the player whose
+        turn it is can move to.  Uses the same checks as move_pawn().
+        """
+        if self._winner is not None:
+            return []
+        player = self._turn
+        x_curr, y_curr = self.get_location(player)
+        coords = []
+        for move_x, move_y in PAWN_VECTORS:
+            coord = (x_curr + move_x, y_curr + move_y)
+            if not 0 <= coord[0] <= 8 or not 0 <= coord[1] <= 8:
+                continue
+            ctx = self.get_move_context(player, coord)
+            if self.validate_move(ctx) is None:
+                coords.append(coord)
+        return coords
+
+    def legal_fences(self, candidates=-1):
+        """
+        Method returns the list of ('h' or 'v', (x, y)) fences the player
+        whose turn it is can place.  The free slots come from the fence
+        masks, and the fences that would break the fair play rule come from
+        get_cut_edges(), so every fence is checked with one search for each
+        player.  A fence can only cut a player off if it crosses their
+        shortest path, so a player whose path has no free slot on it is not
+        searched at all.
+
+        :param candidates: int mask in the walls layout of bitboard.py, only
+            fences in the mask are returned.  Defaults to every fence.
+        """
+        player = self._turn
+        if self._winner is not None or self.get_fence_count(player) <= 0:
+            return []
+        free_h, free_v = self._board.get_free_slots()
+        free = (free_h | free_v << bitboard.V_SHIFT) & candidates
+        for p in (1, 2):
+            if free & self.get_path_edges(p):
+                free &= ~self.get_cut_edges(p)
+        free_h = free & bitboard.SLOTS_H
+        free_v = free >> bitboard.V_SHIFT
+
+        fences = [('h', bitboard.slot_coord(index))
+                  for index in bitboard.iter_bits(free_h)]
+        fences.extend(('v', bitboard.slot_coord(index))
+                      for index in bitboard.iter_bits(free_v))
+        return fences
+
+    def get_cut_edges(self, player):
+        """
+        Method returns a mask in the walls layout of bitboard.py of the
+        edges where a fence would stop the player from reaching their goal
+        row.  These are the fences that break the fair play rule.
+
+        :param player: int of 1 or 2 for the player number
+        """
+        cell = bitboard.cell_index(*self.get_location(player))
+        return bitboard.cut_edges(self._board.get_walls(), cell,
+                                  self.get_goal(player))
+
+
 def main():
     """Test various moves"""
     pass
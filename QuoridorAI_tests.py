@@ -0,0 +1,99 @@
+import unittest
+from Quoridor import QuoridorGame
+from ai import AlphaBetaPlayer, TranspositionTable, WIN
+from mcts import MCTSPlayer
+
+
+class TestAlphaBetaPlayer(unittest.TestCase):
+
+    def test_legal_move_within_budget(self):
+        """Test that the search returns a legal move and leaves the game unchanged"""
+        q = QuoridorGame()
+        q.move_pawn(1, (4, 1))
+        key, ply = q.get_position_key(), q.get_ply()
+        result = AlphaBetaPlayer(time_ms=100).search(q)
+        self.assertIn(result.move, q.legal_moves())
+        self.assertEqual((q.get_position_key(), q.get_ply()), (key, ply))
+        self.assertGreaterEqual(result.depth, 1)
+        self.assertLess(result.elapsed, 1.0)
+        self.assertGreater(result.nodes_per_sec, 0)
+
+    def test_takes_win(self):
+        """Test that the player moves onto the goal row when it can"""
+        q = QuoridorGame()
+        q._p1 = (2, 7)
+        move = AlphaBetaPlayer(time_ms=100).choose_move(q)
+        self.assertEqual(move, ('p', (2, 8)))
+        self.assertGreaterEqual(AlphaBetaPlayer(time_ms=100).search(q).score,
+                                WIN - 10)
+
+    def test_blocks_opponent(self):
+        """Test that the player fences an opponent who is one step from winning"""
+        q = QuoridorGame()
+        q._p1, q._p2 = (0, 0), (6, 1)
+        move = AlphaBetaPlayer(time_ms=300).choose_move(q)
+        self.assertEqual(move, ('h', (6, 1)))
+
+    def test_table_is_bounded(self):
+        """Test that the transposition table only keeps one entry per slot"""
+        table = TranspositionTable(bits=2)
+        for key in range(100):
+            table.put(key, 1, 0, 0, None)
+        self.assertEqual(len(table._slots), 4)
+        self.assertIsNotNone(table.get(99))
+        self.assertIsNone(table.get(3))
+
+
+class TestMCTSPlayer(unittest.TestCase):
+
+    def test_legal_move(self):
+        """Test that the search returns a legal move and leaves the game unchanged"""
+        q = QuoridorGame()
+        key, ply = q.get_position_key(), q.get_ply()
+        result = MCTSPlayer(playouts=200, seed=1).search(q)
+        self.assertIn(result.move, q.legal_moves())
+        self.assertEqual((q.get_position_key(), q.get_ply()), (key, ply))
+        self.assertEqual(result.playouts, 200)
+
+    def test_takes_win(self):
+        """Test that the player moves onto the goal row when it can"""
+        q = QuoridorGame()
+        q._p1 = (2, 7)
+        self.assertEqual(MCTSPlayer(playouts=300, seed=2).choose_move(q),
+                         ('p', (2, 8)))
+
+    def test_tree_reuse(self):
+        """Test that the subtree for the new position is kept between moves"""
+        q = QuoridorGame()
+        player = MCTSPlayer(playouts=300, seed=3)
+        q.push(player.choose_move(q))
+        q.push(q.legal_moves()[0])
+        root = player.reuse_root(q)
+        self.assertEqual(root.key, q.get_position_key())
+
+    def test_parallel_merge(self):
+        """Test that the root statistics from the workers are merged"""
+        q = QuoridorGame()
+        with MCTSPlayer(playouts=100, workers=2, seed=4) as player:
+            result = player.search(q)
+        self.assertEqual(result.playouts, 100)
+        self.assertEqual(sum(result.visits.values()), 100)
+        self.assertIn(result.move, q.legal_moves())
+        # The worker playouts are in the tree kept for the next move
+        root = player._root
+        self.assertEqual(sum(child.visits for child in root.children), 100)
+        self.assertEqual(root.visits, 100)
+
+    def test_playouts_are_not_recorded(self):
+        """Test that fences tried in playouts don't reach the recorder"""
+        from records import GameRecorder
+        q = QuoridorGame()
+        recorder = GameRecorder()
+        q.set_recorder(recorder)
+        q.move_pawn(1, (4, 1))
+        MCTSPlayer(playouts=50, fence_rate=0.5, seed=5).search(q)
+        self.assertEqual(len(recorder.get_codes()), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
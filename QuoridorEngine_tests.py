@@ -0,0 +1,424 @@
+import contextlib
+import copy
+import io
+import random
+import unittest
+from unittest import mock
+from Quoridor import QuoridorGame
+import bitboard
+from bitboard import Bitboard
+import diagnostics
+import pickle
+import profiling
+import zobrist
+
+try:
+    import batch
+except ImportError:  # numpy is not installed
+    batch = None
+
+
+class TestBitboard(unittest.TestCase):
+
+    def test_initial_rows(self):
+        """Test that a new Bitboard matches the original list of strings board"""
+        rows = Bitboard().to_rows()
+        self.assertEqual(len(rows), 10)
+        self.assertEqual(rows[0], ['vh'] + ['h'] * 8)
+        self.assertEqual(rows[9], ['vh'] + ['h'] * 8)
+        for y in range(1, 9):
+            self.assertEqual(rows[y], ['v'] + ['-'] * 8)
+
+    def test_add_remove_fence(self):
+        """Test that fences can be added and removed without touching other edges"""
+        board = Bitboard()
+        board.add_fence('h', 3, 4)
+        self.assertTrue(board.has_fence('h', 3, 4))
+        self.assertFalse(board.has_fence('v', 3, 4))
+        board.add_fence('v', 3, 4)
+        self.assertEqual(board.to_rows()[4][3], 'vh')
+        board.remove_fence('h', 3, 4)
+        self.assertEqual(board.to_rows()[4][3], 'v')
+
+    def test_fence_angle(self):
+        """Test that only 'h' and 'v' fences can be placed"""
+        q = QuoridorGame()
+        self.assertFalse(q.place_fence(1, 'x', (3, 3)))
+        self.assertTrue(q.place_fence(1, 'v', (3, 3)))
+
+
+class TestDiagnostics(unittest.TestCase):
+
+    def test_silent_by_default(self):
+        """Test that moves do not write to stdout when diagnostics are off"""
+        q = QuoridorGame()
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            q.move_pawn(1, (4, 1))
+            q.move_pawn(1, (4, 2))
+            q.place_fence(2, 'h', (0, 0))
+        self.assertEqual(out.getvalue(), '')
+
+    def test_ring_buffer_reasons(self):
+        """Test that rejected moves are recorded with a structured reason"""
+        q = QuoridorGame()
+        buffer = diagnostics.RingBufferDiagnostics(size=3)
+        q.set_diagnostics(buffer)
+        q.move_pawn(2, (4, 7))
+        q.move_pawn(1, (4, 3))
+        q.move_pawn(1, (-1, 0))
+        q.move_pawn(1, (4, 1))
+        self.assertEqual(buffer.get_reasons(), [diagnostics.BAD_MOVE_SIZE,
+                                                diagnostics.OFF_BOARD])
+        self.assertEqual(buffer.get_events()[-1].kind, 'move')
+        self.assertEqual(buffer.get_events()[-1].detail, {'coord': (4, 1)})
+        q.set_diagnostics(None)
+        self.assertFalse(q.get_diagnostics().enabled)
+
+
+class TestProfiling(unittest.TestCase):
+
+    def test_off_by_default(self):
+        """Test that a new game has a profiler that records nothing"""
+        q = QuoridorGame()
+        self.assertFalse(q.get_profiler().enabled)
+        q.set_profiler(profiling.PhaseProfiler())
+        q.set_profiler(None)
+        self.assertIs(q.get_profiler(), profiling.NULL_PROFILER)
+
+    def test_phases_and_counters(self):
+        """Test that the phases of a move are counted and can be reset"""
+        q = QuoridorGame()
+        profiler = profiling.PhaseProfiler()
+        q.set_profiler(profiler)
+        q.move_pawn(1, (4, 1))
+        q.move_pawn(2, (4, 9))
+        self.assertTrue(q.place_fence(2, 'v', (4, 8)))
+        self.assertTrue(q.place_fence(1, 'v', (5, 8)))
+        self.assertTrue(q.place_fence(2, 'h', (0, 3)))
+        self.assertEqual(q.place_fence(1, 'h', (4, 8)),
+                         "breaks the fair play rule")
+        snapshot = profiler.snapshot()
+        phases = snapshot['phases']
+        self.assertEqual(phases['initial_checks']['calls'], 6)
+        self.assertEqual(phases['check_jump']['calls'], 1)
+        self.assertEqual(phases['is_blocked']['calls'], 1)
+        self.assertEqual(phases['find_path']['calls'], 4)
+        self.assertEqual(phases['fence_rollback']['calls'], 1)
+        self.assertGreater(phases['find_path']['seconds'], 0)
+        counters = snapshot['counters']
+        self.assertGreater(counters['find_path.nodes'],
+                           counters['find_path.searches'])
+        profiler.reset()
+        self.assertEqual(profiler.snapshot(), {'phases': {}, 'counters': {}})
+
+
+def random_game(seed, plies):
+    """Return a game after up to plies random legal moves"""
+    rnd = random.Random(seed)
+    q = QuoridorGame()
+    for ply in range(plies):
+        moves = q.legal_moves()
+        if not moves:
+            break
+        # Most legal moves are fences, so the boards get crowded
+        angle, coord = rnd.choice(moves)
+        if angle == 'p':
+            q.move_pawn(q._turn, coord)
+        else:
+            q.place_fence(q._turn, angle, coord)
+    return q
+
+
+class TestLegalMoves(unittest.TestCase):
+
+    def brute_force(self, q):
+        """Return the legal moves found by trying every move on a copy"""
+        moves = []
+        player = q._turn
+        for x in range(-1, 10):
+            for y in range(-1, 10):
+                if copy.deepcopy(q).move_pawn(player, (x, y)) is True:
+                    moves.append(('p', (x, y)))
+                for angle in 'hv':
+                    if copy.deepcopy(q).place_fence(player, angle, (x, y)) is True:
+                        moves.append((angle, (x, y)))
+        return sorted(moves)
+
+    def test_new_game(self):
+        """Test the moves at the start of the game"""
+        q = QuoridorGame()
+        self.assertEqual(sorted(q.legal_pawn_moves()), [(3, 0), (4, 1), (5, 0)])
+        self.assertEqual(len(q.legal_fences()), 144)
+
+    def test_matches_brute_force(self):
+        """Test that legal_moves() agrees with move_pawn() and place_fence()"""
+        for seed in range(30):
+            q = random_game(seed, seed * 3)
+            self.assertEqual(sorted(q.legal_moves()), self.brute_force(q))
+
+    def test_jump_and_diagonal(self):
+        """Test the moves when the pawns are facing each other"""
+        q = QuoridorGame()
+        q._p1, q._p2 = (4, 4), (4, 5)
+        self.assertIn((4, 6), q.legal_pawn_moves())
+        q.place_fence(1, 'h', (4, 6))
+        q.place_fence(2, 'v', (1, 1))
+        self.assertEqual(sorted(q.legal_moves()), self.brute_force(q))
+        self.assertIn((5, 5), q.legal_pawn_moves())
+        self.assertNotIn((4, 6), q.legal_pawn_moves())
+
+    def test_no_side_effects(self):
+        """Test that legal_moves() does not change the game"""
+        q = random_game(7, 40)
+        before = (q._p1, q._p2, q._turn, q._board.get_masks())
+        q.legal_moves()
+        self.assertEqual(before, (q._p1, q._p2, q._turn, q._board.get_masks()))
+
+
+def game_state(q):
+    """Return a tuple of everything that makes up the position of a game"""
+    return (q._p1, q._p2, q._p1_fences, q._p2_fences, q._turn, q._winner,
+            q._board.get_masks())
+
+
+class TestPushPop(unittest.TestCase):
+
+    def test_push_pop_restores(self):
+        """Test that pop() takes back every move made with push()"""
+        for seed in range(10):
+            q = random_game(seed, 10)
+            rnd = random.Random(seed)
+            states = []
+            while q.legal_moves() and len(states) < 60:
+                states.append(game_state(q))
+                q.push(rnd.choice(q.legal_moves()))
+            while states:
+                q.pop()
+                self.assertEqual(game_state(q), states.pop())
+
+    def test_pop_after_move_pawn(self):
+        """Test that pop() takes back moves made with move_pawn() and place_fence()"""
+        q = QuoridorGame()
+        start = game_state(q)
+        q.move_pawn(1, (4, 1))
+        q.place_fence(2, 'h', (4, 3))
+        self.assertEqual(q.get_history(), [('p', (4, 1)), ('h', (4, 3))])
+        self.assertEqual(q.pop(), ('h', (4, 3)))
+        self.assertEqual(q.pop(), ('p', (4, 1)))
+        self.assertEqual(game_state(q), start)
+
+    def test_pop_winner(self):
+        """Test that taking back a winning move clears the winner"""
+        q = QuoridorGame()
+        q._p1 = (4, 7)
+        q.push(('p', (4, 8)))
+        self.assertEqual(q.get_winner(), 1)
+        q.pop()
+        self.assertIsNone(q.get_winner())
+        self.assertEqual(q._turn, 1)
+
+
+class TestFairPlay(unittest.TestCase):
+
+    def test_cannot_block_self(self):
+        """Test that a player can't trap their own pawn with fences"""
+        q = QuoridorGame()
+        self.assertTrue(q.place_fence(1, 'v', (4, 0)))
+        self.assertTrue(q.place_fence(2, 'v', (1, 5)))
+        self.assertTrue(q.place_fence(1, 'v', (5, 0)))
+        self.assertTrue(q.place_fence(2, 'v', (1, 6)))
+        self.assertEqual(q.place_fence(1, 'h', (4, 1)), "breaks the fair play rule")
+        self.assertNotIn(('h', (4, 1)), q.legal_fences())
+
+    def test_path_cache(self):
+        """Test that a fence away from both shortest paths doesn't search the board"""
+        q = QuoridorGame()
+        q.place_fence(1, 'v', (1, 1))
+        with mock.patch('bitboard.shortest_path', wraps=bitboard.shortest_path) as search:
+            self.assertTrue(q.place_fence(2, 'v', (1, 2)))
+            self.assertEqual(search.call_count, 0)
+            self.assertTrue(q.place_fence(1, 'h', (4, 4)))
+            self.assertEqual(search.call_count, 2)
+
+    def test_cut_edges(self):
+        """Test that cut_edges() finds exactly the fences that cut a pawn off"""
+        # Player 1 in a corridor with a single way out, and random boards
+        corridor = QuoridorGame()
+        for move in [('v', (4, 0)), ('v', (1, 5)), ('v', (5, 0)), ('v', (1, 6)),
+                     ('v', (4, 1)), ('v', (2, 5)), ('v', (5, 1))]:
+            corridor.push(move)
+        games = [corridor] + [random_game(seed, 12) for seed in range(15)]
+        self.assertEqual(corridor.get_cut_edges(1),
+                         bitboard.fence_bit(4, 1) | bitboard.fence_bit(4, 2))
+        for seed, q in enumerate(games):
+            walls = q._board.get_walls()
+            free_h, free_v = q._board.get_free_slots()
+            free = free_h | free_v << bitboard.V_SHIFT
+            for player in (1, 2):
+                start = bitboard.cell_index(*q.get_location(player))
+                goal = q.get_goal(player)
+                expected = 0
+                for index in bitboard.iter_bits(free):
+                    edge = 1 << index
+                    if not bitboard.can_reach(walls | edge, start, goal):
+                        expected |= edge
+                self.assertEqual(bitboard.cut_edges(walls, start, goal),
+                                 expected, (seed, player))
+
+
+class TestDistance(unittest.TestCase):
+
+    def test_new_game(self):
+        """Test the distances at the start of the game"""
+        q = QuoridorGame()
+        self.assertEqual(q.get_distance(1), 8)
+        self.assertEqual(q.get_distance(2), 8)
+        self.assertEqual(q.get_distance(1, (0, 8)), 0)
+        self.assertEqual(q.get_distance_field(2)[:9], (0,) * 9)
+
+    def test_matches_shortest_path(self):
+        """Test the distance field against a search from every cell"""
+        for seed in range(5):
+            q = random_game(seed, 40)
+            walls = q._board.get_walls()
+            for player, goal in ((1, 8), (2, 0)):
+                field = q.get_distance_field(player)
+                for cell in range(81):
+                    path = bitboard.shortest_path(walls, cell, goal)
+                    expected = None if path is None else len(path[0]) - 1
+                    self.assertEqual(field[cell], expected)
+
+    def test_updates_with_fences(self):
+        """Test that the distances change when a fence is placed and taken back"""
+        q = QuoridorGame()
+        q.place_fence(1, 'h', (4, 8))
+        self.assertEqual(q.get_distance(2), 9)
+        self.assertEqual(q.get_distance(1, (4, 7)), 2)
+        q.pop()
+        self.assertEqual(q.get_distance(1, (4, 7)), 1)
+
+
+class TestZobrist(unittest.TestCase):
+
+    def full_hash(self, q):
+        """Return the hash of a game worked out from scratch"""
+        return zobrist.hash_position(q._p1, q._p2, *q._board.get_masks(),
+                                     q._p1_fences, q._p2_fences, q._turn)
+
+    def test_incremental_matches_full(self):
+        """Test that the hash kept by push() and pop() matches a full rehash"""
+        rnd = random.Random(3)
+        q = QuoridorGame()
+        for ply in range(80):
+            moves = q.legal_moves()
+            if not moves:
+                break
+            q.push(rnd.choice(moves))
+            self.assertEqual(q.get_position_key(), self.full_hash(q))
+        while q.get_history():
+            q.pop()
+            self.assertEqual(q.get_position_key(), self.full_hash(q))
+        self.assertEqual(q.get_position_key(), QuoridorGame().get_position_key())
+
+    def test_no_collisions(self):
+        """Test that different positions from random self-play have different hashes"""
+        rnd = random.Random(11)
+        seen = {}
+        for game in range(300):
+            q = QuoridorGame()
+            for ply in range(120):
+                if q.get_winner() is not None:
+                    break
+                pawn_moves = q.legal_pawn_moves()
+                if rnd.random() < 0.7 and pawn_moves:
+                    q.push(('p', rnd.choice(pawn_moves)))
+                else:
+                    angle, coord = rnd.choice('hv'), (rnd.randint(0, 8), rnd.randint(0, 8))
+                    if q.place_fence(q._turn, angle, coord) is not True:
+                        continue
+                state = game_state(q)
+                self.assertEqual(seen.setdefault(q.get_position_key(), state), state)
+        self.assertGreater(len(seen), 20000)
+
+
+@unittest.skipIf(batch is None, 'numpy is not installed')
+class TestBatchGame(unittest.TestCase):
+
+    def test_matches_reference(self):
+        """Test that BatchGame accepts and rejects the same moves as QuoridorGame"""
+        rnd = random.Random(12)
+        games = [random_game(seed, rnd.randint(0, 30)) for seed in range(40)]
+        b = batch.BatchGame.from_games(games)
+        kinds = {'p': batch.PAWN, 'h': batch.H, 'v': batch.V}
+        for ply in range(60):
+            moves = []
+            for q in games:
+                # Mostly moves near the pawn, so many are legal
+                x, y = q.get_location(q.get_turn())
+                angle = rnd.choice('pphv')
+                moves.append((angle, (x + rnd.randint(-2, 2),
+                                      y + rnd.randint(-2, 2))))
+            result = b.play([kinds[m[0]] for m in moves],
+                            [m[1][0] for m in moves],
+                            [m[1][1] for m in moves])
+            expected = {True: batch.ACCEPTED, False: batch.REJECTED,
+                        'breaks the fair play rule': batch.UNFAIR}
+            for index, (q, move) in enumerate(zip(games, moves)):
+                self.assertEqual(result[index],
+                                 expected[q.make_move(q.get_turn(), move)],
+                                 (index, move))
+            again = batch.BatchGame.from_games(games)
+            for name in ('pawns', 'h', 'v', 'fences', 'turn', 'winner'):
+                self.assertTrue((getattr(again, name) ==
+                                 getattr(b, name)).all(), name)
+
+    def test_reachable(self):
+        """Test that the flood fill finds a pawn walled into a corner"""
+        q = QuoridorGame()
+        q.place_fence(1, 'h', (0, 1))
+        b = batch.BatchGame.from_games([q, QuoridorGame()])
+        b.v[0, 0, 1] = True
+        start = batch.np.array([[0, 0], [0, 0]])
+        self.assertEqual(list(batch.reachable(b.h, b.v, start, 8)),
+                         [False, True])
+
+
+class TestGameState(unittest.TestCase):
+
+    def test_round_trip(self):
+        """Test that a game restored from a GameState has the same position"""
+        for seed in range(20):
+            q = random_game(seed, seed * 3)
+            state = q.get_state()
+            again = QuoridorGame.from_state(state)
+            self.assertEqual(game_state(again), game_state(q))
+            self.assertEqual(again.get_position_key(), q.get_position_key())
+            self.assertEqual(again.legal_moves(), q.legal_moves())
+            self.assertEqual(again.get_state(), state)
+
+    def test_hash_and_equality(self):
+        """Test that equal positions are equal GameStates with equal hashes"""
+        q = QuoridorGame()
+        start = q.get_state()
+        q.move_pawn(1, (4, 1))
+        self.assertNotEqual(q.get_state(), start)
+        q.pop()
+        self.assertEqual(q.get_state(), start)
+        self.assertEqual(len({start, q.get_state(), QuoridorGame().get_state()}), 1)
+        self.assertEqual(pickle.loads(pickle.dumps(start)), start)
+
+    def test_immutable(self):
+        """Test that a GameState can't be changed and has no __dict__"""
+        state = QuoridorGame().get_state()
+        with self.assertRaises(AttributeError):
+            state._packed = 0
+        self.assertFalse(hasattr(state, '__dict__'))
+        self.assertFalse(hasattr(QuoridorGame(), '__dict__'))
+        self.assertEqual(state.get_location(2), (4, 8))
+        self.assertEqual(state.get_fence_count(1), 10)
+        self.assertEqual((state.get_turn(), state.get_winner()), (1, None))
+
+
+if __name__ == '__main__':
+    unittest.main()
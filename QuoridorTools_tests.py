@@ -0,0 +1,584 @@
+import asyncio
+import contextlib
+import io
+import json
+import os
+import tempfile
+import time
+import unittest
+from Quoridor import QuoridorGame
+from agents import PathAgent, RandomAgent, make_agent
+from ai import SearchResult
+import book
+import hittest
+import notation
+import records
+from selfplay import REASON_CODES, Aggregator, play_game, run_games
+from server import GameServer
+from bot import BotThinker
+
+try:
+    import pygame
+except ImportError:  # the pygame board is optional
+    pygame = None
+
+
+class TestSelfPlay(unittest.TestCase):
+
+    def test_play_game(self):
+        """Test that a game between two players is played to the end"""
+        result = play_game(PathAgent(1), RandomAgent(2))
+        self.assertIn(result.winner, (1, 2))
+        self.assertEqual(result.reason, 'goal')
+        self.assertGreater(result.plies, 0)
+
+    def test_illegal_move_loses(self):
+        """Test that a player who tries an illegal move loses the game"""
+        class BadAgent:
+            def choose_move(self, game):
+                return ('p', (0, 0))
+        result = play_game(BadAgent(), PathAgent())
+        self.assertEqual((result.winner, result.reason), (2, 'illegal'))
+
+    def test_unfinished_games_are_recorded(self):
+        """Test that games ended without a win at the goal are written"""
+        class BadAgent:
+            def choose_move(self, game):
+                return ('p', (0, 0))
+        out = io.BytesIO()
+        writer = records.RecordWriter(out)
+        play_game(BadAgent(), PathAgent(),
+                  recorder=records.GameRecorder(writer))
+        play_game(RandomAgent(3), RandomAgent(4), max_plies=6,
+                  recorder=records.GameRecorder(writer))
+        self.assertEqual(writer.get_games(), 2)
+        games = list(records.read_games(io.BytesIO(out.getvalue())))
+        self.assertEqual([(g.plies, g.winner, g.reason) for g in games],
+                         [(0, 2, REASON_CODES['illegal']),
+                          (6, None, REASON_CODES['max_plies'])])
+
+    def test_run_games_pool(self):
+        """Test that games played in a pool are all counted"""
+        out = io.StringIO()
+        aggregator = Aggregator(out)
+        results = list(run_games(20, 'greedy', 'random', workers=2,
+                                 chunksize=4, seed=5))
+        for result in results:
+            aggregator.add(result)
+        self.assertEqual(sorted(r.index for r in results), list(range(20)))
+        summary = aggregator.summary()
+        self.assertEqual(summary['p1_wins'] + summary['p2_wins'], 20)
+        self.assertEqual(len(out.getvalue().splitlines()), 20)
+        self.assertIn('winner', json.loads(out.getvalue().splitlines()[0]))
+
+    def test_make_agent(self):
+        """Test that players can be made from spec strings"""
+        self.assertIsInstance(make_agent('random', 1), RandomAgent)
+        self.assertEqual(make_agent('alphabeta:50')._time_ms, 50)
+        with self.assertRaises(ValueError):
+            make_agent('nobody')
+
+
+def play_recorded(seed, recorder):
+    """Play a game between two agents with a recorder attached"""
+    game = QuoridorGame()
+    game.set_recorder(recorder)
+    agents = {1: RandomAgent(seed), 2: PathAgent(seed)}
+    while game.get_winner() is None:
+        player = game.get_turn()
+        assert game.make_move(player, agents[player].choose_move(game)) is True
+    return game
+
+
+class TestRecords(unittest.TestCase):
+
+    def test_move_codes(self):
+        """Test that every pawn move and fence slot has its own byte"""
+        self.assertEqual(len(records.MOVES), 81 + 72 + 72)
+        self.assertEqual(records.CODES[('p', (4, 0))], 4)
+        self.assertEqual(records.CODES[('h', (0, 1))], 81)
+        self.assertEqual(records.CODES[('v', (1, 0))], 153)
+        moves = [('p', (4, 1)), ('h', (8, 8)), ('v', (8, 8))]
+        self.assertEqual(records.decode_moves(records.encode_moves(moves)),
+                         moves)
+
+    def test_write_and_replay(self):
+        """Test that recorded games replay to the same positions"""
+        out = io.BytesIO()
+        writer = records.RecordWriter(out)
+        keys = []
+        for seed in range(5):
+            game = play_recorded(seed, records.GameRecorder(writer, tag=seed))
+            keys.append((game.get_position_key(), game.get_winner(),
+                         game.get_ply()))
+        self.assertEqual(writer.get_games(), 5)
+
+        out.seek(0)
+        found = []
+        for record in records.read_games(out):
+            game = records.replay(record)
+            found.append((game.get_position_key(), record.winner,
+                          record.plies))
+            self.assertEqual(game.get_winner(), record.winner)
+        self.assertEqual(found, keys)
+
+    def test_record_file(self):
+        """Test reading games by number from a memory mapped file"""
+        fd, path = tempfile.mkstemp(suffix='.qrd')
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        with open(path, 'wb') as out:
+            writer = records.RecordWriter(out)
+            for seed in range(4):
+                play_recorded(seed, records.GameRecorder(writer, tag=100 + seed))
+            writer.write(b'', reason=3)  # an empty game at the end
+
+        with records.RecordFile(path) as games:
+            self.assertEqual(len(games), 5)
+            self.assertEqual(games[2].tag, 102)
+            self.assertEqual((games[4].plies, games[4].winner, games[4].reason),
+                             (0, None, 3))
+            streamed = [record for record, game in records.replay_file(path)]
+            self.assertEqual([games[i] for i in range(5)], streamed)
+
+    def test_bad_file(self):
+        """Test that files without the header or cut short are rejected"""
+        with self.assertRaises(ValueError):
+            list(records.read_games(io.BytesIO(b'nope')))
+        out = io.BytesIO()
+        records.RecordWriter(out).write(b'\x04\x05\x06')
+        with self.assertRaises(ValueError):
+            list(records.read_games(io.BytesIO(out.getvalue()[:-1])))
+
+
+class TestNotation(unittest.TestCase):
+
+    def test_squares(self):
+        """Test that the names match the engine's (x, y) layout"""
+        self.assertEqual(notation.parse_move('e1'), ('p', (4, 0)))
+        self.assertEqual(notation.parse_move('e9'), ('p', (4, 8)))
+        self.assertEqual(notation.parse_move('a9'), ('p', (0, 8)))
+        self.assertEqual(notation.parse_move('e3h'), ('h', (4, 2)))
+        self.assertEqual(notation.parse_move('c5v'), ('v', (2, 4)))
+        # The edges of the board are not fence slots
+        for token in ('a1h', 'a1v', 'j1', 'e10', 'e3x'):
+            with self.assertRaises(ValueError):
+                notation.parse_move(token)
+
+    def test_round_trip(self):
+        """Test that every move and every recorded game survives a round trip"""
+        for move in records.MOVES:
+            self.assertEqual(notation.parse_move(notation.format_move(move)),
+                             move)
+        self.assertEqual(len(notation.TOKENS), len(records.MOVES))
+        for seed in range(3):
+            recorder = records.GameRecorder()
+            game = play_recorded(seed, recorder)
+            moves = records.decode_moves(recorder.get_codes())
+            line = notation.format_game(moves)
+            self.assertEqual(notation.parse_game(line), moves)
+            again = notation.replay_game(notation.parse_game(line))
+            self.assertEqual(again.get_position_key(),
+                             game.get_position_key())
+
+    def test_game_file(self):
+        """Test reading a file with comments, move numbers and two games"""
+        out = io.StringIO()
+        notation.write_games([[('p', (4, 1)), ('h', (4, 8))]], out)
+        text = '# games\n\n' + out.getvalue() + '1. e2 e8 2. e3 e7\n'
+        games = list(notation.parse_games(io.StringIO(text)))
+        self.assertEqual(out.getvalue(), 'e2 e9h\n')
+        self.assertEqual(games[1][:2], [('p', (4, 1)), ('p', (4, 7))])
+        self.assertEqual(len(games[1]), 4)
+        with self.assertRaisesRegex(ValueError, 'line 2'):
+            list(notation.parse_games(['e2', 'e2 z9']))
+        with self.assertRaises(ValueError):
+            notation.replay_game([('p', (4, 2))])
+
+
+class TestBook(unittest.TestCase):
+
+    def book_path(self):
+        """Return the path of a temporary book file"""
+        fd, path = tempfile.mkstemp(suffix='.qbk')
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_build_and_lookup(self):
+        """Test that a book file finds the moves played in each position"""
+        builder = book.BookBuilder()
+        builder.add_game([('p', (4, 1)), ('p', (4, 7))], 1, 8)
+        builder.add_game([('p', (4, 1)), ('h', (4, 7))], 2, 8)
+        builder.add_game([('p', (3, 0))], None, 8)
+        builder.add_game([('p', (4, 1)), ('p', (4, 7)), ('p', (4, 2))], 1, 1)
+        path = self.book_path()
+        builder.write(path)
+
+        game = QuoridorGame()
+        with book.OpeningBook(path) as opening:
+            self.assertEqual(len(opening), 4)
+            self.assertEqual(opening.lookup(game.get_position_key()),
+                             [book.BookMove(('p', (4, 1)), 3, 2),
+                              book.BookMove(('p', (3, 0)), 1, 0)])
+            game.push(('p', (4, 1)))
+            self.assertEqual(len(opening.lookup(game.get_position_key())), 2)
+            game.push(('p', (4, 7)))
+            self.assertEqual(opening.lookup(game.get_position_key()), [])
+            self.assertEqual(list(opening.entries()), builder.entries())
+
+    def test_many_positions(self):
+        """Test lookups in a book big enough to use many index buckets"""
+        builder = book.BookBuilder()
+        for seed in range(30):
+            builder.add_game(play_recorded(seed, None).get_history(), 1, 40)
+        path = self.book_path()
+        builder.write(path)
+        counts = {}
+        for entry in builder.entries():
+            counts[entry.key] = counts.get(entry.key, 0) + entry.count
+        with book.OpeningBook(path) as opening:
+            for key, count in counts.items():
+                found = opening.lookup(key)
+                self.assertEqual(sum(move.count for move in found), count)
+            self.assertEqual(opening.lookup(12345), [])
+
+    def test_merge_and_prune(self):
+        """Test that merging adds up counts and pruning keeps the most played"""
+        first = [book.BookEntry(1, 4, 2, 1), book.BookEntry(5, 3, 1, 0)]
+        second = [book.BookEntry(1, 4, 3, 3), book.BookEntry(1, 9, 1, 1),
+                  book.BookEntry(7, 3, 1, 1)]
+        merged = list(book.merge_entries(first, second))
+        self.assertEqual(merged, [book.BookEntry(1, 4, 5, 4),
+                                  book.BookEntry(1, 9, 1, 1),
+                                  book.BookEntry(5, 3, 1, 0),
+                                  book.BookEntry(7, 3, 1, 1)])
+        self.assertEqual(list(book.prune_entries(merged, top=1)),
+                         [merged[0], merged[2], merged[3]])
+        self.assertEqual(list(book.prune_entries(merged, min_count=2)),
+                         [merged[0]])
+
+    def test_agent(self):
+        """Test that the agent plays from the book, then asks its fallback"""
+        builder = book.BookBuilder()
+        builder.add_search(PathAgentSearch(), 2)
+        path = self.book_path()
+        builder.write(path)
+        with book.OpeningBook(path) as opening:
+            agent = book.BookAgent(opening, PathAgent(0))
+            game = QuoridorGame()
+            self.assertEqual(agent.choose_move(game), ('p', (4, 1)))
+            game.push(('p', (3, 0)))
+            self.assertEqual(agent.choose_move(game), ('p', (4, 7)))
+            game.push(('p', (4, 7)))
+            self.assertEqual(opening.lookup(game.get_position_key()), [])
+            self.assertIn(agent.choose_move(game), game.legal_moves())
+            self.assertIsNone(book.BookAgent(opening).choose_move(game))
+
+    def test_bad_file(self):
+        """Test that files that are not books are rejected"""
+        path = self.book_path()
+        with open(path, 'wb') as out:
+            out.write(b'QRDR\x01\x00\x00\x00')
+        with self.assertRaises(ValueError):
+            book.OpeningBook(path)
+
+
+class PathAgentSearch:
+    """Stand-in for AlphaBetaPlayer.search() that steps along the path"""
+
+    def search(self, game):
+        move = PathAgent(0).choose_move(game)
+        return SearchResult(move, 1, 1, 0, 0, 0)
+
+
+class Box:
+    """Rect with the attributes GridIndex uses"""
+
+    def __init__(self, left, top, width, height):
+        self.left, self.top = left, top
+        self.right, self.bottom = left + width, top + height
+
+
+class TestHitTest(unittest.TestCase):
+
+    def test_board_cell(self):
+        """Test that points map to the 50 pixel cells and not the gaps"""
+        self.assertEqual(hittest.board_cell(*hittest.cell_center(4, 8)), (4, 8))
+        self.assertEqual(hittest.board_cell(95, 75), (0, 0))
+        self.assertEqual(hittest.board_cell(144, 124), (0, 0))
+        self.assertIsNone(hittest.board_cell(145, 100))
+        self.assertIsNone(hittest.board_cell(94, 100))
+        self.assertIsNone(hittest.board_cell(120, 75 + 9 * 60))
+
+    def test_fence_slot(self):
+        """Test that points in the gaps map to the fence markers"""
+        self.assertEqual(hittest.fence_slot(150, 100), ('v', (1, 0)))
+        self.assertEqual(hittest.fence_slot(154, 124), ('v', (1, 0)))
+        self.assertEqual(hittest.fence_slot(120, 130), ('h', (0, 1)))
+        self.assertEqual(hittest.fence_slot(570, 580), ('v', (8, 8)))
+        self.assertEqual(hittest.fence_slot(600, 550), ('h', (8, 8)))
+        self.assertIsNone(hittest.fence_slot(150, 130))  # where gaps cross
+        self.assertIsNone(hittest.fence_slot(90, 100))  # left edge of board
+        self.assertIsNone(hittest.fence_slot(120, 100))  # in a cell
+
+    def test_grid_index(self):
+        """Test finding, moving and removing items in a GridIndex"""
+        index = hittest.GridIndex()
+        index.add('a', Box(25, 135, 10, 50))
+        index.add('b', Box(55, 135, 10, 50))
+        self.assertEqual(index.find(30, 160), 'a')
+        self.assertIsNone(index.find(40, 160))
+        index.move('a', Box(5, 155, 50, 10))  # rotated
+        self.assertEqual(index.find(50, 160), 'a')
+        self.assertEqual(index.find(58, 160), 'b')
+        self.assertIsNone(index.find(30, 140))
+        index.remove('a')
+        self.assertIsNone(index.find(50, 160))
+        self.assertEqual(len(index), 1)
+
+
+@unittest.skipIf(pygame is None, 'pygame is not installed')
+class TestHeadlessUI(unittest.TestCase):
+
+    def setUp(self):
+        import main
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.sim = main.Simulate(headless=True)
+        self.sim.redraw_all()
+
+    def tearDown(self):
+        # A forked process, such as a selfplay pool, can hang if the
+        # display is left open
+        pygame.display.quit()
+
+    def step(self, *events):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return self.sim.step(list(events))
+
+    def click(self, pos):
+        return pygame.event.Event(pygame.MOUSEBUTTONUP, pos=pos, button=1)
+
+    def test_import_does_not_play(self):
+        """Test that the board is made without a window or a game loop"""
+        self.assertEqual(pygame.display.get_driver(), 'dummy')
+        self.assertTrue(self.sim.is_running())
+
+    def test_scripted_move(self):
+        """Test that clicking a pawn and then a cell moves it"""
+        self.assertTrue(self.step(self.click(self.sim.p1.rect.center),
+                                  self.click(hittest.cell_center(4, 1))))
+        self.assertEqual(self.sim._myGame.get_location(1), (4, 1))
+        self.assertEqual(self.sim.p1.rect.center, hittest.cell_center(4, 1))
+        self.assertEqual(self.sim._myGame.get_turn(), 2)
+
+    def test_text_cache(self):
+        """Test that a Text is only rendered again when its text changes"""
+        import main
+        self.assertIs(main.render_text('P1 Fences', 16),
+                      main.render_text('P1 Fences', 16))
+        text = main.Text('10 left', 50, 122, 16)
+        image = text.image
+        text.dirty = 0
+        text.set_text('10 left')
+        self.assertIs(text.image, image)
+        self.assertEqual(text.dirty, 0)
+        text.set_text('9 left')
+        self.assertEqual(text.dirty, 1)
+        self.assertEqual(text.rect.center, (50, 122))
+
+    def test_status_and_winner(self):
+        """Test that the status follows the game and the sprites stay flat
+        after a win"""
+        sim = self.sim
+        self.assertEqual(sim._status_txt.get_text(), 'Player 1 to move')
+        game = sim._myGame
+        game.place_fence(1, 'h', (0, 4))
+        self.step()
+        self.assertEqual(sim._fences_txt[1].get_text(), '9 left')
+        self.assertEqual(sim._status_txt.get_text(), 'Player 2 to move')
+        for row in range(1, 9):
+            self.assertTrue(game.move_pawn(2, (3, 7 + row % 2)))
+            self.assertTrue(game.move_pawn(1, (4, row)))
+        self.step()
+        count = len(sim._render_group)
+        for _ in range(20):
+            self.step(pygame.event.Event(pygame.MOUSEMOTION, pos=(10, 10)))
+        self.assertEqual(sim._status_txt.get_text(), 'Game over')
+        self.assertEqual(sim._winner_txt.get_text(), 'PLAYER 1 WINS!')
+        self.assertEqual(len(sim._render_group), count)
+
+    def test_bots(self):
+        """Test a game between two computer players, moved by events"""
+        import main
+        sim = main.Simulate(headless=True, bots={1: BotThinker('greedy'),
+                                                 2: BotThinker('greedy')})
+        try:
+            # Their pieces can't be clicked
+            self.step(self.click(sim.p1.rect.center))
+            self.assertIsNone(sim._pawn_clicked)
+            deadline = time.monotonic() + 60
+            while (sim._myGame.get_winner() is None
+                   and time.monotonic() < deadline):
+                sim.step(pygame.event.get(main.BOT_MOVE))
+                time.sleep(0.001)
+        finally:
+            sim.close()
+        game = sim._myGame
+        self.assertIn(game.get_winner(), (1, 2))
+        self.assertEqual(sim.p1.rect.center,
+                         hittest.cell_center(*game.get_location(1)))
+        self.assertEqual(sim.p2.rect.center,
+                         hittest.cell_center(*game.get_location(2)))
+
+    def test_illegal_bot_move(self):
+        """Test that a rejected bot move leaves the board alone and is
+        shown in the status line"""
+        sim = self.sim
+        for player, angle, coord in [
+                (1, 'h', (4, 4)), (2, 'h', (4, 8)), (1, 'v', (6, 5)),
+                (2, 'v', (8, 7)), (1, 'v', (2, 1)), (2, 'v', (4, 8)),
+                (1, 'h', (8, 7)), (2, 'v', (1, 2)), (1, 'h', (5, 1)),
+                (2, 'h', (5, 5)), (1, 'h', (4, 2)), (2, 'h', (3, 3)),
+                (1, 'h', (1, 5)), (2, 'v', (2, 8)), (1, 'v', (6, 7)),
+                (2, 'h', (8, 4)), (1, 'h', (8, 2)), (2, 'h', (2, 8)),
+                (1, 'v', (6, 8))]:
+            self.assertTrue(sim._myGame.place_fence(player, angle, coord))
+        state = sim._myGame.get_state()
+        tray = [fence.rect.copy() for fence in sim._fence_group]
+        # Breaks the fair play rule, place_fence() returns a string
+        sim.play_bot_move(state, ('v', (5, 8)))
+        self.assertEqual([fence.rect for fence in sim._fence_group], tray)
+        self.assertEqual(sim._myGame.get_state(), state)
+        self.assertEqual(sim._status_txt.get_text(),
+                         'Player 2 tried an illegal move')
+        sim.play_bot_move(state, None)
+        self.assertEqual(sim._status_txt.get_text(), 'Player 2 has no move')
+
+    def test_quit(self):
+        """Test that a QUIT event stops the game loop"""
+        self.assertFalse(self.step(pygame.event.Event(pygame.QUIT)))
+        self.assertFalse(self.sim.is_running())
+
+
+class TestBotThinker(unittest.TestCase):
+
+    def test_think_and_cancel(self):
+        """Test that a move comes back from the worker, and that a
+        cancelled search never calls back"""
+        moves = []
+        state = QuoridorGame().get_state()
+        with BotThinker('greedy', think_ms=100) as bot:
+            bot.think(state, lambda s, move: moves.append((s, move)))
+            self.assertTrue(bot.is_thinking())
+            with self.assertRaises(RuntimeError):
+                bot.think(state, moves.append)
+            deadline = time.monotonic() + 30
+            while bot.is_thinking() and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(moves, [(state, ('p', (4, 1)))])
+            bot.think(state, lambda s, move: moves.append((s, move)))
+            bot.cancel()
+            self.assertFalse(bot.is_thinking())
+            time.sleep(0.3)
+        self.assertEqual(len(moves), 1)
+
+
+async def open_client(address, session):
+    """Connect to a server, join a session and return (reader, writer, joined)"""
+    if isinstance(address, str):
+        reader, writer = await asyncio.open_unix_connection(address)
+    else:
+        reader, writer = await asyncio.open_connection(*address)
+    writer.write(json.dumps({'op': 'join', 'session': session}).encode() + b'\n')
+    return reader, writer, json.loads(await reader.readline())
+
+
+async def read_message(reader):
+    """Return the next message from the server"""
+    return json.loads(await asyncio.wait_for(reader.readline(), 5))
+
+
+class TestServer(unittest.TestCase):
+
+    async def play_session(self, server, address):
+        """Join two clients to a session and play a few moves"""
+        r1, w1, joined1 = await open_client(address, 'a')
+        r2, w2, joined2 = await open_client(address, 'a')
+        self.assertEqual((joined1['player'], joined2['player']), (1, 2))
+        self.assertEqual((await read_message(r1))['type'], 'start')
+        self.assertEqual((await read_message(r2))['type'], 'start')
+
+        w1.write(b'{"op": "move", "move": "e2"}\n')
+        for reader in (r1, r2):
+            delta = await read_message(reader)
+            self.assertEqual((delta['type'], delta['move'], delta['turn']),
+                             ('delta', 'e2', 2))
+        w1.write(b'{"op": "move", "move": "e3"}\n')
+        rejected = await read_message(r1)
+        self.assertEqual(rejected['reason'], 'not_your_turn')
+        w2.write(b'{"op": "move", "move": "e8h"}\n')
+        self.assertEqual((await read_message(r1))['fences_left'], [10, 9])
+
+        # A third client can't join, but can take a seat that is given up
+        r3, w3, joined3 = await open_client(address, 'a')
+        self.assertEqual(joined3['type'], 'error')
+        w3.close()
+        w2.close()
+        self.assertEqual((await read_message(r1))['type'], 'opponent_left')
+        r2, w2, joined2 = await open_client(address, 'a')
+        self.assertEqual(joined2['moves'], ['e2', 'e8h'])
+        self.assertEqual(server.get_stats()['moves'], 2)
+        for writer in (w1, w2):
+            writer.close()
+
+    def test_tcp_session(self):
+        """Test that moves are checked and sent to both players over TCP"""
+        async def run():
+            server = GameServer()
+            address = await server.start()
+            try:
+                await self.play_session(server, address)
+            finally:
+                await server.close()
+        asyncio.run(run())
+
+    @unittest.skipUnless(hasattr(asyncio, 'open_unix_connection'),
+                         'no Unix sockets')
+    def test_unix_session(self):
+        """Test that a session can be played over a Unix socket"""
+        async def run():
+            server = GameServer()
+            with tempfile.TemporaryDirectory() as folder:
+                address = await server.start(path=os.path.join(folder, 's'))
+                try:
+                    await self.play_session(server, address)
+                finally:
+                    await server.close()
+        asyncio.run(run())
+
+    def test_evict_and_limits(self):
+        """Test idle eviction, the session limit and bad messages"""
+        async def run():
+            server = GameServer(max_sessions=1, idle_timeout=60)
+            address = await server.start()
+            try:
+                r1, w1, joined = await open_client(address, 'a')
+                r2, w2, full = await open_client(address, 'b')
+                self.assertEqual(full['message'], 'server full')
+                w2.write(b'not json\n')
+                self.assertEqual((await read_message(r2))['type'], 'error')
+                now = asyncio.get_running_loop().time()
+                self.assertEqual(server.evict_idle(now), 0)
+                self.assertEqual(server.evict_idle(now + 61), 1)
+                self.assertEqual((await read_message(r1))['type'], 'evicted')
+                self.assertEqual(server.get_session_count(), 0)
+                w1.close()
+                w2.close()
+            finally:
+                await server.close()
+        asyncio.run(run())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+# Description:  Simple Quoridor computer players and a way to create any
+#               player from a short text description.
+# Associated Files: Quoridor.py, ai.py, mcts.py
+
+"""
+Every player (agent) has a choose_move(game) method that returns a move
+tuple for the player whose turn it is, without changing the game.  None is
+returned if the player has no move at all.
+
+make_agent() creates a player from a spec string, so players can be named
+on the command line or sent to another process:
+    'random'              RandomAgent
+    'greedy'              PathAgent
+    'alphabeta:250'       AlphaBetaPlayer with a 250 ms budget
+    'mcts:1000'           MCTSPlayer with 1000 playouts
+    'book:book.qbk'       BookAgent from book.py, with AlphaBetaPlayer
+                          outside the book
+    'book:book.qbk+mcts:500'  BookAgent with any other player outside the
+                          book
+"""
+
+import random
+
+from ai import AlphaBetaPlayer
+from mcts import MCTSPlayer
+
+
+class RandomAgent:
+    """Play a random pawn move, or a random legal fence now and then"""
+
+    def __init__(self, seed=None, fence_rate=0.2):
+        """
+        Create the player.
+
+        :param seed: int seed for the random numbers, None for a random seed
+        :param fence_rate: float for the chance of placing a fence
+        """
+        self._rng = random.Random(seed)
+        self._fence_rate = fence_rate
+
+    def choose_move(self, game):
+        """Return a random legal move"""
+        if self._rng.random() < self._fence_rate:
+            fences = game.legal_fences()
+            if fences:
+                return self._rng.choice(fences)
+        moves = game.legal_pawn_moves()
+        if not moves:
+            return None  # the pawn is boxed in
+        return ('p', self._rng.choice(moves))
+
+
+class PathAgent:
+    """Step along the shortest path to the goal row"""
+
+    def __init__(self, seed=None):
+        """Create the player, seed breaks ties between equal steps"""
+        self._rng = random.Random(seed)
+
+    def choose_move(self, game):
+        """Return the pawn move closest to the goal row"""
+        field = game.get_distance_field(game.get_turn())
+        moves = game.legal_pawn_moves()
+        if not moves:
+            return None  # the pawn is boxed in
+        return ('p', min(moves, key=lambda c: (field[c[1] * 9 + c[0]],
+                                               self._rng.random())))
+
+
+def make_agent(spec, seed=None):
+    """
+    Create a player from a spec string, see the top of this file.
+
+    :param spec: str for the kind of player and an optional number
+    :param seed: int seed for players that use random numbers
+    :return: the player
+    """
+    name, _, value = spec.partition(':')
+    if name == 'random':
+        return RandomAgent(seed)
+    if name == 'greedy':
+        return PathAgent(seed)
+    if name == 'alphabeta':
+        return AlphaBetaPlayer(time_ms=int(value or 1000))
+    if name == 'mcts':
+        return MCTSPlayer(playouts=int(value or 2000), seed=seed)
+    if name == 'book':
+        import book  # book.py imports this module
+        path, _, fallback = value.partition('+')
+        return book.BookAgent(book.OpeningBook(path),
+                              make_agent(fallback or 'alphabeta', seed))
+    raise ValueError("Unknown player: " + spec)
@@ -0,0 +1,326 @@
+# Description:  Computer player for Quoridor using alpha-beta search.
+# Associated Files: Quoridor.py, bitboard.py, zobrist.py
+
+"""
+AlphaBetaPlayer picks a move for the player whose turn it is in a
+QuoridorGame.  It uses:
+    Negamax search with alpha-beta pruning, playing and taking back moves
+        with push() and pop() on the game it is given.
+    Iterative deepening, searching one ply deeper each time until the time
+        budget runs out.  The best move from the deepest finished search is
+        played.
+    A transposition table with a fixed number of slots, indexed by the
+        Zobrist key of the position, so memory use doesn't grow.
+    Move ordering by shortest path difference: the move from the table
+        first, then pawn moves that get closer to the goal, then fences.
+
+Only fences on the edges of the cells along the opponent's shortest path
+are searched, which keeps the number of moves at each node small.  Set
+all_fences to search every fence.
+
+Example:
+    player = AlphaBetaPlayer(time_ms=500)
+    result = player.search(game)
+    game.push(result.move)
+    print(result.depth, result.nodes_per_sec)
+"""
+
+import time
+from collections import namedtuple
+
+import bitboard
+
+WIN = 10000  # Score for a won position
+FENCE_WEIGHT = 0.5  # Score for each fence a player has left over the other
+
+# Flags for the scores in the transposition table
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+SearchResult = namedtuple('SearchResult', ['move', 'score', 'depth', 'nodes',
+                                           'elapsed', 'nodes_per_sec'])
+
+
+class SearchTimeout(Exception):
+    """Raised inside the search when the time budget has been used up"""
+    pass
+
+
+def evaluate(game):
+    """
+    Score a position for the player whose turn it is.  Positive scores
+    are good for that player.
+
+    :param game: QuoridorGame to score
+    :return: number, the opponent's distance to their goal minus the
+        player's distance, plus a little for each extra fence
+    """
+    player = game.get_turn()
+    opp = game.get_opp_player(player)
+    score = game.get_distance(opp) - game.get_distance(player)
+    fences = game.get_fence_count(player) - game.get_fence_count(opp)
+    return score + FENCE_WEIGHT * fences
+
+
+def candidate_moves(game, all_fences=False):
+    """
+    Return the moves worth searching for the player whose turn it is: every
+    pawn move, and the fences on the edges of the cells along the opponent's
+    shortest path.
+
+    :param game: QuoridorGame to find the moves in
+    :param all_fences: True to return every legal fence
+    :return: list of move tuples
+    """
+    moves = [('p', coord) for coord in game.legal_pawn_moves()]
+    if all_fences:
+        moves.extend(game.legal_fences())
+        return moves
+
+    # Edges of every cell on the opponent's shortest path
+    opp = game.get_opp_player(game.get_turn())
+    near = 0
+    for cell in bitboard.iter_bits(game.get_path_cells(opp)):
+        near |= bitboard.CELL_EDGES[cell]
+    moves.extend(game.legal_fences(near))
+    return moves
+
+
+class TranspositionTable:
+    """Fixed size table of search results indexed by Zobrist key"""
+
+    def __init__(self, bits=18):
+        """
+        Create the table.
+
+        :param bits: int, the table has 2 ** bits slots
+        """
+        self._mask = (1 << bits) - 1
+        self._slots = [None] * (1 << bits)
+
+    def get(self, key):
+        """Return the (key, depth, score, flag, move) entry for key, or None"""
+        entry = self._slots[key & self._mask]
+        if entry is not None and entry[0] == key:
+            return entry
+        return None
+
+    def put(self, key, depth, score, flag, move):
+        """Save a search result, replacing whatever was in the slot"""
+        self._slots[key & self._mask] = (key, depth, score, flag, move)
+
+    def clear(self):
+        """Remove every entry from the table"""
+        self._slots = [None] * len(self._slots)
+
+
+class AlphaBetaPlayer:
+    """Choose moves with an iterative deepening alpha-beta search"""
+
+    def __init__(self, time_ms=1000, max_depth=32, table_bits=18,
+                 all_fences=False):
+        """
+        Create the player.
+
+        :param time_ms: int for the time budget of each move in milliseconds
+        :param max_depth: int for the deepest search to try
+        :param table_bits: int, the transposition table has 2 ** table_bits
+            slots
+        :param all_fences: True to search every legal fence
+        """
+        self._time_ms = time_ms
+        self._max_depth = max_depth
+        self._all_fences = all_fences
+        self._table = TranspositionTable(table_bits)
+        self._nodes = 0
+        self._deadline = 0
+        self._last_result = None
+
+    def choose_move(self, game):
+        """Return the best move found for the player whose turn it is"""
+        return self.search(game).move
+
+    def get_last_result(self):
+        """Return the SearchResult from the last search, or None"""
+        return self._last_result
+
+    def search(self, game, time_ms=None):
+        """
+        Search for the best move within the time budget.  The game is left
+        as it was when the search finishes.
+
+        :param game: QuoridorGame to pick a move in
+        :param time_ms: int for the time budget, defaults to the player's
+        :return: SearchResult for the deepest finished search
+        """
+        if time_ms is None:
+            time_ms = self._time_ms
+        start = time.perf_counter()
+        self._deadline = start + time_ms / 1000
+        self._nodes = 0
+        moves = self.root_moves(game)
+        best = (moves[0] if moves else None, 0, 0)
+        for depth in range(1, self._max_depth + 1 if moves else 1):
+            try:
+                move, score = self.search_root(game, moves, depth)
+            except SearchTimeout:
+                break
+            best = (move, score, depth)
+            # Search the best move first in the next iteration
+            moves.remove(move)
+            moves.insert(0, move)
+            if abs(score) >= WIN - self._max_depth:
+                break
+        elapsed = time.perf_counter() - start
+        self._last_result = SearchResult(best[0], best[1], best[2],
+                                         self._nodes, elapsed,
+                                         self._nodes / max(elapsed, 1e-9))
+        return self._last_result
+
+    def root_moves(self, game):
+        """
+        Return the moves at the root sorted by the shortest path difference
+        after each move, best first.
+        """
+        scored = []
+        for move in self.candidate_moves(game):
+            game.push(move)
+            scored.append((-evaluate(game), move))
+            game.pop()
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return [move for score, move in scored]
+
+    def search_root(self, game, moves, depth):
+        """Return the (move, score) of the best move searched to depth"""
+        alpha, beta = -WIN - 1, WIN + 1
+        best_move = moves[0]
+        ply = game.get_ply()
+        try:
+            for move in moves:
+                game.push(move)
+                score = -self.negamax(game, depth - 1, -beta, -alpha, 1)
+                game.pop()
+                if score > alpha:
+                    alpha, best_move = score, move
+        finally:
+            # A timeout can leave moves on the game, take them back
+            while game.get_ply() > ply:
+                game.pop()
+        self._table.put(game.get_position_key(), depth, alpha, EXACT,
+                        best_move)
+        return best_move, alpha
+
+    def negamax(self, game, depth, alpha, beta, ply):
+        """
+        Score a position with alpha-beta search for the player whose turn
+        it is.
+
+        :param game: QuoridorGame to search
+        :param depth: int for the number of plies left to search
+        :param alpha: number, the score the player is already sure of
+        :param beta: number, the score the opponent is already sure of
+        :param ply: int for the number of plies from the root
+        :return: number for the score of the position
+        """
+        self._nodes += 1
+        if self._nodes & 255 == 0 and time.perf_counter() > self._deadline:
+            raise SearchTimeout()
+
+        # The player who just moved has won
+        if game.get_winner() is not None:
+            return ply - WIN
+        if depth <= 0:
+            return evaluate(game)
+
+        # Use the transposition table to cut off or order the search
+        key = game.get_position_key()
+        entry = self._table.get(key)
+        table_move = None
+        if entry is not None:
+            table_move = entry[4]
+            cutoff = self.table_cutoff(entry, depth, alpha, beta, ply)
+            if cutoff is not None:
+                return cutoff
+
+        alpha_start = alpha
+        best_score, best_move = -WIN - 1, None
+        for move in self.ordered_moves(game, table_move):
+            game.push(move)
+            score = -self.negamax(game, depth - 1, -beta, -alpha, ply + 1)
+            game.pop()
+            if score > best_score:
+                best_score, best_move = score, move
+                alpha = max(alpha, score)
+                if alpha >= beta:
+                    break
+
+        if best_move is None:
+            return evaluate(game)  # no legal moves
+        self.table_store(key, depth, best_score, alpha_start, beta,
+                         best_move, ply)
+        return best_score
+
+    def table_cutoff(self, entry, depth, alpha, beta, ply):
+        """Return a score from a table entry if it ends the search, else None"""
+        key, entry_depth, score, flag, move = entry
+        if entry_depth < depth:
+            return None
+        score = self.from_table(score, ply)
+        if flag == EXACT or (flag == LOWER and score >= beta) or \
+                (flag == UPPER and score <= alpha):
+            return score
+        return None
+
+    def table_store(self, key, depth, score, alpha, beta, move, ply):
+        """Save a search result with a flag for what kind of bound it is"""
+        if score <= alpha:
+            flag = UPPER
+        elif score >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self._table.put(key, depth, self.to_table(score, ply), flag, move)
+
+    def to_table(self, score, ply):
+        """Store win scores as distance from the position, not the root"""
+        if score >= WIN - 1000:
+            return score + ply
+        if score <= 1000 - WIN:
+            return score - ply
+        return score
+
+    def from_table(self, score, ply):
+        """Turn a win score from the table back into distance from the root"""
+        if score >= WIN - 1000:
+            return score - ply
+        if score <= 1000 - WIN:
+            return score + ply
+        return score
+
+    def candidate_moves(self, game):
+        """Return the moves to search, see candidate_moves()"""
+        return candidate_moves(game, self._all_fences)
+
+    def ordered_moves(self, game, table_move):
+        """
+        Return the moves to search in order: the move from the table, then
+        pawn moves closest to the goal first, then fences that cut the
+        opponent's shortest path, then the other fences.
+        """
+        player = game.get_turn()
+        field = game.get_distance_field(player)
+        opp_edges = game.get_path_edges(game.get_opp_player(player))
+
+        def order(move):
+            angle, (x, y) = move
+            if move == table_move:
+                return -1000
+            if angle == 'p':
+                return field[y * 9 + x] - 100
+            edge = bitboard.fence_bit(x, y)
+            if angle == 'v':
+                edge <<= bitboard.V_SHIFT
+            return 0 if edge & opp_edges else 1
+
+        return sorted(self.candidate_moves(game), key=order)
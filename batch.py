@@ -0,0 +1,215 @@
+# Description:  Play thousands of Quoridor games in lockstep with NumPy.
+# Associated Files: Quoridor.py, bitboard.py
+
+"""
+BatchGame holds B games as NumPy arrays and plays one move in every game
+at once, using the same rules as QuoridorGame.move_pawn() and
+QuoridorGame.place_fence().  The move is always played by the player whose
+turn it is in each game.
+
+The arrays are:
+    pawns: (B, 2, 2) int, pawns[b, player - 1] is the (x, y) of the pawn
+    h: (B, 10, 9) bool, h[b, y, x] is a horizontal fence on the top edge of
+        cell (x, y).  Rows 0 and 9 are the edges of the board.
+    v: (B, 9, 10) bool, v[b, y, x] is a vertical fence on the left edge of
+        cell (x, y).  Columns 0 and 9 are the edges of the board.
+    fences: (B, 2) int for the fences each player has left
+    turn: (B,) int of 1 or 2
+    winner: (B,) int, 0 when there is no winner yet
+
+The fence grids include the edges of the board, in the same layout as
+bitboard.py, so every fence check is a single indexing operation.  A fence
+covers one edge, so there are 72 slots for each direction.
+
+A batch of moves is three (B,) int arrays: kind (PAWN, H or V), x and y.
+play() returns a (B,) int array with ACCEPTED, REJECTED or UNFAIR for
+each game, matching True, False and "breaks the fair play rule".
+"""
+
+import numpy as np
+
+import bitboard
+
+# Kinds of move
+PAWN = 0
+H = 1
+V = 2
+
+# Results of a move
+REJECTED = 0
+ACCEPTED = 1
+UNFAIR = 2
+
+
+def mask_to_grid(mask):
+    """Return a fence mask from bitboard.py as a (10, 10) bool array"""
+    bits = [mask >> index & 1 for index in range(bitboard.V_SHIFT)]
+    return np.array(bits, dtype=bool).reshape(bitboard.SIZE + 1,
+                                              bitboard.ROW_BITS)
+
+
+def reachable(h, v, start, goal_row):
+    """
+    Flood fill every board at once to find which pawns can reach a row.
+
+    :param h: (N, 10, 9) bool horizontal fences
+    :param v: (N, 9, 10) bool vertical fences
+    :param start: (N, 2) int (x, y) of the pawns
+    :param goal_row: int for the row the pawns are trying to reach
+    :return: (N,) bool, True where the goal row can be reached
+    """
+    count = len(start)
+    reach = np.zeros((count, 9, 9), dtype=bool)
+    reach[np.arange(count), start[:, 1], start[:, 0]] = True
+
+    # An edge is open if there is no fence on it
+    open_y = ~h[:, 1:9, :]  # between row y - 1 and row y
+    open_x = ~v[:, :, 1:9]  # between column x - 1 and column x
+    while True:
+        grown = reach.copy()
+        grown[:, :8, :] |= reach[:, 1:, :] & open_y  # move up
+        grown[:, 1:, :] |= reach[:, :8, :] & open_y  # move down
+        grown[:, :, :8] |= reach[:, :, 1:] & open_x  # move left
+        grown[:, :, 1:] |= reach[:, :, :8] & open_x  # move right
+        if np.array_equal(grown, reach):
+            return reach[:, goal_row, :].any(axis=1)
+        reach = grown
+
+
+class BatchGame:
+    """B Quoridor games stored as NumPy arrays"""
+
+    def __init__(self, size):
+        """Create size new games"""
+        self.pawns = np.zeros((size, 2, 2), dtype=np.int64)
+        self.pawns[:, 0] = (4, 0)
+        self.pawns[:, 1] = (4, 8)
+        self.h = np.zeros((size, 10, 9), dtype=bool)
+        self.h[:, 0, :] = self.h[:, 9, :] = True
+        self.v = np.zeros((size, 9, 10), dtype=bool)
+        self.v[:, :, 0] = self.v[:, :, 9] = True
+        self.fences = np.full((size, 2), 10, dtype=np.int64)
+        self.turn = np.ones(size, dtype=np.int64)
+        self.winner = np.zeros(size, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.turn)
+
+    @classmethod
+    def from_games(cls, games):
+        """Create a BatchGame from a list of QuoridorGame objects"""
+        batch = cls(len(games))
+        for b, game in enumerate(games):
+            batch.pawns[b] = (game.get_location(1), game.get_location(2))
+            h, v = game.get_fence_masks()
+            batch.h[b] = mask_to_grid(h)[:, :9]
+            # The bottom left corner of v is not an edge of a cell
+            batch.v[b] = mask_to_grid(v)[:9, :]
+            batch.fences[b] = (game.get_fence_count(1),
+                               game.get_fence_count(2))
+            batch.turn[b] = game.get_turn()
+            batch.winner[b] = game.get_winner() or 0
+        return batch
+
+    def play(self, kind, x, y):
+        """
+        Play one move in every game for the player whose turn it is.
+
+        :param kind: (B,) int, PAWN, H or V for each game
+        :param x: (B,) int x coordinate of the move
+        :param y: (B,) int y coordinate of the move
+        :return: (B,) int, ACCEPTED, REJECTED or UNFAIR for each game
+        """
+        kind, x, y = np.asarray(kind), np.asarray(x), np.asarray(y)
+        result = np.full(len(self), REJECTED, dtype=np.int64)
+        live = self.winner == 0
+        on_board = (x >= 0) & (x <= 8) & (y >= 0) & (y <= 8)
+        # Keep the indexes on the board, rejected moves are masked out
+        x, y = np.clip(x, 0, 8), np.clip(y, 0, 8)
+
+        pawn = live & on_board & (kind == PAWN)
+        pawn[pawn] = self.pawn_ok(np.flatnonzero(pawn), x[pawn], y[pawn])
+        self.move_pawns(np.flatnonzero(pawn), x[pawn], y[pawn])
+        result[pawn] = ACCEPTED
+
+        fence = live & on_board & ((kind == H) | (kind == V))
+        index = np.flatnonzero(fence)
+        result[index] = self.place_fences(index, kind[index], x[index],
+                                          y[index])
+        return result
+
+    def pawn_ok(self, b, x, y):
+        """
+        Check pawn moves the same way as QuoridorGame.validate_move().
+
+        :param b: (N,) int indexes of the games
+        :param x: (N,) int x coordinates of the moves, on the board
+        :param y: (N,) int y coordinates of the moves, on the board
+        :return: (N,) bool, True where the move is allowed
+        """
+        player = self.turn[b] - 1
+        xc, yc = self.pawns[b, player, 0], self.pawns[b, player, 1]
+        ox, oy = self.pawns[b, 1 - player, 0], self.pawns[b, 1 - player, 1]
+        move_x, move_y = x - xc, y - yc
+        size = np.abs(move_x) + np.abs(move_y)
+        diagonal = (np.abs(move_x) == 1) & (np.abs(move_y) == 1)
+        straight = (move_x == 0) | (move_y == 0)
+
+        ok = (size >= 1) & (size <= 2) & ~(diagonal & (ox != xc))
+        ok &= ~(straight & (size == 2) & (move_y == 0))  # horizontal jump
+        ok &= ~(straight & (size == 2) & (oy != yc + move_y // 2))
+        ok &= ~self.probe(b, move_x, move_y, xc, x, y)
+        ok &= ~((x == ox) & (y == oy))
+
+        # Diagonal moves need the opponent ahead, no fence between the
+        # pawns and a fence behind the opponent
+        y_delta = oy - yc
+        between = np.where(y_delta < 0, yc, yc + 1)
+        behind = np.where(y_delta < 0, y, y + 1)
+        diagonal_ok = (y_delta * move_y >= 0) & ~self.h[b, between, xc] & \
+            self.h[b, np.minimum(behind, 9), xc]
+        return ok & (~diagonal | diagonal_ok)
+
+    def probe(self, b, move_x, move_y, xc, x, y):
+        """Return (N,) bool, True where the fence from fence_check() is there"""
+        v_fence = self.v[b, y, np.where(move_x < 0, x + 1, x)]
+        h_fence = self.h[b, np.where(move_y < 0, y + 1, y), xc]
+        return np.where(move_x != 0, v_fence, h_fence)
+
+    def move_pawns(self, b, x, y):
+        """Move the pawns, update the winners and change the turns"""
+        player = self.turn[b] - 1
+        self.pawns[b, player, 0] = x
+        self.pawns[b, player, 1] = y
+        won = np.where(player == 0, y == 8, y == 0)
+        self.winner[b[won]] = player[won] + 1
+        self.turn[b] = 2 - player
+
+    def place_fences(self, b, kind, x, y):
+        """
+        Check and place fences the same way as QuoridorGame.place_fence().
+
+        :return: (N,) int results for the games
+        """
+        player = self.turn[b] - 1
+        is_h = kind == H
+        taken = np.where(is_h, self.h[b, y, x], self.v[b, y, x])
+        ok = (self.fences[b, player] > 0) & ~taken
+        b, player, is_h, x, y = b[ok], player[ok], is_h[ok], x[ok], y[ok]
+        hb, vb = b[is_h], b[~is_h]
+        self.h[hb, y[is_h], x[is_h]] = True
+        self.v[vb, y[~is_h], x[~is_h]] = True
+
+        # Both players must still be able to reach their goal row
+        fair = reachable(self.h[b], self.v[b], self.pawns[b, 0], 8) & \
+            reachable(self.h[b], self.v[b], self.pawns[b, 1], 0)
+        self.h[hb, y[is_h], x[is_h]] &= fair[is_h]
+        self.v[vb, y[~is_h], x[~is_h]] &= fair[~is_h]
+        self.fences[b[fair], player[fair]] -= 1
+        self.turn[b[fair]] = 2 - player[fair]
+
+        result = np.full(len(ok), REJECTED, dtype=np.int64)
+        placed = np.full(len(b), UNFAIR, dtype=np.int64)
+        placed[fair] = ACCEPTED
+        result[ok] = placed
+        return result
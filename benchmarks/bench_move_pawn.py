@@ -0,0 +1,93 @@
+# Description:  Micro-benchmark for QuoridorGame.move_pawn()
+# Associated Files: Quoridor.py
+
+"""
+Time the cost of a single move_pawn() call for straight moves, jumps,
+diagonal moves and rejected moves.  Each scenario repeats a short cycle of
+moves that brings the pawns back to where they started, so the game can be
+reused for every repeat.
+
+Run from the top of the repository:
+    python benchmarks/bench_move_pawn.py
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Quoridor import QuoridorGame
+
+
+def straight_game():
+    """Return a new game and a cycle of straight moves"""
+    game = QuoridorGame()
+    cycle = [(1, (4, 1)), (2, (4, 7)), (1, (4, 0)), (2, (4, 8))]
+    return game, cycle
+
+
+def jump_game():
+    """Return a game with facing pawns and a cycle with two jumps"""
+    game = QuoridorGame()
+    game._p1 = (4, 4)
+    game._p2 = (4, 5)
+    cycle = [(1, (4, 6)), (2, (4, 7)), (1, (4, 5)), (2, (4, 6)),
+             (1, (4, 4)), (2, (4, 5))]
+    return game, cycle
+
+
+def diagonal_game():
+    """Return a game with facing pawns and a cycle with two diagonal moves"""
+    game = QuoridorGame()
+    game._p1 = (4, 4)
+    game._p2 = (4, 5)
+    game._board.add_fence('h', 4, 6)  # fence below the pawns
+    cycle = [(1, (5, 5)), (2, (4, 4)), (1, (4, 5)), (2, (5, 5)),
+             (1, (4, 4)), (2, (4, 5))]
+    return game, cycle
+
+
+def rejected_game():
+    """Return a new game and a cycle of moves that are all rejected"""
+    game = QuoridorGame()
+    cycle = [(1, (4, 3)), (1, (5, 1)), (1, (9, 0)), (2, (4, 7))]
+    return game, cycle
+
+
+SCENARIOS = [('straight', straight_game), ('jump', jump_game),
+             ('diagonal', diagonal_game), ('rejected', rejected_game)]
+
+
+def time_scenario(make_game, number=20000, repeat=5):
+    """
+    Time a scenario.
+
+    :param make_game: function that returns a game and a cycle of moves
+    :param number: int for the number of cycles to run per repeat
+    :param repeat: int for the number of repeats, the fastest is kept
+    :return: float for the microseconds per move_pawn() call
+    """
+    game, cycle = make_game()
+    move_pawn = game.move_pawn
+
+    # Every scenario except 'rejected' must only contain legal moves
+    results = [move_pawn(player, coord) for player, coord in cycle]
+    assert all(results) or not any(results), results
+
+    def run():
+        for player, coord in cycle:
+            move_pawn(player, coord)
+
+    best = min(timeit.repeat(run, number=number, repeat=repeat))
+    return best / (number * len(cycle)) * 1e6
+
+
+def main():
+    """Print the cost of each scenario"""
+    for name, make_game in SCENARIOS:
+        print("%-10s %7.3f us/move_pawn" % (name, time_scenario(make_game)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+# Description:  Load test for server.py with a swarm of local clients.
+# Associated Files: server.py, agents.py, notation.py
+
+"""
+Start server.py in its own process and connect pairs of clients to it.
+Each pair plays random games in a session, and starts a new session when
+a game ends, until the time is up.  Every client keeps its own copy of the
+game from the deltas, so it only sends legal moves.
+
+The latency of a move is the time from sending it to getting its delta
+back.  The clients share one process, so with many clients some of the
+latency is time spent waiting for other clients to pick their moves.
+
+Run from the top of the repository:
+    python benchmarks/bench_server.py
+    python benchmarks/bench_server.py --pairs 500 --seconds 20
+    python benchmarks/bench_server.py --unix /tmp/quoridor.sock
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import notation
+from Quoridor import QuoridorGame
+from agents import RandomAgent
+
+
+async def connect(address):
+    """Return (reader, writer) for a server address"""
+    if isinstance(address, str):
+        return await asyncio.open_unix_connection(address)
+    return await asyncio.open_connection(*address)
+
+
+async def client(address, pair, seat, deadline, latencies, going,
+                 max_plies=200):
+    """
+    Play games as one client of a pair until the deadline.
+
+    :param address: path of a Unix socket, or a (host, port) tuple
+    :param pair: int for the pair number, used to name the sessions
+    :param seat: int of 0 or 1 for which client of the pair this is
+    :param deadline: float from time.perf_counter() to stop at
+    :param latencies: list to add the seconds each move took to
+    :param going: dict of (pair, game number) to True if the game is
+        played, the first client of a pair to get there decides for both
+    :param max_plies: int for the most plies before a game is given up
+    """
+    reader, writer = await connect(address)
+    agent = RandomAgent(seed=pair * 2 + seat, fence_rate=0.1)
+    number = 0
+    while going.setdefault((pair, number), time.perf_counter() < deadline):
+        game = QuoridorGame()
+        writer.write(b'{"op":"join","session":"%d.%d"}\n' % (pair, number))
+        player = json.loads(await reader.readline())['player']
+        sent = None
+        while True:
+            message = json.loads(await reader.readline())
+            if message['type'] == 'delta':
+                game.push(notation.parse_move(message['move']))
+                if message['player'] == player:
+                    latencies.append(time.perf_counter() - sent)
+                if message['winner'] or message['ply'] >= max_plies:
+                    break
+            elif message['type'] != 'start':
+                raise RuntimeError('unexpected message %r' % message)
+            if game.get_turn() == player:
+                move = agent.choose_move(game)
+                sent = time.perf_counter()
+                writer.write(b'{"op":"move","move":"%s"}\n'
+                             % notation.format_move(move).encode())
+        # Leave the session by joining the next one on a new connection
+        writer.close()
+        reader, writer = await connect(address)
+        number += 1
+    writer.close()
+
+
+async def swarm(address, pairs, seconds):
+    """Run the clients and return the list of move latencies"""
+    latencies = []
+    going = {}
+    deadline = time.perf_counter() + seconds
+    await asyncio.gather(*[client(address, pair, seat, deadline, latencies,
+                                  going)
+                           for pair in range(pairs) for seat in (0, 1)])
+    return latencies
+
+
+def start_server(args):
+    """Start server.py and return (process, address)"""
+    command = [sys.executable, os.path.join(ROOT, 'server.py'),
+               '--max-sessions', str(args.pairs * 4)]
+    if args.unix:
+        command += ['--unix', args.unix]
+    else:
+        command += ['--port', '0']
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()  # 'listening on ...'
+    if args.unix:
+        return process, args.unix
+    host, port = line.split('(')[1].rstrip(')\n').split(', ')
+    return process, (host.strip("'"), int(port))
+
+
+def percentile(values, fraction):
+    """Return the value at a fraction of the way through sorted values"""
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def main():
+    """Run the load test and print moves per second and latencies"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--pairs', type=int, default=100,
+                        help='number of pairs of clients')
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--unix', help='Unix socket path instead of TCP')
+    args = parser.parse_args()
+
+    process, address = start_server(args)
+    try:
+        start = time.perf_counter()
+        latencies = sorted(asyncio.run(swarm(address, args.pairs,
+                                             args.seconds)))
+        elapsed = time.perf_counter() - start
+    finally:
+        process.terminate()
+        process.wait()
+    print('%d clients, %d moves in %.1f s' % (args.pairs * 2, len(latencies),
+                                              elapsed))
+    print('%10.0f moves/sec' % (len(latencies) / elapsed))
+    for name, fraction in (('p50', 0.5), ('p90', 0.9), ('p99', 0.99)):
+        print('%10.2f ms %s latency' % (percentile(latencies, fraction) * 1e3,
+                                       name))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+# Description:  Memory used for each stored Quoridor position.
+# Associated Files: Quoridor.py, state.py
+
+"""
+Keep a large number of positions from random games alive and measure the
+memory they use with tracemalloc.  Compares whole QuoridorGame objects,
+made with QuoridorGame.from_state() so they have no move history, with
+GameState objects from get_state().  The random games are played before
+tracemalloc is started, so only the stored positions are measured.
+
+Run from the top of the repository:
+    python benchmarks/bench_state_memory.py
+    python benchmarks/bench_state_memory.py -n 100000
+
+Typical results on 64-bit CPython 3, per position:
+    QuoridorGame             ~630 bytes
+    GameState                  ~96 bytes
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Quoridor import QuoridorGame
+
+
+def positions(count, seed=0):
+    """Return a list of count GameStates, each a random move on from the
+    last, starting a new game when one ends"""
+    rnd = random.Random(seed)
+    game = QuoridorGame()
+    states = []
+    for index in range(count):
+        moves = game.legal_moves()
+        if game.get_winner() is not None or not moves:
+            game = QuoridorGame()
+            moves = game.legal_moves()
+        game.push(rnd.choice(moves))
+        states.append(game.get_state())
+    return states
+
+
+def keep_game(game, state):
+    """Return a new QuoridorGame in the position"""
+    return QuoridorGame.from_state(state)
+
+
+def keep_state(game, state):
+    """Return a new GameState for the position, packed again by game"""
+    game.set_state(state)
+    return game.get_state()
+
+
+def measure(states, keep):
+    """
+    Measure the memory used to keep positions.
+
+    :param states: list of GameStates for the positions
+    :param keep: function that takes a scratch game and a GameState and
+        returns what to store
+    :return: tuple of (bytes per position, seconds per position)
+    """
+    game = QuoridorGame()
+    tracemalloc.start()
+    start_mem = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    kept = [keep(game, state) for state in states]
+    elapsed = time.perf_counter() - start
+    used = tracemalloc.get_traced_memory()[0] - start_mem
+    tracemalloc.stop()
+    # Leave out the list holding them, 8 bytes per position
+    return (used - sys.getsizeof(kept)) / len(kept), elapsed / len(kept)
+
+
+def main():
+    """Print the memory used for each position"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('-n', type=int, default=5000,
+                        help='number of positions to keep')
+    args = parser.parse_args()
+    states = positions(args.n)
+    for name, keep in (('QuoridorGame', keep_game),
+                       ('GameState', keep_state)):
+        size, seconds = measure(states, keep)
+        print('%-24s %8.0f bytes/position %8.2f us/position'
+              % (name, size, seconds * 1e6))
+
+
+if __name__ == '__main__':
+    main()
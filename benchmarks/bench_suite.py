@@ -0,0 +1,283 @@
+# Description:  Benchmark suite for the hot paths of the Quoridor engine.
+# Associated Files: Quoridor.py, selfplay.py, bench_move_pawn.py
+
+"""
+Time move_pawn() (straight, jump and diagonal moves), place_fence() with
+its fair play check on an empty and a dense board, random self-play games,
+print_board() and opening book lookups.  For each scenario the suite
+reports operations per second and the bytes allocated per operation,
+measured with tracemalloc as the peak memory an operation uses.
+
+A place_fence() operation is one place_fence() call and the pop() that
+takes the fence back, so the same board can be used for every repeat.  A
+selfplay operation is one whole game between two random players.  A
+book.lookup operation looks up a position in a book of 100000 entries,
+half of the lookups find it.
+
+Run from the top of the repository:
+    python benchmarks/bench_suite.py
+    python benchmarks/bench_suite.py --save results.json
+    python benchmarks/bench_suite.py --baseline benchmarks/baseline.json
+
+With --baseline the exit status is 1 when any scenario is slower, or
+allocates more, than the baseline by more than --tolerance.  The stored
+baseline was made on one machine, so save a new one with --save before
+comparing on another.
+"""
+
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Quoridor import QuoridorGame
+from agents import RandomAgent
+from book import BookBuilder, OpeningBook
+from bench_move_pawn import straight_game, jump_game, diagonal_game
+from selfplay import play_game
+
+
+def pawn_op(make_game):
+    """Return an operation that plays the next move of a move_pawn() cycle"""
+    game, cycle = make_game()
+    moves = itertools.cycle(cycle)
+
+    def run():
+        player, coord = next(moves)
+        game.move_pawn(player, coord)
+    return run
+
+
+def fence_op(game, fences):
+    """
+    Return an operation that places the next fence of a list and takes it
+    back again.
+
+    :param game: QuoridorGame to place the fences on
+    :param fences: list of ('h' or 'v', (x, y)) fences that can be placed
+    """
+    player = game.get_turn()
+    index = 0
+
+    def run():
+        nonlocal index
+        angle, coord = fences[index]
+        index = (index + 1) % len(fences)
+        assert game.place_fence(player, angle, coord) is True
+        game.pop()
+    return run
+
+
+def empty_fence_op():
+    """Return a place_fence() operation on a board with no fences"""
+    game = QuoridorGame()
+    return fence_op(game, game.legal_fences()[::7])
+
+
+def dense_fence_op():
+    """
+    Return a place_fence() operation on a board where each player has
+    placed 8 fences.  The fences tried all cross player 1's shortest path,
+    so the fair play check has to search the board again.
+    """
+    rng = random.Random(1)
+    game = QuoridorGame()
+    for _ in range(16):
+        game.push(rng.choice(game.legal_fences()))
+    fences = game.legal_fences(game.get_path_edges(game.get_turn()))
+    return fence_op(game, fences)
+
+
+def selfplay_op():
+    """Return an operation that plays one game between random players"""
+    rng = random.Random(0)
+
+    def run():
+        seed = rng.getrandbits(32)
+        play_game(RandomAgent(seed), RandomAgent(seed + 1))
+    return run
+
+
+def print_board_op():
+    """Return an operation that prints a board with a few fences"""
+    game = QuoridorGame()
+    for move in [('h', (4, 2)), ('v', (3, 3)), ('p', (4, 1)), ('h', (2, 7))]:
+        game.push(move)
+    out = io.StringIO()
+
+    def run():
+        with contextlib.redirect_stdout(out):
+            game.print_board()
+        out.seek(0)
+        out.truncate()
+    return run
+
+
+def book_lookup_op():
+    """Return an operation that looks up positions in an opening book"""
+    rng = random.Random(2)
+    builder = BookBuilder()
+    keys = [rng.getrandbits(64) for _ in range(100000)]
+    for key in keys:
+        builder.add(key, ('p', (4, 1)))
+    folder = tempfile.TemporaryDirectory(ignore_cleanup_errors=True)
+    path = os.path.join(folder.name, 'bench.qbk')
+    builder.write(path)
+    book = OpeningBook(path)
+    # Every other key is one the book doesn't have
+    lookups = itertools.cycle([keys[i] ^ (i & 1) for i in range(1000)])
+
+    def run():
+        book.lookup(next(lookups))
+    run.folder = folder  # keep the file until the operation is gone
+    return run
+
+
+# name: (function that makes the operation, number of operations to time)
+SCENARIOS = {
+    'move_pawn.straight': (lambda: pawn_op(straight_game), 50000),
+    'move_pawn.jump': (lambda: pawn_op(jump_game), 50000),
+    'move_pawn.diagonal': (lambda: pawn_op(diagonal_game), 50000),
+    'place_fence.empty': (empty_fence_op, 10000),
+    'place_fence.dense': (dense_fence_op, 10000),
+    'selfplay.random': (selfplay_op, 20),
+    'print_board': (print_board_op, 20000),
+    'book.lookup': (book_lookup_op, 100000),
+}
+
+
+def time_op(run, number, repeat):
+    """Return the fastest of repeat runs, in seconds per operation"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            run()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best / number
+
+
+def alloc_op(run, number):
+    """
+    Return the peak bytes allocated by one operation.  The median of number
+    operations is used, so a cache that fills up once is left out.
+    """
+    tracemalloc.start()
+    peaks = []
+    for _ in range(number):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        run()
+        peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    tracemalloc.stop()
+    return statistics.median(peaks)
+
+
+def run_suite(names=None, scale=1.0, repeat=3):
+    """
+    Run the benchmarks.
+
+    :param names: list of scenario names, None for every scenario
+    :param scale: float to multiply the number of operations by
+    :param repeat: int for the number of timed runs, the fastest is kept
+    :return: dict of scenario name to a dict with 'ops_per_sec' and
+        'alloc_bytes_per_op'
+    """
+    results = {}
+    for name in names or SCENARIOS:
+        make_op, number = SCENARIOS[name]
+        number = max(1, int(number * scale))
+        run = make_op()
+        run()  # warm up any caches
+        seconds = time_op(run, number, repeat)
+        alloc = alloc_op(run, min(number, 1000))
+        results[name] = {'ops_per_sec': round(1 / seconds, 1),
+                         'alloc_bytes_per_op': round(alloc, 1)}
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """
+    Compare results with a baseline.
+
+    :param results: dict from run_suite()
+    :param baseline: dict from run_suite(), scenarios missing from either
+        one are left out
+    :param tolerance: float for the fraction a scenario may get worse by
+    :return: list of strings, one for each regression
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        base = baseline[name]
+        if result['ops_per_sec'] < base['ops_per_sec'] * (1 - tolerance):
+            regressions.append('%s: %.1f ops/sec, baseline %.1f'
+                               % (name, result['ops_per_sec'],
+                                  base['ops_per_sec']))
+        # A few bytes are always allowed, tracemalloc is not exact
+        limit = base['alloc_bytes_per_op'] * (1 + tolerance) + 64
+        if result['alloc_bytes_per_op'] > limit:
+            regressions.append('%s: %.1f bytes/op, baseline %.1f'
+                               % (name, result['alloc_bytes_per_op'],
+                                  base['alloc_bytes_per_op']))
+    return regressions
+
+
+def main(argv=None):
+    """Run the suite, print the results and compare with a baseline"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('names', nargs='*',
+                        help='scenarios to run, all of them by default: '
+                        + ', '.join(SCENARIOS))
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help='multiply the number of operations by this')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='timed runs per scenario, the fastest is kept')
+    parser.add_argument('--save', help='write the results to this JSON file')
+    parser.add_argument('--baseline', help='JSON file to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='fraction a scenario may get worse by')
+    args = parser.parse_args(argv)
+    for name in args.names:
+        if name not in SCENARIOS:
+            parser.error('unknown scenario ' + name)
+
+    results = run_suite(args.names, args.scale, args.repeat)
+    for name, result in results.items():
+        print('%-20s %12.1f ops/sec %10.1f bytes/op'
+              % (name, result['ops_per_sec'], result['alloc_bytes_per_op']))
+
+    if args.save:
+        with open(args.save, 'w') as file:
+            json.dump({'python': platform.python_version(),
+                       'machine': platform.machine(),
+                       'results': results}, file, indent=2, sort_keys=True)
+            file.write('\n')
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)['results']
+        regressions = compare(results, baseline, args.tolerance)
+        for line in regressions:
+            print('REGRESSION ' + line)
+        if regressions:
+            return 1
+        print('No regressions against ' + args.baseline)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,205 @@
+# Description:  Frame time benchmark for the pygame board in main.py.
+# Associated Files: main.py, hittest.py
+
+"""
+Run main.Simulate headless, with SDL's dummy video driver, and feed it
+scripted mouse and key events one frame at a time.  The time of a frame
+is the time Simulate.step() takes to handle the frame's events and draw
+the screen.  The loop is not capped at main.FPS, so this is the work a
+frame costs, not the time it is shown for.
+
+Scenes:
+    idle        no events, nothing changes on the screen
+    clicks      the mouse moves every frame and every fourth frame has a
+                click, selecting pawns and fences, rotating a fence and
+                clicking empty squares, without changing the game
+    endgame     a game is played to a win first, then the mouse moves
+                every frame with the winner on the screen
+    bot         two alphabeta players think in worker processes, see
+                bot.py, while the mouse moves every frame.  Their moves
+                are taken from the pygame event queue.  The workers run
+                at a lower priority, so on a machine with one core they
+                only get the time the frames leave over, and this loop,
+                with no FPS cap, leaves them little.
+
+Run from the top of the repository:
+    python benchmarks/bench_ui.py
+    python benchmarks/bench_ui.py endgame --frames 5000
+    python benchmarks/bench_ui.py --full
+"""
+
+import argparse
+import contextlib
+import io
+import itertools
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+
+import hittest
+import main as ui
+from bot import BotThinker
+
+
+def click(pos):
+    """Return a left mouse button up event at a screen position"""
+    return pygame.event.Event(pygame.MOUSEBUTTONUP, pos=pos, button=1)
+
+
+def motion(pos):
+    """Return a mouse motion event to a screen position"""
+    return pygame.event.Event(pygame.MOUSEMOTION, pos=pos, rel=(0, 0),
+                              buttons=(0, 0, 0))
+
+
+def key(name):
+    """Return a key down event for a pygame key constant"""
+    return pygame.event.Event(pygame.KEYDOWN, key=name, mod=0, unicode='',
+                              scancode=0)
+
+
+def sweep():
+    """Return an endless path of mouse positions across the board, cell
+    centers and the fence markers between them"""
+    points = []
+    for y in range(hittest.SIZE):
+        for x in range(hittest.SIZE):
+            cx, cy = hittest.cell_center(x, y)
+            points += [(cx, cy), (cx + hittest.PITCH // 2, cy)]
+    return itertools.cycle(points)
+
+
+def idle_frames(sim):
+    """Return endless empty frames"""
+    return itertools.repeat([])
+
+
+def click_frames(sim):
+    """Return endless frames of mouse moves and clicks that select and
+    rotate pieces without making a move"""
+    fence = sim.fence_at((30, 160))  # top of player 1's tray
+    empty = (40, 600)  # not on any sprite
+    clicks = itertools.cycle([
+        click(sim.p1.rect.center), click(empty),
+        click(fence.rect.center), key(pygame.K_LEFT), key(pygame.K_LEFT),
+        click(sim.p2.rect.center), click(empty),
+        click(sim.p1.rect.center)])
+    positions = sweep()
+    for number in itertools.count():
+        frame = [motion(next(positions))]
+        if number % 4 == 0:
+            frame.append(next(clicks))
+        yield frame
+
+
+def race(sim):
+    """
+    Play a game to a win with clicks: player 1 walks straight down while
+    player 2 steps aside and back.  Does not return anything.
+    """
+    p2_cells = itertools.cycle([(3, 8), (3, 7)])
+    for row in range(1, hittest.SIZE):
+        sim.step([click(sim.p1.rect.center),
+                  click(hittest.cell_center(4, row))])
+        if row < hittest.SIZE - 1:
+            sim.step([click(sim.p2.rect.center),
+                      click(hittest.cell_center(*next(p2_cells)))])
+
+
+def endgame_frames(sim):
+    """Return endless frames of mouse moves after a finished game"""
+    race(sim)
+    positions = sweep()
+    while True:
+        yield [motion(next(positions))]
+
+
+def bot_frames(sim):
+    """Return endless frames of mouse moves and the bots' moves, after
+    each bot has made a move so their workers have started"""
+    while sim._myGame.get_ply() < 2:
+        sim.step(pygame.event.get(ui.BOT_MOVE))
+        time.sleep(0.01)
+    positions = sweep()
+    while True:
+        yield [motion(next(positions))] + pygame.event.get(ui.BOT_MOVE)
+
+
+SCENES = {
+    'idle': idle_frames,
+    'clicks': click_frames,
+    'endgame': endgame_frames,
+    'bot': bot_frames,
+}
+
+
+def percentile(values, fraction):
+    """Return the value at a fraction of the way through sorted values"""
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def run_scene(name, frames, dirty_rects=True):
+    """
+    Time frames of a scene.
+
+    :param name: str key of SCENES
+    :param frames: int for the number of frames to time
+    :param dirty_rects: passed on to main.Simulate
+    :return: (sorted list of frame seconds, number of sprites at the end,
+        number of moves played)
+    """
+    # main.py prints as pieces are clicked, keep that out of the results
+    with contextlib.redirect_stdout(io.StringIO()):
+        bots = {}
+        if name == 'bot':
+            bots = {player: BotThinker('alphabeta', think_ms=50)
+                    for player in (1, 2)}
+        sim = ui.Simulate(dirty_rects=dirty_rects, headless=True, bots=bots)
+        sim.redraw_all()
+        sim.step([])
+        script = SCENES[name](sim)
+        next(script)  # set up the scene, such as playing to a win
+        times = []
+        for events in itertools.islice(script, frames):
+            start = time.perf_counter()
+            sim.step(events)
+            times.append(time.perf_counter() - start)
+        sim.close()
+    if name == 'endgame' and sim._myGame.get_winner() is None:
+        raise RuntimeError('the endgame script did not finish the game')
+    return sorted(times), len(sim._render_group), sim._myGame.get_ply()
+
+
+def main(argv=None):
+    """Run the scenes and print frame time percentiles"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('names', nargs='*',
+                        help='scenes to run, all of them by default: '
+                        + ', '.join(SCENES))
+    parser.add_argument('--frames', type=int, default=2000,
+                        help='frames to time in each scene')
+    parser.add_argument('--full', action='store_true',
+                        help='redraw the whole screen every frame')
+    args = parser.parse_args(argv)
+    for name in args.names:
+        if name not in SCENES:
+            parser.error('unknown scene ' + name)
+
+    print('%-8s %9s %9s %9s %9s %9s %8s %6s'
+          % ('scene', 'p50 ms', 'p90 ms', 'p99 ms', 'max ms', 'frames/s',
+             'sprites', 'moves'))
+    for name in args.names or SCENES:
+        times, sprites, moves = run_scene(name, args.frames, not args.full)
+        print('%-8s %9.3f %9.3f %9.3f %9.3f %9.0f %8d %6d'
+              % (name, percentile(times, 0.5) * 1e3,
+                 percentile(times, 0.9) * 1e3, percentile(times, 0.99) * 1e3,
+                 times[-1] * 1e3, len(times) / sum(times), sprites, moves))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,360 @@
+# Description:  Bitboard storage for the fences of a Quoridor board.
+# Associated Files: Quoridor.py
+
+"""
+The fences are stored as two integers used as bit masks, one for the
+horizontal fences and one for the vertical fences.
+
+The masks use the same (x, y) layout as the old list of strings board:
+    A horizontal fence at (x, y) is on the top edge of cell (x, y).
+    A vertical fence at (x, y) is on the left edge of cell (x, y).
+
+Each row of a mask is 10 bits wide, so the fence at (x, y) is stored in
+bit (y * 10 + x).  Row 9 holds the bottom edge of the board and column 9
+holds the right edge of the board.  The four edges of the board are set
+as fences when the board is created.
+
+Cells are numbered y * 9 + x.  For every cell there is a precomputed mask
+for each of its four edges, so checking if an edge is blocked is a single
+AND between a fence mask and an edge mask.
+
+For searching the board, both masks are joined into one walls mask with
+the vertical fences shifted up by V_SHIFT bits.  STEPS lists the edge bit
+and the next cell for each move out of a cell, so a search only needs one
+AND per edge.
+"""
+
+from collections import deque
+
+ROW_BITS = 10  # Number of bits in each row of a fence mask
+SIZE = 9  # Number of cells in each row and column of the board
+CELLS = SIZE * SIZE  # Number of cells on the board
+V_SHIFT = ROW_BITS * (SIZE + 1)  # Shift for the vertical fences in walls
+
+
+def fence_bit(x, y):
+    """
+    Return the bit used to store the fence at (x, y).
+
+    :param x: int for the column of the fence
+    :param y: int for the row of the fence
+    :return: int with a single bit set
+    """
+    return 1 << (y * ROW_BITS + x)
+
+
+def cell_index(x, y):
+    """Return the cell number for the cell at (x, y)"""
+    return y * SIZE + x
+
+
+def cell_coord(cell):
+    """Return the (x, y) tuple for a cell number"""
+    return cell % SIZE, cell // SIZE
+
+
+# Edges of each cell.  UP and DOWN are checked against the horizontal mask,
+# LEFT and RIGHT are checked against the vertical mask.
+UP = [fence_bit(c % SIZE, c // SIZE) for c in range(CELLS)]
+DOWN = [fence_bit(c % SIZE, c // SIZE + 1) for c in range(CELLS)]
+LEFT = [fence_bit(c % SIZE, c // SIZE) for c in range(CELLS)]
+RIGHT = [fence_bit(c % SIZE + 1, c // SIZE) for c in range(CELLS)]
+
+# The four edges of the board.  The bottom left corner has a vertical
+# fence to match the 'vh' of the original board.
+BORDER_H = sum(fence_bit(x, 0) | fence_bit(x, SIZE) for x in range(SIZE))
+BORDER_V = sum(fence_bit(0, y) | fence_bit(SIZE, y) for y in range(SIZE)) \
+    | fence_bit(0, SIZE)
+
+# Fence slots where a player can place a fence, the edges of the board
+# are not included
+SLOTS_H = sum(fence_bit(x, y) for x in range(SIZE) for y in range(1, SIZE))
+SLOTS_V = sum(fence_bit(x, y) for x in range(1, SIZE) for y in range(SIZE))
+
+
+def _cell_steps(cell):
+    """Return the (edge bit, next cell) tuples for the moves out of a cell"""
+    x, y = cell_coord(cell)
+    steps = []
+    if y > 0:
+        steps.append((UP[cell], cell - SIZE))
+    if y < SIZE - 1:
+        steps.append((DOWN[cell], cell + SIZE))
+    if x > 0:
+        steps.append((LEFT[cell] << V_SHIFT, cell - 1))
+    if x < SIZE - 1:
+        steps.append((RIGHT[cell] << V_SHIFT, cell + 1))
+    return tuple(steps)
+
+
+STEPS = [_cell_steps(c) for c in range(CELLS)]
+
+# Every edge of each cell in the walls layout
+CELL_EDGES = [UP[c] | DOWN[c] | (LEFT[c] | RIGHT[c]) << V_SHIFT
+              for c in range(CELLS)]
+
+
+def _steps_toward(goal_row):
+    """Return STEPS sorted so the step closest to goal_row is last"""
+    return [tuple(sorted(steps, key=lambda step:
+                         -abs(step[1] // SIZE - goal_row)))
+            for steps in STEPS]
+
+
+# STEPS for a depth-first search, the last step pushed is tried first so
+# the search heads straight for the goal row when nothing is in the way
+STEPS_TOWARD = {0: _steps_toward(0), SIZE - 1: _steps_toward(SIZE - 1)}
+
+
+def _goal_steps(goal_row):
+    """
+    Return STEPS with every cell on goal_row joined into one goal node,
+    numbered CELLS.  Steps between two goal row cells are left out.
+    """
+    goal_first = goal_row * SIZE
+    node = [CELLS if goal_first <= c < goal_first + SIZE else c
+            for c in range(CELLS)]
+    steps = [[] for n in range(CELLS + 1)]
+    for cell in range(CELLS):
+        for edge, nxt in STEPS[cell]:
+            if node[cell] != node[nxt]:
+                steps[node[cell]].append((edge, node[nxt]))
+    return [tuple(s) for s in steps]
+
+
+# STEPS for finding the edges that cut a pawn off from its goal row
+GOAL_STEPS = {0: _goal_steps(0), SIZE - 1: _goal_steps(SIZE - 1)}
+
+
+def slot_coord(index):
+    """Return the (x, y) tuple for the bit number of a fence"""
+    return index % ROW_BITS, index // ROW_BITS
+
+
+def iter_bits(mask):
+    """Yield the number of each bit that is set in mask, lowest first"""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def shortest_path(walls, start, goal_row, expanded=None):
+    """
+    Use Breadth-First search to find a shortest path to the goal row.
+
+    :param walls: int for the walls mask from Bitboard.get_walls()
+    :param start: int for the cell number to start from
+    :param goal_row: int for the row the pawn is trying to get to
+    :param expanded: list, when given the number of cells taken off the
+        queue is added to expanded[0]
+    :return: tuple (cells, edges), cells is a list of the cell numbers on
+        the path from start to the goal row, edges is a mask of the edges
+        the path crosses.  Returns None if the goal row can't be reached.
+    """
+    goal_first = goal_row * SIZE  # first cell on the goal row
+    parent = [-1] * CELLS
+    parent[start] = start
+    edge_in = [0] * CELLS  # edge used to get to each cell
+    queue = deque([start])
+    while queue:
+        cell = queue.popleft()
+        if goal_first <= cell < goal_first + SIZE:
+            if expanded is not None:
+                expanded[0] += _taken(parent, queue)
+            cells, edges = [cell], 0
+            while cell != start:
+                edges |= edge_in[cell]
+                cell = parent[cell]
+                cells.append(cell)
+            cells.reverse()
+            return cells, edges
+        for edge, nxt in STEPS[cell]:
+            if not walls & edge and parent[nxt] < 0:
+                parent[nxt] = cell
+                edge_in[nxt] = edge
+                queue.append(nxt)
+    if expanded is not None:
+        expanded[0] += _taken(parent, queue)
+    return None
+
+
+def _taken(parent, queue):
+    """Return the number of cells a search has taken off its queue"""
+    return CELLS - parent.count(-1) - len(queue)
+
+
+def can_reach(walls, start, goal_row):
+    """
+    Check if the goal row can be reached from a cell.
+
+    :param walls: int for the walls mask from Bitboard.get_walls()
+    :param start: int for the cell number to start from
+    :param goal_row: int for the row the pawn is trying to get to
+    :return: True if the goal row can be reached, else False
+    """
+    if start // SIZE == goal_row:
+        return True
+    steps = STEPS_TOWARD[goal_row]
+    seen = 1 << start  # visited cells as a mask
+    spaces = [start]
+    while spaces:
+        for edge, nxt in steps[spaces.pop()]:
+            if not walls & edge and not seen >> nxt & 1:
+                if nxt // SIZE == goal_row:
+                    return True
+                seen |= 1 << nxt
+                spaces.append(nxt)
+    return False
+
+
+def cut_edges(walls, start, goal_row):
+    """
+    Find every open edge that would cut a cell off from the goal row if a
+    fence was placed across it, with one Depth-First search.
+
+    The goal row is joined into a single node, so the edges that cut the
+    start off are the bridges of the graph that have the goal node below
+    them in the search tree (Tarjan's bridge finding).
+
+    :param walls: int for the walls mask from Bitboard.get_walls()
+    :param start: int for the cell number to start from
+    :param goal_row: int for the row the pawn is trying to get to
+    :return: int mask in the walls layout of the edges that cut start off
+        from the goal row, 0 if start is on the goal row.  The start must be
+        able to reach the goal row.
+    """
+    if start // SIZE == goal_row:
+        return 0
+    steps = GOAL_STEPS[goal_row]
+    order = [0] * (CELLS + 1)  # when each node was found, 0 if not yet
+    found = [0]  # number of nodes found so far
+    cuts = [0]
+
+    # The search is at most 82 nodes deep, so recursion is safe and is
+    # faster than keeping a stack of iterators
+    def visit(node, edge_in):
+        """Return (lowest order reachable from below node, goal is below)"""
+        found[0] += 1
+        order[node] = lowest = found[0]
+        has_goal = node == CELLS
+        for edge, nxt in steps[node]:
+            if walls & edge or edge == edge_in:
+                continue
+            seen = order[nxt]
+            if seen:
+                if seen < lowest:
+                    lowest = seen
+                continue
+            below, goal_below = visit(nxt, edge)
+            if below < lowest:
+                lowest = below
+            if goal_below:
+                has_goal = True
+                if below > order[node]:
+                    cuts[0] |= edge
+        return lowest, has_goal
+
+    visit(start, 0)
+    return cuts[0]
+
+
+def distance_field(walls, goal_row):
+    """
+    Find the number of steps from every cell to the goal row, using a
+    Breadth-First search that starts from all of the goal row cells at once.
+
+    :param walls: int for the walls mask from Bitboard.get_walls()
+    :param goal_row: int for the row the pawn is trying to get to
+    :return: list of 81 ints indexed by cell number, None for cells that
+        can't reach the goal row
+    """
+    dist = [None] * CELLS
+    queue = list(range(goal_row * SIZE, goal_row * SIZE + SIZE))
+    for cell in queue:
+        dist[cell] = 0
+
+    # Cells added to the end of the list are reached by the loop, so the
+    # list works as the queue
+    for cell in queue:
+        steps = dist[cell] + 1
+        for edge, nxt in STEPS[cell]:
+            if dist[nxt] is None and not walls & edge:
+                dist[nxt] = steps
+                queue.append(nxt)
+    return dist
+
+
+class Bitboard:
+    """Store the fences of a Quoridor board as two bit masks"""
+    __slots__ = ('_h', '_v')
+
+    def __init__(self):
+        """Create a board that only has the four edges as fences"""
+        self._h = BORDER_H  # Horizontal fences
+        self._v = BORDER_V  # Vertical fences
+
+    def get_masks(self):
+        """Return the horizontal and vertical fence masks as a tuple"""
+        return self._h, self._v
+
+    def set_masks(self, h, v):
+        """Replace the fences with horizontal and vertical fence masks"""
+        self._h = h
+        self._v = v
+
+    def get_walls(self):
+        """Return both fence masks joined into one walls mask"""
+        return self._h | self._v << V_SHIFT
+
+    def get_free_slots(self):
+        """
+        Return a tuple of masks for the slots where a horizontal fence and
+        a vertical fence can still be placed.
+        """
+        return SLOTS_H & ~self._h, SLOTS_V & ~self._v
+
+    def has_fence(self, angle, x, y):
+        """
+        Check if there is a fence at a location.
+
+        :param angle: 'h' for a horizontal fence, 'v' for a vertical fence
+        :param x: int for the column of the fence
+        :param y: int for the row of the fence
+        :return: True if the fence is there, else False
+        """
+        if angle == 'h':
+            return self._h & fence_bit(x, y) != 0
+        return self._v & fence_bit(x, y) != 0
+
+    def add_fence(self, angle, x, y):
+        """Add a fence of type angle ('h' or 'v') at (x, y)"""
+        if angle == 'h':
+            self._h |= fence_bit(x, y)
+        else:
+            self._v |= fence_bit(x, y)
+
+    def remove_fence(self, angle, x, y):
+        """Remove the fence of type angle ('h' or 'v') at (x, y)"""
+        if angle == 'h':
+            self._h &= ~fence_bit(x, y)
+        else:
+            self._v &= ~fence_bit(x, y)
+
+    def to_rows(self):
+        """
+        Return the board in the original list of strings layout.  There are
+        10 rows of 9 strings, each string is 'v', 'h', 'vh' or '-'.
+        """
+        rows = []
+        for y in range(SIZE + 1):
+            row = []
+            for x in range(SIZE):
+                value = ''
+                if self.has_fence('v', x, y):
+                    value += 'v'
+                if self.has_fence('h', x, y):
+                    value += 'h'
+                row.append(value or '-')
+            rows.append(row)
+        return rows
@@ -0,0 +1,443 @@
+# Description:  Opening book of Quoridor positions and the moves to play.
+# Associated Files: Quoridor.py, zobrist.py, records.py, agents.py
+
+"""
+An opening book maps the Zobrist key of a position (see zobrist.py) to the
+moves played there.  For each (key, move) the book keeps how many times the
+move was played and how many of those games were won by the player who
+played it.  The key covers the pawns, the fences, the fences left and the
+turn, so the same position reached by different moves is one entry.
+
+Books are built offline, from recorded games, from self-play or from
+searches, with BookBuilder.  A book file is read with OpeningBook, which
+memory maps it, so opening a book costs nothing however big it is.
+
+A book file is FILE_HEADER, then these little-endian arrays:
+    index: 2 ** index_bits + 1 uint64, index[b] is the first entry whose
+        key starts with the bits b.  Keys are random, so each bucket holds
+        about one entry and a lookup only looks at a few keys.
+    keys: count uint64, sorted, with the entries for a key sorted by move
+    counts: count uint32, times each move was played
+    wins: count uint32, games won by the player who played each move
+    moves: count uint8, move codes from records.py
+
+Because the entries are sorted, books are merged and pruned by streaming
+through them in order.
+
+Command line:
+    python book.py build games.qrd -o book.qbk --plies 12
+    python book.py selfplay -n 200 --p1 alphabeta:200 --p2 alphabeta:200 -o book.qbk
+    python book.py search --plies 4 --time-ms 200 -o book.qbk
+    python book.py merge a.qbk b.qbk -o book.qbk
+    python book.py prune book.qbk -o small.qbk --min-count 3 --top 2
+    python book.py show book.qbk e2 e8
+
+Playing from a book, and searching once the book runs out:
+    with OpeningBook('book.qbk') as book:
+        agent = BookAgent(book, AlphaBetaPlayer(time_ms=250))
+        move = agent.choose_move(game)
+"""
+
+import argparse
+import heapq
+import itertools
+import mmap
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from collections import namedtuple
+
+import notation
+import records
+from Quoridor import QuoridorGame
+from agents import make_agent
+from ai import AlphaBetaPlayer
+from selfplay import play_game
+
+MAGIC = b'QRBK'
+VERSION = 1
+FILE_HEADER = struct.Struct('<4sBB2xQ')  # magic, version, index_bits, count
+MAX_INDEX_BITS = 24
+
+# One entry of a book file, move is a move code from records.py
+BookEntry = namedtuple('BookEntry', ['key', 'move', 'count', 'wins'])
+
+# One move found in a book, move is a move tuple
+BookMove = namedtuple('BookMove', ['move', 'count', 'wins'])
+
+
+def index_bits(count):
+    """Return the number of key bits to index for a book of count entries"""
+    return min(count.bit_length(), MAX_INDEX_BITS)
+
+
+def write_book(path, entries):
+    """
+    Write a book file.
+
+    :param path: str for the file to write
+    :param entries: iterable of BookEntry, sorted by (key, move) with no
+        (key, move) repeated
+    """
+    keys, counts = array('Q'), array('I')
+    wins, moves = array('I'), array('B')
+    for entry in entries:
+        keys.append(entry.key)
+        moves.append(entry.move)
+        counts.append(entry.count)
+        wins.append(entry.wins)
+
+    bits = index_bits(len(keys))
+    shift = 64 - bits
+    index = array('Q', [0] * ((1 << bits) + 1))
+    for key in keys:
+        index[(key >> shift) + 1] += 1
+    for bucket in range(1 << bits):
+        index[bucket + 1] += index[bucket]
+
+    with open(path, 'wb') as out:
+        out.write(FILE_HEADER.pack(MAGIC, VERSION, bits, len(keys)))
+        for values in (index, keys, counts, wins, moves):
+            if sys.byteorder == 'big':
+                values.byteswap()
+            values.tofile(out)
+
+
+def check_header(data):
+    """
+    Raise ValueError if data doesn't start with a book file header.
+
+    :return: tuple of (index_bits, count) from the header
+    """
+    if len(data) < FILE_HEADER.size:
+        raise ValueError('not an opening book file')
+    magic, version, bits, count = FILE_HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError('not an opening book file')
+    if version != VERSION:
+        raise ValueError('unknown opening book version %d' % version)
+    return bits, count
+
+
+class OpeningBook:
+    """
+    Look up positions in a book file.  The file is memory mapped, and a
+    lookup is one read of the index and a binary search of about one key.
+    """
+
+    def __init__(self, path):
+        """Open a book file"""
+        with open(path, 'rb') as source:
+            bits, count = check_header(source.read(FILE_HEADER.size))
+            self._map = mmap.mmap(source.fileno(), 0,
+                                  access=mmap.ACCESS_READ)
+        sizes = [((1 << bits) + 1, 'Q'), (count, 'Q'), (count, 'I'),
+                 (count, 'I'), (count, 'B')]
+        if len(self._map) != FILE_HEADER.size + sum(
+                length * array(code).itemsize for length, code in sizes):
+            self._map.close()
+            raise ValueError('opening book file is the wrong size')
+        self._shift = 64 - bits
+        self._count = count
+        self._views = []  # memoryviews of the map, released by close()
+        arrays = []
+        offset = FILE_HEADER.size
+        for length, code in sizes:
+            arrays.append(self.read_array(offset, length, code))
+            offset += length * array(code).itemsize
+        self._index, self._keys, self._counts, self._wins, self._moves = \
+            arrays
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self._count
+
+    def read_array(self, offset, length, code):
+        """Return a view of an array in the file, copied on big-endian
+        machines so the bytes can be swapped"""
+        data = memoryview(self._map)[offset:offset + length *
+                                     array(code).itemsize]
+        self._views.append(data)
+        if sys.byteorder == 'little':
+            self._views.append(data.cast(code))
+            return self._views[-1]
+        values = array(code, data.tobytes())
+        values.byteswap()
+        return values
+
+    def lookup(self, key):
+        """
+        Return the moves the book has for a position.
+
+        :param key: int from QuoridorGame.get_position_key()
+        :return: list of BookMove, most played first, empty if the position
+            is not in the book
+        """
+        bucket = key >> self._shift
+        keys = self._keys
+        end = self._index[bucket + 1]
+        i = bisect_left(keys, key, self._index[bucket], end)
+        found = []
+        while i < end and keys[i] == key:
+            found.append(BookMove(records.MOVES[self._moves[i]],
+                                  self._counts[i], self._wins[i]))
+            i += 1
+        found.sort(key=lambda book_move: (book_move.count, book_move.wins),
+                   reverse=True)
+        return found
+
+    def entries(self):
+        """Return a generator of every BookEntry, in file order"""
+        for i in range(self._count):
+            yield BookEntry(self._keys[i], self._moves[i], self._counts[i],
+                            self._wins[i])
+
+    def close(self):
+        """Close the memory map"""
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        self._map.close()
+
+
+class BookBuilder:
+    """Count the moves played in positions, then write them as a book"""
+
+    def __init__(self):
+        """Create an empty builder"""
+        self._moves = {}  # (key, move code) to [count, wins]
+
+    def __len__(self):
+        return len(self._moves)
+
+    def add(self, key, move, count=1, wins=0):
+        """
+        Add to the counts of a move played in a position.
+
+        :param key: int from QuoridorGame.get_position_key()
+        :param move: move tuple played in the position
+        :param count: int for the number of times it was played
+        :param wins: int for the number of those games that were won
+        """
+        totals = self._moves.setdefault((key, records.CODES[move]), [0, 0])
+        totals[0] += count
+        totals[1] += wins
+
+    def add_game(self, moves, winner, plies):
+        """
+        Add the first plies moves of a game.
+
+        :param moves: list of move tuples, in the order they were played
+        :param winner: int of 1 or 2, None if nobody won
+        :param plies: int for the number of moves to add
+        """
+        game = QuoridorGame()
+        for move in moves[:plies]:
+            player = game.get_turn()
+            self.add(game.get_position_key(), move, 1, int(winner == player))
+            game.push(move)
+
+    def add_records(self, path, plies):
+        """Add the first plies moves of every game in a records.py file"""
+        with open(path, 'rb') as source:
+            for record in records.read_games(source):
+                self.add_game(records.decode_moves(record.moves),
+                              record.winner, plies)
+
+    def add_selfplay(self, agent1, agent2, games, plies, max_plies=400):
+        """
+        Play games between two players and add their first plies moves.
+
+        :param agent1: player for player 1, see agents.py
+        :param agent2: player for player 2
+        :param games: int for the number of games to play
+        :param plies: int for the number of moves of each game to add
+        :param max_plies: int for the most plies before a game is stopped
+        """
+        for index in range(games):
+            recorder = records.GameRecorder()
+            result = play_game(agent1, agent2, index, max_plies, recorder)
+            self.add_game(records.decode_moves(recorder.get_codes()),
+                          result.winner, plies)
+
+    def add_search(self, player, plies, game=None):
+        """
+        Add the move a searching player picks in each position reached by
+        its own picks and by every pawn move of either side, up to plies
+        moves from the start.  A move is counted as a win when the search
+        scored it above 0.
+
+        :param player: AlphaBetaPlayer, or anything with a search(game)
+            method that returns a SearchResult from ai.py
+        :param plies: int for the number of moves to search through
+        :param game: QuoridorGame to start from, defaults to a new game
+        """
+        if game is None:
+            game = QuoridorGame()
+        if plies <= 0 or game.get_winner() is not None:
+            return
+        result = player.search(game)
+        if result.move is None:
+            return
+        self.add(game.get_position_key(), result.move, 1,
+                 int(result.score > 0))
+        replies = [('p', coord) for coord in game.legal_pawn_moves()]
+        if result.move not in replies:
+            replies.append(result.move)
+        for move in replies:
+            game.push(move)
+            self.add_search(player, plies - 1, game)
+            game.pop()
+
+    def entries(self):
+        """Return the entries as a sorted list of BookEntry"""
+        return [BookEntry(key, move, count, wins)
+                for (key, move), (count, wins) in sorted(self._moves.items())]
+
+    def write(self, path):
+        """Write the book file"""
+        write_book(path, self.entries())
+
+
+def merge_entries(*sources):
+    """
+    Merge sorted streams of BookEntry, adding up the counts and wins of a
+    (key, move) found in more than one.
+
+    :param sources: iterables of BookEntry, each sorted by (key, move)
+    :return: generator of BookEntry sorted by (key, move)
+    """
+    merged = heapq.merge(*sources, key=lambda entry: (entry.key, entry.move))
+    for (key, move), same in itertools.groupby(
+            merged, key=lambda entry: (entry.key, entry.move)):
+        count = wins = 0
+        for entry in same:
+            count += entry.count
+            wins += entry.wins
+        yield BookEntry(key, move, count, wins)
+
+
+def prune_entries(entries, min_count=1, top=None):
+    """
+    Drop the rarely played moves from a sorted stream of BookEntry.
+
+    :param entries: iterable of BookEntry sorted by (key, move)
+    :param min_count: int, moves played fewer times are dropped
+    :param top: int for the most moves to keep for a position, the most
+        played are kept.  None keeps every move.
+    :return: generator of BookEntry sorted by (key, move)
+    """
+    for key, same in itertools.groupby(entries, key=lambda entry: entry.key):
+        kept = [entry for entry in same if entry.count >= min_count]
+        if top is not None and len(kept) > top:
+            kept.sort(key=lambda entry: (entry.count, entry.wins),
+                      reverse=True)
+            kept = sorted(kept[:top], key=lambda entry: entry.move)
+        for entry in kept:
+            yield entry
+
+
+class BookAgent:
+    """Play the most played book move, or ask another player when the
+    position is not in the book"""
+
+    def __init__(self, book, fallback=None, min_count=1):
+        """
+        Create the player.
+
+        :param book: OpeningBook to look positions up in
+        :param fallback: player to use outside the book, see agents.py, or
+            None to return None outside the book
+        :param min_count: int, book moves played fewer times are not used
+        """
+        self._book = book
+        self._fallback = fallback
+        self._min_count = min_count
+
+    def choose_move(self, game):
+        """Return the book move, else the fallback player's move"""
+        found = self._book.lookup(game.get_position_key())
+        if found and found[0].count >= self._min_count:
+            return found[0].move
+        if self._fallback is None:
+            return None
+        return self._fallback.choose_move(game)
+
+
+def main(argv=None):
+    """Build, merge, prune and show books from the command line"""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    commands = parser.add_subparsers(dest='command', required=True)
+    build = commands.add_parser('build', help='book from records.py files')
+    build.add_argument('games', nargs='+')
+    selfplay = commands.add_parser('selfplay', help='book from self-play')
+    selfplay.add_argument('-n', '--games', type=int, default=100)
+    selfplay.add_argument('--p1', default='alphabeta:200')
+    selfplay.add_argument('--p2', default='alphabeta:200')
+    selfplay.add_argument('--seed', type=int, default=0)
+    search = commands.add_parser('search', help='book from searches')
+    search.add_argument('--time-ms', type=int, default=200)
+    for command in (build, selfplay, search):
+        command.add_argument('--plies', type=int, default=8)
+    merge = commands.add_parser('merge', help='add books together')
+    merge.add_argument('books', nargs='+')
+    prune = commands.add_parser('prune', help='drop rarely played moves')
+    prune.add_argument('book')
+    prune.add_argument('--min-count', type=int, default=2)
+    prune.add_argument('--top', type=int)
+    for command in (build, selfplay, search, merge, prune):
+        command.add_argument('-o', '--out', required=True)
+    show = commands.add_parser('show', help='print the book moves')
+    show.add_argument('book')
+    show.add_argument('moves', nargs='*', help='moves to play first')
+    args = parser.parse_args(argv)
+
+    if args.command in ('build', 'selfplay', 'search'):
+        builder = build_book(args)
+        builder.write(args.out)
+        print('%d entries written to %s' % (len(builder), args.out))
+    elif args.command in ('merge', 'prune'):
+        paths = args.books if args.command == 'merge' else [args.book]
+        books = [OpeningBook(path) for path in paths]
+        try:
+            entries = merge_entries(*[book.entries() for book in books])
+            if args.command == 'prune':
+                entries = prune_entries(entries, args.min_count, args.top)
+            write_book(args.out, entries)
+        finally:
+            for book in books:
+                book.close()
+    else:
+        game = notation.replay_game([notation.parse_move(token)
+                                     for token in args.moves])
+        with OpeningBook(args.book) as book:
+            for found in book.lookup(game.get_position_key()):
+                print('%-5s played %6d won %6d' % (
+                    notation.format_move(found.move), found.count,
+                    found.wins))
+
+
+def build_book(args):
+    """Return a BookBuilder for the build, selfplay or search command"""
+    builder = BookBuilder()
+    if args.command == 'build':
+        for path in args.games:
+            builder.add_records(path, args.plies)
+    elif args.command == 'selfplay':
+        for index in range(args.games):
+            seed = args.seed + 2 * index
+            builder.add_selfplay(make_agent(args.p1, seed),
+                                 make_agent(args.p2, seed + 1), 1, args.plies)
+    else:
+        builder.add_search(AlphaBetaPlayer(time_ms=args.time_ms), args.plies)
+    return builder
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,197 @@
+# Description:  Computer player that thinks in a worker process.
+# Associated Files: main.py, agents.py, state.py
+
+"""
+A BotThinker picks moves for one side of a game without holding up the
+program that asked for them, such as the pygame loop in main.py.
+
+The agent, made by agents.make_agent(), lives in a worker process, so a
+long search never competes with the caller for the GIL.  think() sends the
+worker a GameState snapshot of the game, see state.py, and returns at
+once.  A thread in the caller starts the worker if it isn't running,
+waits for the answer and passes it to a callback; main.py's callback posts
+it as a pygame event.
+
+The think time is how long each move takes at least.  AlphaBetaPlayer
+and MCTSPlayer search for up to that long, other agents move as soon as
+they know their move, and the worker then waits out the rest of the time,
+so the moves of a quick agent are not played too fast to follow.
+
+cancel() stops a search by killing the worker, and the next think()
+starts a new one.  close() stops the search and the worker.
+"""
+
+import multiprocessing
+import os
+import threading
+import time
+
+from Quoridor import QuoridorGame
+from agents import make_agent
+from state import GameState
+
+
+def _think(connection, spec, seed, think_ms):
+    """
+    Body of the worker process: answer each packed GameState sent on the
+    connection with (packed, move) until the pipe is closed.
+    """
+    if hasattr(os, 'nice'):
+        # On a machine with few cores the drawing comes first
+        os.nice(10)
+    agent = make_agent(spec, seed)
+    while True:
+        try:
+            packed = connection.recv()
+        except EOFError:
+            return
+        start = time.perf_counter()
+        game = QuoridorGame.from_state(GameState(packed))
+        if think_ms is not None and hasattr(agent, 'search'):
+            move = agent.search(game, think_ms).move
+        else:
+            move = agent.choose_move(game)
+        if think_ms is not None:
+            time.sleep(max(0, think_ms / 1000 - (time.perf_counter() - start)))
+        connection.send((packed, move))
+
+
+class BotThinker:
+    """Pick moves for a computer player in a worker process"""
+
+    def __init__(self, spec, think_ms=None, seed=None):
+        """
+        Create the player.  The worker is started by start(), or else by
+        the first think() on the thread that waits for the answer.
+
+        :param spec: str for the player, see agents.make_agent()
+        :param think_ms: int for the least time each move takes in
+            milliseconds, None to move as fast as the agent can
+        :param seed: int seed for agents that use random numbers
+        """
+        self._spec = spec
+        self._think_ms = think_ms
+        self._seed = seed
+        self._process = None
+        self._connection = None
+        self._requests = 0  # number of think() calls so far
+        self._thinking = None  # number of the think() being answered
+        self._lock = threading.Lock()
+
+    def get_spec(self):
+        """Return the spec string of the agent"""
+        return self._spec
+
+    def get_think_ms(self):
+        """Return the least time a move takes in milliseconds, or None"""
+        return self._think_ms
+
+    def is_thinking(self):
+        """Return True between think() and the answer, or cancel()"""
+        return self._thinking is not None
+
+    def think(self, state, callback):
+        """
+        Start choosing a move for the player whose turn it is.  Returns at
+        once, callback(state, move) is called from another thread with the
+        GameState and the move when it is chosen.  The move is a move
+        tuple, or None when the agent has no move or the worker stopped
+        by itself, such as from an error in the agent.  A callback is never
+        called for a search that was cancelled.
+
+        :param state: GameState to choose a move in
+        :param callback: function to call with the move
+        """
+        with self._lock:
+            if self._thinking is not None:
+                raise RuntimeError('already thinking')
+            self._requests += 1
+            request = self._thinking = self._requests
+        threading.Thread(target=self._wait, args=(request, state, callback),
+                         daemon=True).start()
+
+    def start(self):
+        """
+        Start the worker process, if it isn't running, so the first move
+        doesn't wait for it.  Returns before the worker is ready.
+        Does not return anything.
+        """
+        with self._lock:
+            if self._process is None:
+                self._start()
+
+    def _start(self):
+        """Start the worker process, called with the lock held"""
+        # A new interpreter rather than a fork, so the worker does not
+        # get a copy of the caller's threads or pygame's signal handlers
+        context = multiprocessing.get_context('spawn')
+        ours, theirs = context.Pipe()
+        self._process = context.Process(
+            target=_think, args=(theirs, self._spec, self._seed,
+                                 self._think_ms),
+            daemon=True)
+        self._process.start()
+        theirs.close()
+        self._connection = ours
+
+    def _wait(self, request, state, callback):
+        """
+        Body of the thread answering one think(): start the worker if it
+        isn't running, send it the position and wait for the move.
+
+        :param request: int for the number of the think() call
+        """
+        with self._lock:
+            if self._thinking != request:
+                return  # cancelled before it was sent
+            if self._process is None:
+                self._start()
+            connection = self._connection
+            connection.send(state.get_packed())
+        try:
+            packed, move = connection.recv()
+        except (EOFError, OSError):
+            with self._lock:
+                if self._thinking != request:
+                    return  # cancelled
+                # The worker stopped by itself, a new one is started by
+                # the next think()
+                self._stop()
+            callback(state, None)
+            return
+        with self._lock:
+            if self._thinking != request:
+                return
+            self._thinking = None
+        callback(state, move)
+
+    def cancel(self):
+        """Stop thinking, if a move is being chosen.  Does not return
+        anything."""
+        with self._lock:
+            if self._process is None:
+                self._thinking = None  # the worker wasn't sent it yet
+            elif self._thinking is not None:
+                self._stop()
+
+    def close(self):
+        """Stop thinking and stop the worker.  Does not return anything."""
+        with self._lock:
+            self._thinking = None
+            if self._process is not None:
+                self._stop()
+
+    def _stop(self):
+        """Stop the worker process, called with the lock held"""
+        self._thinking = None
+        self._process.kill()
+        self._process.join()
+        self._connection.close()
+        self._process = None
+        self._connection = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
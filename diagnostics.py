@@ -0,0 +1,104 @@
+# Description:  Pluggable diagnostics for QuoridorGame.
+# Associated Files: Quoridor.py
+
+"""
+QuoridorGame reports what happens during a move through a diagnostics
+object instead of printing to the screen.  Every event is an Event tuple:
+    kind: 'reject' when a move is not allowed, 'move' when a pawn is moved
+        and 'fence' when a fence is placed.
+    reason: one of the reason strings below for a rejected move, else None.
+    player: int of 1 or 2 for the player making the move, or None.
+    detail: dict with extra information, such as the coordinates.
+
+The default is NULL_DIAGNOSTICS, which does nothing.  QuoridorGame checks
+the enabled attribute before building an event, so when diagnostics are
+off no event objects are created at all.
+"""
+
+import logging
+from collections import deque, namedtuple
+
+# Reasons a move can be rejected
+GAME_OVER = 'game_over'
+NOT_YOUR_TURN = 'not_your_turn'
+OFF_BOARD = 'off_board'
+BAD_MOVE_SIZE = 'bad_move_size'
+DIAGONAL_NOT_VERTICAL = 'diagonal_not_vertical'
+HORIZONTAL_JUMP = 'horizontal_jump'
+NO_PAWN_TO_JUMP = 'no_pawn_to_jump'
+BLOCKED_BY_FENCE = 'blocked_by_fence'
+BLOCKED_BY_PAWN = 'blocked_by_pawn'
+NO_PAWN_FOR_DIAGONAL = 'no_pawn_for_diagonal'
+FENCE_BETWEEN_PAWNS = 'fence_between_pawns'
+NO_FENCE_BEHIND_OPPONENT = 'no_fence_behind_opponent'
+NO_FENCES_LEFT = 'no_fences_left'
+FENCE_OFF_BOARD = 'fence_off_board'
+BAD_FENCE_ANGLE = 'bad_fence_angle'
+FENCE_EXISTS = 'fence_exists'
+BREAKS_FAIR_PLAY = 'breaks_fair_play'
+
+Event = namedtuple('Event', ['kind', 'reason', 'player', 'detail'])
+
+
+class NullDiagnostics:
+    """Diagnostics that ignore every event"""
+    enabled = False
+
+    def record(self, event):
+        """Do nothing with the event"""
+        pass
+
+
+class RingBufferDiagnostics:
+    """Keep the most recent events in memory"""
+    enabled = True
+
+    def __init__(self, size=1000):
+        """
+        Create the buffer.
+
+        :param size: int for the number of events to keep
+        """
+        self._events = deque(maxlen=size)
+
+    def record(self, event):
+        """Add an Event to the buffer, dropping the oldest if it is full"""
+        self._events.append(event)
+
+    def get_events(self):
+        """Return a list of the events in the buffer, oldest first"""
+        return list(self._events)
+
+    def get_reasons(self):
+        """Return a list of the reasons for the rejected moves in the buffer"""
+        return [event.reason for event in self._events
+                if event.kind == 'reject']
+
+    def clear(self):
+        """Remove all of the events from the buffer"""
+        self._events.clear()
+
+
+class LoggerDiagnostics:
+    """Send events to a logging.Logger"""
+    enabled = True
+
+    def __init__(self, logger=None, level=logging.DEBUG):
+        """
+        Create the diagnostics.
+
+        :param logger: logging.Logger to use, defaults to the 'quoridor' logger
+        :param level: int for the logging level of the events
+        """
+        if logger is None:
+            logger = logging.getLogger('quoridor')
+        self._logger = logger
+        self._level = level
+
+    def record(self, event):
+        """Log the event.  Nothing is formatted if the level is disabled"""
+        self._logger.log(self._level, "%s %s player=%s %s", event.kind,
+                         event.reason, event.player, event.detail)
+
+
+NULL_DIAGNOSTICS = NullDiagnostics()
@@ -0,0 +1,141 @@
+# Description:  Find what is under a point on the pygame board.
+# Associated Files: main.py
+
+"""
+The board in main.py is a fixed grid, so the cell or fence marker under a
+point is worked out with a divmod instead of checking every sprite:
+    The center of cell (x, y) is at (BOARD_X + x * PITCH, BOARD_Y + y * PITCH)
+        and the cell is CELL_SIZE pixels square.
+    The vertical marker (x, y) sits in the gap on the left of cell (x, y),
+        FENCE_SIZE pixels wide and as tall as a cell.
+    The horizontal marker (x, y) sits in the gap above cell (x, y),
+        FENCE_SIZE pixels high and as wide as a cell.
+
+Things that are not on the grid, like the fences waiting in the trays at
+the sides of the board, go in a GridIndex.  It splits the screen into
+square buckets and keeps each item in the buckets its rect covers, so a
+point is only checked against the few items in its bucket.
+
+Nothing here uses pygame, a rect is anything with left, top, right and
+bottom attributes.
+"""
+
+SIZE = 9  # Number of cells in each row and column of the board
+PITCH = 60  # Pixels from one cell to the next
+CELL_SIZE = 50  # Width and height of a cell
+FENCE_SIZE = 10  # Thickness of a fence marker
+BOARD_X = 120  # Screen x of the center of cell (0, 0)
+BOARD_Y = 100  # Screen y of the center of cell (0, 0)
+
+
+def cell_center(x, y):
+    """Return the screen (x, y) of the center of cell (x, y)"""
+    return BOARD_X + x * PITCH, BOARD_Y + y * PITCH
+
+
+def _cell_line(pos, first):
+    """
+    Return the cell column or row a screen position is in, along one axis.
+
+    :param pos: int for the screen x or y
+    :param first: int for the screen x or y of the center of cell 0
+    :return: int 0 - 8, None if pos is off the board or in a gap
+    """
+    line, offset = divmod(pos - (first - CELL_SIZE // 2), PITCH)
+    if 0 <= line < SIZE and offset < CELL_SIZE:
+        return line
+    return None
+
+
+def _gap_line(pos, first):
+    """
+    Return the number of the gap between cells a screen position is in,
+    along one axis.  Gap 1 is between cell 0 and cell 1.
+
+    :param pos: int for the screen x or y
+    :param first: int for the screen x or y of the center of cell 0
+    :return: int 1 - 8, None if pos is not in a gap between two cells
+    """
+    middle = first + PITCH // 2  # middle of gap 1
+    line, offset = divmod(pos - (middle - FENCE_SIZE // 2), PITCH)
+    if 0 <= line < SIZE - 1 and offset < FENCE_SIZE:
+        return line + 1
+    return None
+
+
+def board_cell(x, y):
+    """Return the (x, y) cell under a screen point, or None"""
+    col = _cell_line(x, BOARD_X)
+    row = _cell_line(y, BOARD_Y)
+    if col is None or row is None:
+        return None
+    return col, row
+
+
+def fence_slot(x, y):
+    """
+    Return the fence marker under a screen point.
+
+    :return: ('h' or 'v', (x, y)) for the marker, None if there isn't one
+    """
+    row = _cell_line(y, BOARD_Y)
+    col = _gap_line(x, BOARD_X)
+    if row is not None and col is not None:
+        return 'v', (col, row)
+    col = _cell_line(x, BOARD_X)
+    row = _gap_line(y, BOARD_Y)
+    if row is not None and col is not None:
+        return 'h', (col, row)
+    return None
+
+
+class GridIndex:
+    """Find the item under a point among items placed anywhere on screen"""
+
+    def __init__(self, bucket_size=PITCH // 2):
+        """
+        Create an empty index.
+
+        :param bucket_size: int for the width and height of each bucket
+        """
+        self._bucket_size = bucket_size
+        self._buckets = {}  # (column, row) to list of (item, rect)
+        self._keys = {}  # item to the buckets it is in
+
+    def __len__(self):
+        return len(self._keys)
+
+    def add(self, item, rect):
+        """Add an item covering a rect.  Does not return anything."""
+        size = self._bucket_size
+        keys = [(column, row)
+                for column in range(rect.left // size,
+                                    (rect.right - 1) // size + 1)
+                for row in range(rect.top // size,
+                                 (rect.bottom - 1) // size + 1)]
+        box = (rect.left, rect.top, rect.right, rect.bottom)
+        for key in keys:
+            self._buckets.setdefault(key, []).append((item, box))
+        self._keys[item] = keys
+
+    def remove(self, item):
+        """Remove an item, if it is in the index"""
+        for key in self._keys.pop(item, ()):
+            bucket = self._buckets[key]
+            bucket[:] = [entry for entry in bucket if entry[0] is not item]
+            if not bucket:
+                del self._buckets[key]
+
+    def move(self, item, rect):
+        """Change the rect an item covers, such as after it is rotated"""
+        self.remove(item)
+        self.add(item, rect)
+
+    def find(self, x, y):
+        """Return the item added last that covers a point, or None"""
+        size = self._bucket_size
+        for item, (left, top, right, bottom) in reversed(
+                self._buckets.get((x // size, y // size), ())):
+            if left <= x < right and top <= y < bottom:
+                return item
+        return None
@@ -15,10 +15,49 @@ to determine if moves are legal and to
 determine a winner.
 
 Note, can use opengameart.org for images
+
+Drawing: by default only the parts of the screen that changed are drawn.
+Every sprite is a DirtySprite and sets its dirty flag when it is moved,
+rotated or recoloured.  All of the sprites are also kept in one
+LayeredDirty group, which draws only the dirty sprites, paints the
+background over where they used to be, and returns the rects that changed
+for pygame.display.update().  Simulate(dirty_rects=False) redraws the whole
+screen every frame instead.  Either way the loop is capped at FPS frames a
+second.
+
+Running: importing this file does not open a window.  Run it as a script,
+or call main(), to play.  Simulate(headless=True) uses SDL's dummy video
+driver instead of a window, and step() runs a single frame with a list of
+events, so a script can play the game on a machine with no display.
+benchmarks/bench_ui.py uses this to time frames.
+
+Text: fonts and rendered strings are cached, see render_text().  A Text
+sprite is only rendered again when set_text() changes what it says, so the
+status line and fence counts cost nothing on frames where they stay the
+same.
+
+Computer player: Simulate(bots={2: bot.BotThinker('alphabeta')}) lets a
+computer play one side, or both.  The BotThinker searches in a worker
+process from a GameState snapshot and its move comes back as a BOT_MOVE
+event, so the screen keeps drawing at FPS while it thinks.  Closing the
+window stops the search.  From the command line:
+    python main.py --bot alphabeta --think-ms 1500
+
+Clicks: the cell or fence marker under the mouse is worked out from the
+fixed board grid with hittest.py, and the fences waiting in the trays are
+kept in a hittest.GridIndex, so a click or mouse move never checks every
+sprite.  While a pawn or fence is selected, the cell or marker under the
+mouse is highlighted.
 """
 
 # import all the methods from Quoridor
 from Quoridor import *
+import hittest
+
+import argparse
+import os
+
+from bot import BotThinker
 
 import pygame
 from pygame.locals import *
@@ -37,8 +76,23 @@ HALF_WHITE = (117, 117, 117)
 WHITE = (255, 255, 255)
 PAWN_COLOR_CLICKED = WHITE
 FENCE_COLOR_CLICKED = WHITE
-
-class Pawn(pygame.sprite.Sprite):
+HOVER_COLOR = GRAY  # Color of the cell or marker under the mouse
+BACKGROUND_COLOR = BLACK
+FPS = 60  # Most frames drawn each second
+BOT_MOVE = pygame.USEREVENT  # Event with a move from a computer player
+
+
+def use_dummy_display():
+    """
+    Make pygame draw to SDL's dummy video driver, which keeps the screen
+    in memory and never opens a window.  Closes the display first if it
+    was already opened with another driver.  Does not return anything.
+    """
+    os.environ['SDL_VIDEODRIVER'] = 'dummy'
+    if pygame.display.get_init() and pygame.display.get_driver() != 'dummy':
+        pygame.display.quit()
+
+class Pawn(pygame.sprite.DirtySprite):
     """Create a pawn object using the sprite class"""
     pawn_width = 50  # width of rectangle
     pawn_height = 50  # height of rectangle
@@ -73,6 +127,7 @@ class Pawn(pygame.sprite.Sprite):
         Does not return anything."""
         self.pawn = pygame.draw.circle(self.image, color, \
                                        (self.pawn_width // 2, self.pawn_height // 2), 10)
+        self.dirty = 1
 
     def get_coord(self):
         """Return a tuple containing the x,y coordinates of rectangle used for QuoridorGame"""
@@ -93,27 +148,34 @@ class Pawn(pygame.sprite.Sprite):
     def move_pawn(self, x, y):
         """Move the pawn"""
         self.rect.center = [x, y]
+        self.dirty = 1
 
 
-class Rectangle(pygame.sprite.Sprite):
+class Rectangle(pygame.sprite.DirtySprite):
     """Create the rectangles for the board as sprite objects"""
 
+    rec_color = PEACH  # color of rectangle
+
     def __init__(self, rec_x, rec_y, coord):
         """"""
         super().__init__()  # inherit Sprite class
         rec_width = 50  # width of rectangle
         rec_height = 50  # height of rectangle
-        rec_color = PEACH  # color of rectangle
         self._rec_x = rec_x  # x position of rectangle
         self._rec_y = rec_y  # y position of rectangle
         self._coord = coord  # # coordinates needed for QuoridorGame
 
         # Draw rectangle
         self.image = pygame.Surface([rec_width, rec_height])  # size of the rectangle
-        self.image.fill(rec_color)  # rectangle color
+        self.image.fill(self.rec_color)  # rectangle color
         self.rect = self.image.get_rect()  # place a rect around the rectangle so it can be moved
         self.rect.center = [self._rec_x, self._rec_y]  # where to put the center of the rect
 
+    def set_color(self, color):
+        """Set color of rectangle, using a tuple input"""
+        self.image.fill(color)
+        self.dirty = 1
+
     def get_coord(self):
         """Return a tuple containing the x,y coordinates of rectangle used for QuoridorGame"""
         return self._coord
@@ -123,7 +185,7 @@ class Rectangle(pygame.sprite.Sprite):
         self._coord = coord
 
 
-class Marker(pygame.sprite.Sprite):
+class Marker(pygame.sprite.DirtySprite):
     """Create a fence marker object"""
 
     rec_color = BLACK #(255, 125, 255)  # color of rectangle
@@ -147,11 +209,13 @@ class Marker(pygame.sprite.Sprite):
     def set_color(self, color):
         """Set color of pawn, using a tuple input"""
         self.image.fill(color)
+        self.dirty = 1
 
     def rotate(self, screen):
         """Rotate fence 90 degrees"""
         self.image = pygame.transform.rotate(self.image, 90)
         self.rect = self.image.get_rect(center=self.rect.center)
+        self.dirty = 1
 
     def get_coord(self):
         """Return a tuple containing the x,y coordinates of rectangle used for QuoridorGame"""
@@ -168,7 +232,7 @@ class Marker(pygame.sprite.Sprite):
         return self._angle
 
 
-class Fence(pygame.sprite.Sprite):
+class Fence(pygame.sprite.DirtySprite):
     """Create a fence object"""
     rec_width = 10  # width of rectangle
     rec_height = 50  # height of rectangle
@@ -197,6 +261,7 @@ class Fence(pygame.sprite.Sprite):
     def set_color(self, color):
         """Set color of pawn, using a tuple input"""
         self.image.fill(color)
+        self.dirty = 1
 
     def set_used(self):
         """Mark the fence used so it can't be moved again"""
@@ -210,6 +275,7 @@ class Fence(pygame.sprite.Sprite):
         """Rotate fence 90 degrees"""
         self.image = pygame.transform.rotate(self.image, 90)
         self.rect = self.image.get_rect(center=self.rect.center)
+        self.dirty = 1
 
     def get_coord(self):
         """Return a tuple containing the x,y coordinates of rectangle used for QuoridorGame"""
@@ -226,8 +292,38 @@ class Fence(pygame.sprite.Sprite):
     def move_fence(self, x, y):
         """Move the fence"""
         self.rect.center = [x, y]
-
-class Text(pygame.sprite.Sprite):
+        self.dirty = 1
+
+# Fonts and rendered strings, see get_font() and render_text()
+_fonts = {}  # (style, size) to Font
+_text_surfaces = {}  # (text, size, style, color) to Surface
+TEXT_CACHE_SIZE = 256  # Most rendered strings kept
+
+
+def get_font(style, size):
+    """Return the system Font for a style and size, loading it only once"""
+    font = _fonts.get((style, size))
+    if font is None:
+        font = _fonts[(style, size)] = pygame.font.SysFont(style, size)
+    return font
+
+
+def render_text(text, size=24, style='Arial', color=WHITE):
+    """
+    Return a Surface with text drawn on it.  The same Surface is returned
+    each time the same string is asked for, so it must not be drawn on.
+    """
+    key = (text, size, style, color)
+    surface = _text_surfaces.get(key)
+    if surface is None:
+        if len(_text_surfaces) >= TEXT_CACHE_SIZE:
+            _text_surfaces.clear()
+        surface = get_font(style, size).render(text, True, color)
+        _text_surfaces[key] = surface
+    return surface
+
+
+class Text(pygame.sprite.DirtySprite):
     """Create text for the screen
 
         # Create title
@@ -237,24 +333,74 @@ class Text(pygame.sprite.Sprite):
         rect.center = (coordx, coordy)
         #pygame.draw.rect(title, BLUE, rect, 1)
         """
-    def __init__(self, text, rec_x, rec_y, size = 24, style = 'Arial'):
+    def __init__(self, text, rec_x, rec_y, size = 24, style = 'Arial',
+                 color = WHITE):
         """Initialize the Text object.  Set the locate, size of text,
         and Font"""
         super().__init__()  # inherit Sprite class
         self._rec_x = rec_x  # x position of rectangle
         self._rec_y = rec_y # y position of rectangle
-        self._font = pygame.font.SysFont(style, size)
-        self.image = self._font.render(text, True, WHITE)
+        self._size = size
+        self._style = style
+        self._text = None
+        self._color = None
+        self.set_text(text, color)
+
+    def get_text(self):
+        """Return the text shown"""
+        return self._text
+
+    def set_text(self, text, color=None):
+        """
+        Change the text, and its color if given, keeping it centered in
+        the same place.  Nothing is rendered or redrawn when the text and
+        color are the same as before.  Does not return anything.
+        """
+        if color is None:
+            color = self._color
+        if text == self._text and color == self._color:
+            return
+        self._text = text
+        self._color = color
+        self.image = render_text(text, self._size, self._style, color)
         self.rect = self.image.get_rect()
-        self.rect.center = [rec_x, rec_y]
+        self.rect.center = [self._rec_x, self._rec_y]
+        self.dirty = 1
 
 class Simulate:
     """Simulate the Quoridor game"""
 
-    def __init__(self):
-        """"""
+    def __init__(self, dirty_rects=True, headless=False, bots=None):
+        """
+        Create the window, the board and the pieces.  Nothing is drawn
+        until play() or step() is called.
+
+        dirty_rects: True to draw only what changed each frame, False to
+                     redraw the whole screen every frame
+        headless: True to draw to SDL's dummy video driver instead of a
+                  window, so the game can be run without a display
+        bots: dict of player number to a bot.BotThinker that plays for
+              that player, the pieces of these players can't be clicked
+        """
         # Create the game from quoridor.py
         self._myGame = QuoridorGame()
+        self._dirty_rects = dirty_rects
+
+        # State of the game loop, see handle_event()
+        self._running = True
+        self._pawn_clicked = None  # selected Pawn
+        self._fence_clicked = None  # selected Fence
+        self._player = None  # player of the selected Pawn or Fence
+        self._bots = dict(bots or {})  # player to BotThinker
+        for bot in self._bots.values():
+            bot.start()  # before the game loop, so it never waits for it
+        self._asked_ply = None  # ply a bot was last asked to move in
+
+        # Find sprites by board coordinates, see hittest.py
+        self._rectangles = {}  # (x, y) to Rectangle
+        self._markers = {}  # ('h' or 'v', (x, y)) to Marker
+        self._tray_index = hittest.GridIndex()  # fences not played yet
+        self._hovered = None  # Rectangle or Marker under the mouse
 
 
         # Constants for the board / screen
@@ -264,6 +410,8 @@ class Simulate:
 
         # Create the surface
         # Create the screen
+        if headless:
+            use_dummy_display()
         self._screen = pygame.display.set_mode((screen_width, screen_height))
         self._screen.fill(screen_color)  # Change the background (google color picker)
 
@@ -306,7 +454,27 @@ class Simulate:
         p1_txt = Text('P1 Fences', 50, 100, 16)
         p2_txt = Text('P2 Fences', 660, 100, 16)
         self._text_group.add(title, p1_txt, p2_txt)
-
+        # Create the status line and the fences left under the tray names,
+        # see update_status()
+        self._fences_txt = {1: Text('', 50, 122, 16),
+                            2: Text('', 660, 122, 16)}
+        self._status_txt = Text('', 360, 628, 20)
+        self._winner_txt = None  # added when the game is won
+        self._status_ply = None  # ply the status was last updated for
+        self._text_group.add(self._status_txt, *self._fences_txt.values())
+        self.update_status()
+
+        # Everything on the screen, drawn in layers in the same order as
+        # the full redraw: rectangles, pawns, markers, fences, then text
+        self._render_group = pygame.sprite.LayeredDirty()
+        self._layers = [self._rectangle_group, self.pawn_group,
+                        self._marker_group, self._fence_group,
+                        self._text_group]
+        for layer, group in enumerate(self._layers):
+            self._render_group.add(group.sprites(), layer=layer)
+        self._background = pygame.Surface(self._screen.get_size())
+        self._background.fill(BACKGROUND_COLOR)
+        self._render_group.clear(self._screen, self._background)
 
     def create_markers(self, x_pos, y_pos, rec_width, rec_height, angle):
         """Create fence marker sprites.  The purpose of these sprites
@@ -339,6 +507,7 @@ class Simulate:
                 self._new_marker = Marker(x_pos, y_pos, rec_width, rec_height, \
                                           (x, y), angle)
                 self._marker_group.add(self._new_marker)
+                self._markers[(angle, (x, y))] = self._new_marker
                 x_pos += 60
                 x += 1
             y_pos += 60
@@ -356,6 +525,7 @@ class Simulate:
             for column in range(9):
                 self._new_rectangle = Rectangle(x_pos, y_pos, (x, y))
                 self._rectangle_group.add(self._new_rectangle)
+                self._rectangles[(x, y)] = self._new_rectangle
                 x_pos += 60
                 x += 1
             y_pos += 60
@@ -379,6 +549,7 @@ class Simulate:
             for column in range(2):
                 self._new_fence = Fence(x_pos, y_pos, (x, y), player, color)
                 self._fence_group.add(self._new_fence)
+                self._tray_index.add(self._new_fence, self._new_fence.rect)
                 x_pos += 30
                 x += 1
             y_pos += 60
@@ -390,6 +561,104 @@ class Simulate:
     def get_screen(self):
         return self._screen
 
+    def add_text(self, text):
+        """Add a Text sprite to the screen.  Does not return anything."""
+        self._text_group.add(text)
+        self._render_group.add(text, layer=self._layers.index(self._text_group))
+
+    def update_status(self):
+        """
+        Show the fences each player has left and whose turn it is, and
+        put the winner on the middle of the screen once there is one.
+        A Text is only rendered again when what it says changes, and
+        nothing is checked until a move has been made.
+        Does not return anything.
+        """
+        game = self._myGame
+        if game.get_ply() == self._status_ply:
+            return
+        self._status_ply = game.get_ply()
+        for player, text in self._fences_txt.items():
+            text.set_text('%d left' % game.get_fence_count(player))
+        winner = game.get_winner()
+        if winner is None:
+            turn = game.get_turn()
+            self._status_txt.set_text('Player %d to move' % turn,
+                                      GREEN if turn == 1 else BLUE)
+            return
+        self._status_txt.set_text('Game over', WHITE)
+        if self._winner_txt is None:
+            # Put winner on middle of screen
+            self._winner_txt = Text('PLAYER '+str(winner)+' WINS!', 350, 350)
+            self.add_text(self._winner_txt)
+
+    def draw(self):
+        """Draw the screen.  In dirty rect mode only the sprites that
+        changed since the last frame are drawn and sent to the display."""
+        if self._dirty_rects:
+            pygame.display.update(self._render_group.draw(self._screen))
+            return
+
+        # I was having an issue where an object was moved, such
+        # as a fence, and a ghost of the object was left behind
+        # in the original location.  The only way I could figure
+        # out how to clear the ghost was to use the fill() method
+        self._screen.fill(BACKGROUND_COLOR)  # need this to remove the old fence after rotating
+        for group in self._layers:
+            group.draw(self._screen)
+        pygame.display.flip()  # updates the screen
+
+    def redraw_all(self):
+        """Paint the background and mark the whole screen to be drawn on
+        the next frame.  Does not return anything."""
+        self._screen.blit(self._background, (0, 0))
+        self._render_group.repaint_rect(self._screen.get_rect())
+
+    def pawn_at(self, pos):
+        """Return the Pawn under a screen position, or None"""
+        for pawn in self.pawn_group:  # only two pawns
+            if pawn.rect.collidepoint(pos):
+                return pawn
+        return None
+
+    def fence_at(self, pos):
+        """Return the unplayed Fence under a screen position, or None"""
+        return self._tray_index.find(*pos)
+
+    def marker_at(self, pos):
+        """Return the Marker under a screen position, or None"""
+        slot = hittest.fence_slot(*pos)
+        if slot is None:
+            return None
+        return self._markers[slot]
+
+    def rectangle_at(self, pos):
+        """Return the board Rectangle under a screen position, or None"""
+        cell = hittest.board_cell(*pos)
+        if cell is None:
+            return None
+        return self._rectangles[cell]
+
+    def hover(self, pos, fence_clicked, pawn_clicked):
+        """
+        Highlight the marker under the mouse when a fence is selected, or
+        the board rectangle under the mouse when a pawn is selected.  Only
+        the sprites whose color changes are redrawn.
+        Does not return anything.
+        """
+        target = None
+        if fence_clicked is not None:
+            target = self.marker_at(pos)
+        elif pawn_clicked is not None:
+            target = self.rectangle_at(pos)
+        if target is self._hovered:
+            return
+        if self._hovered is not None:
+            self._hovered.set_color(self._hovered.rec_color)
+        if target is not None:
+            target.set_color(HOVER_COLOR)
+        self._hovered = target
+
     def deselect_object(self, fence_clicked, pawn_clicked):
         """Method will deselect previously selected """
         if fence_clicked != None:
@@ -402,155 +671,248 @@ class Simulate:
             pawn_clicked = None
         return fence_clicked, pawn_clicked
 
-    def play(self):
-        """"""
-        running = True
-        pawn_clicked = None
-        fence_clicked = None
-        clock = pygame.time.Clock()
-
-        while running:
-            for event in pygame.event.get():
-                # Check for a winner
-                if self._myGame.get_winner() != None:
-                    winner = self._myGame.get_winner()
-                    # Put winner on middle of screen
-                    win_txt = Text('PLAYER '+str(winner)+' WINS!', 350, 350)
-                    self._text_group.add(win_txt)
-                # Check for a keyboard button press
-                if event.type == KEYDOWN:
-                    # Check for Escape button
-                    if event.key == K_ESCAPE:
-                        # Exit game
-                        running = False
-                    # Check for Left button
-                    if event.key == pygame.K_LEFT and fence_clicked != None:
-                        # Rotate fence 90 degrees
-                        fence_clicked.rotate(self._screen)
-                # Check if X pushed
-                elif event.type == QUIT:
-                    # Exit game
-                    running = False
-                # Check if mouse clicked
-                elif event.type == pygame.MOUSEBUTTONUP:
-                    # Keep track of mouse click
-                    click = 0
-                    # Get the x and y coordinates of the mouse
-                    mouse_pos = pygame.mouse.get_pos()
-
-                    if click == 0:
-                        # Check if a pawn was clicked
-                        for pawn in self.pawn_group:
-                            # if pawn was selected
-                            if pawn.rect.collidepoint(mouse_pos):
-                                print("Pawn clicked")
-                                # deselect previously selected pawn / fence
-                                fence_clicked, pawn_clicked = \
-                                    self.deselect_object(fence_clicked, pawn_clicked)
-                                # save the pawn object
-                                pawn_clicked = pawn
-                                # get the player #
-                                player = pawn_clicked.get_player()
-                                # change pawns color
-                                pawn_clicked.set_color(PAWN_COLOR_CLICKED)
-                                click += 1
-
-                    if click == 0:
-                        # Check if a fence was clicked
-                        for fence in self._fence_group:
-                            # store if fence has been played yet
-                            is_used = fence.get_used()
-                            # if fence was selected
-                            if fence.rect.collidepoint(mouse_pos) and is_used == False:
-                                print("Fence clicked")
-                                # deselect prev selected pawn / fence
-                                fence_clicked, pawn_clicked = \
-                                    self.deselect_object(fence_clicked, pawn_clicked)
-                                # save the fence object
-                                fence_clicked = fence
-                                # get the player #
-                                player = fence_clicked.get_player()
-                                # change fence color
-                                fence_clicked.set_color(FENCE_COLOR_CLICKED)
-                                click += 1
-
-                    if click == 0 and fence_clicked != None:
-                        print("Check for where to move")
-                        # Move a fence
-                        # while fence_clicked != None:
-                        # Check which fence marker was clicked
-                        for marker in self._marker_group:
-                            if marker.rect.collidepoint(mouse_pos) and click < 3:
-                                # get screen coordinates of marker
-                                x = marker.rect.centerx
-                                y = marker.rect.centery
-                                # get coord of marker
-                                coord = marker.get_coord()
-                                # get angle of marker
-                                angle = marker.get_angle()
-                                # call QuoridorGame move_pawn with the:
-                                #   player and coordinates
-                                # check the result
-                                result = self._myGame.place_fence(player, angle, coord)
-                                # if result is true then move was successful
-                                # update move on screen
-                                if result == True:
-                                    # fence starts vertically, rotate fence
-                                    # if horizontal marker clicked
-                                    if angle == 'h':
-                                        fence_clicked.rotate(self._screen)
-                                    fence_clicked.move_fence(x, y)
-                                    fence_clicked.set_used()
-                                fence_color = fence_clicked.get_fence_color_unclicked()
-                                fence_clicked.set_color(fence_color)
-                                fence_clicked = None
-                                click += 1
-
-                    if click == 0 and pawn_clicked != None:
-                        # Move a pawn
-                        # while pawn_clicked != None:
-                        # Check which rectangle was clicked
-                        for rectangle in self._rectangle_group:
-                            if rectangle.rect.collidepoint(mouse_pos) and click < 3:
-                                # get screen coordinates of rectangle
-                                x = rectangle.rect.centerx
-                                y = rectangle.rect.centery
-                                # get coord of rectangle
-                                coord = rectangle.get_coord()
-                                # call QuoridorGame move_pawn with the:
-                                #   player and coordinates
-                                # check the result
-                                result = self._myGame.move_pawn(player, coord)
-                                # if result is true then move was successful
-                                # update move on screen
-                                if result == True:
-                                    pawn_clicked.move_pawn(x, y)
-                                pawn_color = pawn_clicked.get_pawn_color_unclicked()
-                                pawn_clicked.set_color(pawn_color)
-                                pawn_clicked = None
-                                click += 1
-
-            # I was having an issue where an object was moved, such
-            # as a fence, and a ghost of the object was left behind
-            # in the original location.  The only way I could figure
-            # out how to clear the ghost was to use the fill() method
-            self._screen.fill((0, 0, 0))  # need this to remove the old fence after rotating
-            self._rectangle_group.draw(self._screen)  # add rectangles to screen
-
-            self.pawn_group.draw(self._screen)  # add pawns to screen
-            self._marker_group.draw(self._screen)  # add pawns to screen
-            self._fence_group.draw(self._screen)  # add fences to screen
-            self._text_group.draw(self._screen) # add text ot screen
-            pygame.display.flip()  # updates the screen
-
-
-newGame = Simulate()
-newGame.play()
-
-
-
-
-
-
+    def handle_event(self, event):
+        """
+        Act on one pygame event, such as a click or a key press.
+        Does not return anything, a QUIT event or the Escape key sets
+        is_running() to False.
+        """
+        # Check for a keyboard button press
+        if event.type == KEYDOWN:
+            # Check for Escape button
+            if event.key == K_ESCAPE:
+                # Exit game
+                self._running = False
+            # Check for Left button
+            if event.key == pygame.K_LEFT and self._fence_clicked != None:
+                # Rotate fence 90 degrees
+                self._fence_clicked.rotate(self._screen)
+                self._tray_index.move(self._fence_clicked, self._fence_clicked.rect)
+        # Highlight what is under the mouse
+        elif event.type == pygame.MOUSEMOTION:
+            self.hover(event.pos, self._fence_clicked, self._pawn_clicked)
+        # Check for a move from a computer player
+        elif event.type == BOT_MOVE:
+            self.play_bot_move(event.state, event.move)
+        # Check if X pushed
+        elif event.type == QUIT:
+            # Exit game
+            self._running = False
+        # Check if mouse clicked
+        elif event.type == pygame.MOUSEBUTTONUP:
+            # Get the x and y coordinates of the mouse
+            mouse_pos = event.pos
+
+            # Check if a pawn or a fence in a tray was clicked
+            pawn = self.pawn_at(mouse_pos)
+            fence = None if pawn is not None else self.fence_at(mouse_pos)
+            # The computer players' pieces are not for clicking
+            if pawn is not None and pawn.get_player() in self._bots:
+                pawn = None
+            if fence is not None and fence.get_player() in self._bots:
+                fence = None
+
+            if pawn is not None:
+                print("Pawn clicked")
+                # deselect previously selected pawn / fence
+                self._fence_clicked, self._pawn_clicked = \
+                    self.deselect_object(self._fence_clicked, self._pawn_clicked)
+                # save the pawn object
+                self._pawn_clicked = pawn
+                # get the player #
+                self._player = self._pawn_clicked.get_player()
+                # change pawns color
+                self._pawn_clicked.set_color(PAWN_COLOR_CLICKED)
+
+            elif fence is not None:
+                print("Fence clicked")
+                # deselect prev selected pawn / fence
+                self._fence_clicked, self._pawn_clicked = \
+                    self.deselect_object(self._fence_clicked, self._pawn_clicked)
+                # save the fence object
+                self._fence_clicked = fence
+                # get the player #
+                self._player = self._fence_clicked.get_player()
+                # change fence color
+                self._fence_clicked.set_color(FENCE_COLOR_CLICKED)
+
+            elif self._fence_clicked != None:
+                print("Check for where to move")
+                # Move a fence
+                # Check which fence marker was clicked
+                marker = self.marker_at(mouse_pos)
+                if marker is not None:
+                    # get screen coordinates of marker
+                    x = marker.rect.centerx
+                    y = marker.rect.centery
+                    # get coord of marker
+                    coord = marker.get_coord()
+                    # get angle of marker
+                    angle = marker.get_angle()
+                    # call QuoridorGame move_pawn with the:
+                    #   player and coordinates
+                    # check the result
+                    result = self._myGame.place_fence(self._player, angle, coord)
+                    # if result is true then move was successful
+                    # update move on screen
+                    if result == True:
+                        # fence starts vertically, rotate fence
+                        # if horizontal marker clicked
+                        if angle == 'h':
+                            self._fence_clicked.rotate(self._screen)
+                        self._fence_clicked.move_fence(x, y)
+                        self._fence_clicked.set_used()
+                        self._tray_index.remove(self._fence_clicked)
+                    fence_color = self._fence_clicked.get_fence_color_unclicked()
+                    self._fence_clicked.set_color(fence_color)
+                    self._fence_clicked = None
+
+            elif self._pawn_clicked != None:
+                # Move a pawn
+                # Check which rectangle was clicked
+                rectangle = self.rectangle_at(mouse_pos)
+                if rectangle is not None:
+                    # get screen coordinates of rectangle
+                    x = rectangle.rect.centerx
+                    y = rectangle.rect.centery
+                    # get coord of rectangle
+                    coord = rectangle.get_coord()
+                    # call QuoridorGame move_pawn with the:
+                    #   player and coordinates
+                    # check the result
+                    result = self._myGame.move_pawn(self._player, coord)
+                    # if result is true then move was successful
+                    # update move on screen
+                    if result == True:
+                        self._pawn_clicked.move_pawn(x, y)
+                    pawn_color = self._pawn_clicked.get_pawn_color_unclicked()
+                    self._pawn_clicked.set_color(pawn_color)
+                    self._pawn_clicked = None
+
+            # The selection may have changed what is highlighted
+            self.hover(mouse_pos, self._fence_clicked, self._pawn_clicked)
+
+    def is_running(self):
+        """Return False once the window was closed or Escape was pressed"""
+        return self._running
+
+    def step(self, events):
+        """
+        Run one frame of the game loop: handle the events and draw the
+        screen.  Does not wait for the next frame, so a script can call it
+        as fast as it likes.
 
+        events: list of pygame events, such as from pygame.event.get()
+        Returns is_running()
+        """
+        for event in events:
+            self.handle_event(event)
+        if self._running:
+            self.ask_bot()
+        else:
+            self.close()
+        self.update_status()
+        self.draw()
+        return self._running
 
+    def play(self):
+        """Run the game in the window until it is closed"""
+        clock = pygame.time.Clock()
+        self.redraw_all()
+        try:
+            while self.step(pygame.event.get()):
+                clock.tick(FPS)  # sleep so the loop doesn't use a whole core
+        finally:
+            self.close()
+
+    def ask_bot(self):
+        """
+        Start a computer player thinking when it is its turn.  The move
+        comes back as a BOT_MOVE event, see play_bot_move().
+        Does not return anything.
+        """
+        game = self._myGame
+        bot = self._bots.get(game.get_turn())
+        if bot is None or game.get_winner() is not None:
+            return
+        if bot.is_thinking() or game.get_ply() == self._asked_ply:
+            return
+        self._asked_ply = game.get_ply()
+        bot.think(game.get_state(), self.post_bot_move)
+
+    def post_bot_move(self, state, move):
+        """Post a computer player's move as a BOT_MOVE event.  Called from
+        the BotThinker's thread.  Does not return anything."""
+        pygame.event.post(pygame.event.Event(BOT_MOVE, state=state, move=move))
+
+    def play_bot_move(self, state, move):
+        """
+        Play a computer player's move and move its piece on the screen.
+        The move is left out if the game is no longer in the position the
+        move was chosen in.  When the computer player has no move, or its
+        move is illegal, the status line says so and it is not asked
+        again, like a stuck or illegal player in selfplay.py.
+        Does not return anything.
+
+        state: GameState the move was chosen in
+        move: move tuple, ('p', (x, y)) or ('h' or 'v', (x, y)), or None
+        """
+        game = self._myGame
+        if state != game.get_state():
+            return
+        player = state.get_turn()
+        if move is None:
+            self._status_txt.set_text('Player %d has no move' % player, RED)
+            return
+        angle, coord = move
+        if angle == 'p':
+            if game.move_pawn(player, coord) is not True:
+                self._status_txt.set_text(
+                    'Player %d tried an illegal move' % player, RED)
+                return
+            pawn = self.p1 if player == 1 else self.p2
+            pawn.move_pawn(*hittest.cell_center(*coord))
+            return
+        if game.place_fence(player, angle, coord) is not True:
+            self._status_txt.set_text(
+                'Player %d tried an illegal move' % player, RED)
+            return
+        # Take the first fence left in the player's tray
+        for fence in self._fence_group:
+            if fence.get_player() == player and not fence.get_used():
+                break
+        else:
+            return
+        # fence starts vertically, rotate fence if horizontal
+        if angle == 'h':
+            fence.rotate(self._screen)
+        marker = self._markers[(angle, coord)]
+        fence.move_fence(marker.rect.centerx, marker.rect.centery)
+        fence.set_used()
+        self._tray_index.remove(fence)
+
+    def close(self):
+        """Stop the computer players, cancelling any move they are
+        thinking about.  Does not return anything."""
+        for bot in self._bots.values():
+            bot.close()
+
+
+def main(argv=None):
+    """Open the window and play a game"""
+    parser = argparse.ArgumentParser(description='Play Quoridor in a window')
+    parser.add_argument('--bot', help='computer player spec, such as '
+                        'alphabeta:1000 or greedy, see agents.py')
+    parser.add_argument('--bot-player', type=int, choices=(1, 2), default=2,
+                        help='player the computer plays for')
+    parser.add_argument('--think-ms', type=int,
+                        help='least time the computer takes for each move')
+    args = parser.parse_args(argv)
+    bots = {}
+    if args.bot:
+        bots[args.bot_player] = BotThinker(args.bot, args.think_ms)
+    Simulate(bots=bots).play()
+
+
+if __name__ == '__main__':
+    main()
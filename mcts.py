@@ -0,0 +1,333 @@
+# Description:  Computer player for Quoridor using Monte Carlo Tree Search.
+# Associated Files: Quoridor.py, ai.py
+
+"""
+MCTSPlayer picks a move for the player whose turn it is in a QuoridorGame.
+Each playout:
+    Selects a path down the tree with UCT (upper confidence bound).
+    Expands one untried move at the bottom of the path.
+    Plays a light playout to the end of the game: the pawn follows its
+        shortest path, with a random fence placed now and then.
+    Counts the result in every node on the path.
+
+Tree reuse: the tree is kept between moves.  On the next call the node for
+the new position (after our move and the opponent's reply) becomes the root,
+so the playouts already spent below it are not thrown away.
+
+Root parallelization: with workers > 1, a multiprocessing pool runs
+independent searches from a copy of the position.  Each worker sends back
+the visits and wins of the root moves, and these are added to the local
+tree's root before the most visited move is chosen.
+
+Example:
+    with MCTSPlayer(playouts=4000, workers=4) as player:
+        result = player.search(game)
+    print(result.move, result.playouts_per_sec)
+"""
+
+import math
+import multiprocessing
+import random
+import time
+from collections import namedtuple
+
+import bitboard
+from ai import candidate_moves
+
+MCTSResult = namedtuple('MCTSResult', ['move', 'playouts', 'elapsed',
+                                       'playouts_per_sec', 'visits'])
+
+
+class Node:
+    """
+    A position in the search tree.  The attributes are used directly by the
+    search, so they are public and the class uses __slots__ to keep trees
+    small.
+        move: move tuple that led to this node, None for the root
+        parent: Node above this one, None for the root
+        player: int for the player who made the move
+        key: int for the Zobrist key of the position
+        children: list of Nodes for the moves that have been tried
+        untried: list of moves not tried yet, None until first visited
+        visits: int for the number of playouts through this node
+        wins: int for the playouts won by player
+    """
+    __slots__ = ('move', 'parent', 'player', 'key', 'children', 'untried',
+                 'visits', 'wins')
+
+    def __init__(self, move, parent, player, key):
+        """Create a node that hasn't been visited"""
+        self.move = move
+        self.parent = parent
+        self.player = player
+        self.key = key
+        self.children = []
+        self.untried = None
+        self.visits = 0
+        self.wins = 0
+
+    def select_child(self, exploration):
+        """Return the child with the highest UCT score"""
+        log_visits = math.log(self.visits)
+        best, best_score = None, -1.0
+        for child in self.children:
+            score = child.wins / child.visits + \
+                exploration * math.sqrt(log_visits / child.visits)
+            if score > best_score:
+                best, best_score = child, score
+        return best
+
+
+def playout(game, rng, fence_rate=0.15, max_plies=200):
+    """
+    Play a light playout to the end of the game and take every move back.
+    Pawns step along their shortest path, and with chance fence_rate the
+    player tries a random fence instead.
+
+    :param game: QuoridorGame to play from, left unchanged
+    :param rng: random.Random to use
+    :param fence_rate: float for the chance of trying a fence each turn
+    :param max_plies: int, after this many plies the player closest to
+        their goal row wins
+    :return: int for the winning player
+    """
+    start = game.get_ply()
+    for ply in range(max_plies):
+        if game.get_winner() is not None:
+            break
+        player = game.get_turn()
+        if game.get_fence_count(player) > 0 and rng.random() < fence_rate:
+            # Check the fence with legal_fences() and play it with push(),
+            # place_fence() would record it and count it in the profiler
+            angle = rng.choice('hv')
+            coord = (rng.randint(0, 8), rng.randint(0, 8))
+            bit = bitboard.fence_bit(*coord)
+            if angle == 'v':
+                bit <<= bitboard.V_SHIFT
+            if game.legal_fences(bit):
+                game.push((angle, coord))
+                continue
+        field = game.get_distance_field(player)
+        moves = game.legal_pawn_moves()
+        if not moves:
+            break
+        game.push(('p', min(moves, key=lambda c: (field[c[1] * 9 + c[0]],
+                                                  rng.random()))))
+    winner = game.get_winner()
+    if winner is None:
+        winner = 1 if game.get_distance(1) <= game.get_distance(2) else 2
+    while game.get_ply() > start:
+        game.pop()
+    return winner
+
+
+def run_playouts(game, root, playouts, deadline, rng, exploration,
+                 fence_rate):
+    """
+    Run playouts from the root node, growing the tree below it.
+
+    :param game: QuoridorGame at the root position, left unchanged
+    :param root: Node for the position
+    :param playouts: int for the most playouts to run
+    :param deadline: float time.perf_counter() value to stop at, or None
+    :param rng: random.Random to use
+    :param exploration: float for the UCT exploration constant
+    :param fence_rate: float for the chance of a fence in a playout
+    :return: int for the number of playouts run
+    """
+    start = game.get_ply()
+    done = 0
+    while done < playouts:
+        if deadline is not None and done & 15 == 0 and \
+                time.perf_counter() > deadline:
+            break
+        node = root
+
+        # Selection: follow UCT while every move has been tried
+        while node.untried == [] and node.children:
+            node = node.select_child(exploration)
+            game.push(node.move)
+
+        # Expansion: try one new move
+        if node.untried is None:
+            node.untried = candidate_moves(game)
+            rng.shuffle(node.untried)
+        if node.untried and game.get_winner() is None:
+            player = game.get_turn()
+            move = node.untried.pop()
+            game.push(move)
+            child = Node(move, node, player, game.get_position_key())
+            node.children.append(child)
+            node = child
+
+        # Simulation and backpropagation
+        winner = playout(game, rng, fence_rate)
+        while node is not None:
+            node.visits += 1
+            if node.player == winner:
+                node.wins += 1
+            node = node.parent
+        while game.get_ply() > start:
+            game.pop()
+        done += 1
+    return done
+
+
+def _worker_search(args):
+    """
+    Run a search in a worker process and return the root statistics as a
+    dict of {move: (visits, wins)}.
+    """
+    game, playouts, time_ms, seed, exploration, fence_rate = args
+    deadline = None
+    if time_ms is not None:
+        deadline = time.perf_counter() + time_ms / 1000
+    root = Node(None, None, None, game.get_position_key())
+    run_playouts(game, root, playouts, deadline, random.Random(seed),
+                 exploration, fence_rate)
+    return {child.move: (child.visits, child.wins) for child in root.children}
+
+
+class MCTSPlayer:
+    """Choose moves with Monte Carlo Tree Search"""
+
+    def __init__(self, playouts=2000, time_ms=None, workers=1,
+                 exploration=1.4, fence_rate=0.15, seed=None):
+        """
+        Create the player.
+
+        :param playouts: int for the total playouts per move, across workers
+        :param time_ms: int for a time budget per move, None for no limit
+        :param workers: int for the number of processes to search with
+        :param exploration: float for the UCT exploration constant
+        :param fence_rate: float for the chance of a fence in a playout
+        :param seed: int seed for the random numbers, None for a random seed
+        """
+        self._playouts = playouts
+        self._time_ms = time_ms
+        self._workers = workers
+        self._exploration = exploration
+        self._fence_rate = fence_rate
+        self._rng = random.Random(seed)
+        self._root = None
+        self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Stop the worker processes, if any were started"""
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+
+    def choose_move(self, game):
+        """Return the best move found for the player whose turn it is"""
+        return self.search(game).move
+
+    def search(self, game, time_ms=None):
+        """
+        Search the position and choose the most visited move.
+
+        :param game: QuoridorGame to pick a move in, left unchanged
+        :param time_ms: int for the time budget, defaults to the player's
+        :return: MCTSResult with the move and the playout rate
+        """
+        if time_ms is None:
+            time_ms = self._time_ms
+        start = time.perf_counter()
+        deadline = None
+        if time_ms is not None:
+            deadline = start + time_ms / 1000
+        # A move that wins right away needs no search
+        goal = game.get_goal(game.get_turn())
+        for coord in game.legal_pawn_moves():
+            if coord[1] == goal:
+                return MCTSResult(('p', coord), 0, 0.0, 0.0, {})
+
+        root = self.reuse_root(game)
+        share = max(1, self._playouts // self._workers)
+
+        # Start the workers, then search locally while they run
+        pending = self.start_workers(game, share, time_ms)
+        done = run_playouts(game, root, share, deadline, self._rng,
+                            self._exploration, self._fence_rate)
+
+        # Merge the worker trees into the root, so the tree kept for the
+        # next move has their playouts too
+        if pending is not None:
+            for stats in pending.get():
+                done += self.merge_stats(game, root, stats)
+        visits = {child.move: child.visits for child in root.children}
+        elapsed = time.perf_counter() - start
+        move = max(visits, key=visits.get) if visits else None
+        self._root = root
+        return MCTSResult(move, done, elapsed, done / max(elapsed, 1e-9),
+                          visits)
+
+    def merge_stats(self, game, root, stats):
+        """
+        Add the root statistics from a worker to the root's children,
+        making a child for any move the local search hasn't tried.
+
+        :param game: QuoridorGame at the root position, left unchanged
+        :param root: Node for the position
+        :param stats: dict of {move: (visits, wins)} from _worker_search()
+        :return: int for the number of playouts added
+        """
+        children = {child.move: child for child in root.children}
+        player = game.get_turn()
+        added = 0
+        for move, (count, wins) in stats.items():
+            child = children.get(move)
+            if child is None:
+                game.push(move)
+                child = Node(move, root, player, game.get_position_key())
+                game.pop()
+                root.children.append(child)
+                if root.untried is not None and move in root.untried:
+                    root.untried.remove(move)
+            child.visits += count
+            child.wins += wins
+            added += count
+        root.visits += added
+        return added
+
+    def start_workers(self, game, share, time_ms):
+        """
+        Start searches in the worker processes.
+
+        :param game: QuoridorGame to search
+        :param share: int for the playouts each worker runs
+        :param time_ms: int for the time budget, None for no limit
+        :return: multiprocessing AsyncResult for the list of root statistics,
+            or None when there is only one worker
+        """
+        if self._workers <= 1:
+            return None
+        if self._pool is None:
+            self._pool = multiprocessing.Pool(self._workers - 1)
+        jobs = [(game, share, time_ms, self._rng.getrandbits(32),
+                 self._exploration, self._fence_rate)
+                for worker in range(self._workers - 1)]
+        return self._pool.map_async(_worker_search, jobs)
+
+    def reuse_root(self, game):
+        """
+        Return the node for the game's position from the last tree, looking
+        at our last move and the opponent's reply.  A new root is made if
+        the position isn't in the tree.
+        """
+        key = game.get_position_key()
+        if self._root is not None:
+            for child in self._root.children:
+                for node in [child] + child.children:
+                    if node.key == key:
+                        node.parent = None
+                        node.move = None
+                        return node
+        return Node(None, None, game.get_opp_player(game.get_turn()), key)
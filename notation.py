@@ -0,0 +1,130 @@
+# Description:  Read and write Quoridor games in algebraic notation.
+# Associated Files: Quoridor.py, bitboard.py
+
+"""
+Squares are named with a column letter and a row number, like a chess
+board: the letter is 'a' - 'i' for x = 0 - 8 and the number is y + 1, so
+player 1 starts on e1 = (4, 0) and player 2 starts on e9 = (4, 8).
+
+A pawn move is the square the pawn moves to, such as 'e2'.
+
+A fence is the square of the cell it is on followed by its angle, using
+the engine's layout: 'h' is the top edge of the cell and 'v' is the left
+edge.  So 'e3h' is ('h', (4, 2)) and 'c5v' is ('v', (2, 4)).  Fences in
+this game cover one edge, so a token names exactly one fence slot and
+the edges of the board have no token.
+
+A game file has one game per line, with the moves split by spaces.  Move
+numbers such as '12.' are skipped, and blank lines and lines starting with
+'#' are ignored.
+
+Parsing looks each token up in a table of every move, so a game is read
+with one dict lookup per move.  parse_game() only checks that every token
+is a real move.  Use replay_game() to also check the moves follow the
+rules.
+
+replay_game() is much slower than parse_game(), tens of times slower for
+games with many fences.  Every move goes through move_pawn() or
+place_fence(), and a fence that crosses a shortest path needs a path search
+for the fair play rule.  Checking the moves with legal_pawn_moves() and
+legal_fences() is slower still, as they look at every move, not just the
+one played.  For games known to be legal, such as ones written from a
+GameRecorder, replay the moves with push() instead.
+"""
+
+import bitboard
+from Quoridor import QuoridorGame
+
+COLUMNS = 'abcdefghi'
+
+
+def square_name(x, y):
+    """Return the name of the square at (x, y), such as 'e1'"""
+    return COLUMNS[x] + str(y + 1)
+
+
+# Token for each move tuple, and the move tuple for each token
+NAMES = {('p', (x, y)): square_name(x, y)
+         for y in range(bitboard.SIZE) for x in range(bitboard.SIZE)}
+for _angle, _slots in (('h', bitboard.SLOTS_H), ('v', bitboard.SLOTS_V)):
+    for _index in bitboard.iter_bits(_slots):
+        _coord = bitboard.slot_coord(_index)
+        NAMES[(_angle, _coord)] = square_name(*_coord) + _angle
+TOKENS = {name: move for move, name in NAMES.items()}
+
+
+def format_move(move):
+    """Return the token for a move tuple, such as 'e2' or 'e3h'"""
+    try:
+        return NAMES[move]
+    except KeyError:
+        raise ValueError('not a move on the board: %r' % (move,)) from None
+
+
+def parse_move(token):
+    """Return the move tuple for a token, such as ('p', (4, 1)) for 'e2'"""
+    try:
+        return TOKENS[token]
+    except KeyError:
+        raise ValueError('not a move: %r' % token) from None
+
+
+def format_game(moves):
+    """Return a list of move tuples as one line of tokens"""
+    return ' '.join(map(format_move, moves))
+
+
+def parse_game(line):
+    """
+    Return the list of move tuples in one line of tokens.
+
+    :param line: str of tokens split by spaces, move numbers are skipped
+    :return: list of move tuples
+    """
+    tokens = line.split()
+    try:
+        return list(map(TOKENS.__getitem__, tokens))
+    except KeyError:
+        pass
+    # Only lines with move numbers or bad tokens get here
+    return [parse_move(token) for token in tokens
+            if not (token.endswith('.') and token[:-1].isdigit())]
+
+
+def parse_games(lines):
+    """
+    Read the games in a file one line at a time.
+
+    :param lines: iterable of str, such as an open file
+    :return: generator of lists of move tuples, one list for each game
+    """
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        try:
+            yield parse_game(line)
+        except ValueError as error:
+            raise ValueError('line %d: %s' % (number, error)) from None
+
+
+def write_games(games, out):
+    """Write each list of move tuples in games as a line of out"""
+    for moves in games:
+        out.write(format_game(moves) + '\n')
+
+
+def replay_game(moves):
+    """
+    Play a list of move tuples from the start with the same checks as
+    move_pawn() and place_fence().
+
+    :return: QuoridorGame after the last move
+    :raises ValueError: if a move is not allowed
+    """
+    game = QuoridorGame()
+    for ply, move in enumerate(moves):
+        if game.make_move(game.get_turn(), move) is not True:
+            raise ValueError('move %d is not allowed: %s'
+                             % (ply + 1, format_move(move)))
+    return game
@@ -0,0 +1,88 @@
+# Description:  Opt-in call counts and timings for the phases of a move.
+# Associated Files: Quoridor.py
+
+"""
+QuoridorGame can time the phases of a move with a profiler object, in the
+same way it reports events to diagnostics.py.  The phases are:
+    initial_checks: the winner and turn checks of move_pawn() and
+        place_fence()
+    check_jump: the jump checks of a pawn move
+    is_blocked: the fence and pawn checks of a pawn move
+    find_path: the fair play check of place_fence()
+    fence_rollback: taking back a fence that breaks the fair play rule
+
+Counters are kept as well:
+    find_path.searches: Breadth-First searches run by has_path(), a path
+        that is still open is not searched
+    find_path.nodes: cells taken off the queue by those searches, a large
+        number for few searches points at a board with a long maze of fences
+
+The default is NULL_PROFILER, which does nothing.  QuoridorGame checks the
+enabled attribute before reading the clock, so when profiling is off the
+only cost is that check.
+
+    profiler = PhaseProfiler()
+    game.set_profiler(profiler)
+    ...
+    print(profiler.snapshot())
+    profiler.reset()
+"""
+
+
+class NullProfiler:
+    """Profiler that ignores every phase and counter"""
+    enabled = False
+
+    def add(self, phase, seconds):
+        """Do nothing with the time"""
+        pass
+
+    def count(self, name, amount=1):
+        """Do nothing with the count"""
+        pass
+
+
+class PhaseProfiler:
+    """Count the calls and add up the time spent in each phase"""
+    enabled = True
+
+    def __init__(self):
+        """Create the profiler with no calls recorded"""
+        self._calls = {}
+        self._seconds = {}
+        self._counters = {}
+
+    def add(self, phase, seconds):
+        """
+        Record one call of a phase.
+
+        :param phase: str for the name of the phase
+        :param seconds: float for the time the call took
+        """
+        self._calls[phase] = self._calls.get(phase, 0) + 1
+        self._seconds[phase] = self._seconds.get(phase, 0.0) + seconds
+
+    def count(self, name, amount=1):
+        """Add amount to the counter called name"""
+        self._counters[name] = self._counters.get(name, 0) + amount
+
+    def snapshot(self):
+        """
+        Return a copy of what has been recorded so far.
+
+        :return: dict with 'phases', a dict of phase name to a dict with
+            'calls' and 'seconds', and 'counters', a dict of counter name to
+            int
+        """
+        phases = {phase: {'calls': calls, 'seconds': self._seconds[phase]}
+                  for phase, calls in self._calls.items()}
+        return {'phases': phases, 'counters': dict(self._counters)}
+
+    def reset(self):
+        """Forget every call and counter recorded so far"""
+        self._calls.clear()
+        self._seconds.clear()
+        self._counters.clear()
+
+
+NULL_PROFILER = NullProfiler()
@@ -0,0 +1,232 @@
+# Description:  Compact binary records of Quoridor games.
+# Associated Files: Quoridor.py, bitboard.py
+
+"""
+Each move is stored in one byte:
+    0 - 80: pawn move to the cell y * 9 + x
+    81 - 152: horizontal fence at (x, y), 81 + (y - 1) * 9 + x
+    153 - 224: vertical fence at (x, y), 153 + y * 8 + (x - 1)
+Only moves that were played are recorded, so a record can be replayed with
+push() without checking the moves again.
+
+A record file starts with FILE_HEADER, b'QRDR' and the format version.
+Each game is a GAME_HEADER followed by one byte for each move:
+    plies: number of moves (uint16)
+    winner: 0 for no winner, else 1 or 2 (uint8)
+    reason: free for the writer, such as a code for how the game ended
+        (uint8)
+    tag: free for the writer, such as the game number or a seed (uint32)
+
+Writing, with a GameRecorder hooked into the game:
+    with open('games.qrd', 'wb') as out:
+        writer = RecordWriter(out)
+        game = QuoridorGame()
+        game.set_recorder(GameRecorder(writer, tag=7))
+        ... play with move_pawn() and place_fence() ...
+
+Reading one game at a time, so memory stays flat:
+    for record, game in replay_file('games.qrd'):
+        print(record.winner, game.get_location(1))
+
+Random access by game number for samplers:
+    with RecordFile('games.qrd') as games:
+        record = games[12345]
+"""
+
+import mmap
+import struct
+from array import array
+from collections import namedtuple
+
+import bitboard
+from Quoridor import QuoridorGame
+
+MAGIC = b'QRDR'
+VERSION = 1
+FILE_HEADER = struct.Struct('<4sB3x')
+GAME_HEADER = struct.Struct('<HBBI')
+
+# One game read from a file, moves is a bytes object of move codes
+GameRecord = namedtuple('GameRecord', ['plies', 'winner', 'reason', 'tag',
+                                       'moves'])
+
+# Move tuple for each code, and the code for each move tuple
+MOVES = [('p', bitboard.cell_coord(cell)) for cell in range(bitboard.CELLS)]
+MOVES += [('h', (x, y)) for y in range(1, 9) for x in range(9)]
+MOVES += [('v', (x, y)) for y in range(9) for x in range(1, 9)]
+CODES = {move: code for code, move in enumerate(MOVES)}
+
+
+def encode_moves(moves):
+    """Return a list of move tuples as bytes of move codes"""
+    return bytes(CODES[move] for move in moves)
+
+
+def decode_moves(data):
+    """Return bytes of move codes as a list of move tuples"""
+    return [MOVES[code] for code in data]
+
+
+class RecordWriter:
+    """Write games to a binary file opened for writing"""
+
+    def __init__(self, out):
+        """Write the file header to out, a file opened in 'wb' mode"""
+        self._out = out
+        self._games = 0
+        out.write(FILE_HEADER.pack(MAGIC, VERSION))
+
+    def get_games(self):
+        """Return the number of games written"""
+        return self._games
+
+    def write(self, codes, winner=None, reason=0, tag=0):
+        """
+        Write one game.
+
+        :param codes: bytes or bytearray of move codes
+        :param winner: int of 1 or 2, None if nobody won
+        :param reason: int 0 - 255 for how the game ended
+        :param tag: int 0 - 2 ** 32 - 1 to store with the game
+        """
+        self._out.write(GAME_HEADER.pack(len(codes), winner or 0, reason, tag))
+        self._out.write(codes)
+        self._games += 1
+
+
+class GameRecorder:
+    """
+    Collect the moves of a game as they are played.  Give it to
+    QuoridorGame.set_recorder() and it is called after every move that
+    move_pawn() and place_fence() accept.  When a writer is given the game
+    is written as soon as somebody wins.
+    """
+
+    def __init__(self, writer=None, tag=0):
+        """
+        :param writer: RecordWriter to write the finished game to, or None
+        :param tag: int to store with the game
+        """
+        self._writer = writer
+        self._tag = tag
+        self._codes = bytearray()
+
+    def get_codes(self):
+        """Return the move codes recorded so far as bytes"""
+        return bytes(self._codes)
+
+    def record(self, game, move):
+        """Add a move that has just been played in game"""
+        self._codes.append(CODES[move])
+        winner = game.get_winner()
+        if winner is not None and self._writer is not None:
+            self.finish(winner)
+
+    def finish(self, winner=None, reason=0):
+        """Write the game, if there is a writer, and start a new one"""
+        if self._writer is not None:
+            self._writer.write(self._codes, winner, reason, self._tag)
+        self._codes = bytearray()
+
+
+def check_header(data):
+    """Raise ValueError if data doesn't start with a record file header"""
+    if len(data) < FILE_HEADER.size:
+        raise ValueError('not a game record file')
+    magic, version = FILE_HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError('not a game record file')
+    if version != VERSION:
+        raise ValueError('unknown record version %d' % version)
+
+
+def read_games(source):
+    """
+    Read the games in a file one at a time.
+
+    :param source: file opened in 'rb' mode
+    :return: generator of GameRecords
+    """
+    check_header(source.read(FILE_HEADER.size))
+    while True:
+        header = source.read(GAME_HEADER.size)
+        if not header:
+            return
+        if len(header) < GAME_HEADER.size:
+            raise ValueError('record file is cut short')
+        plies, winner, reason, tag = GAME_HEADER.unpack(header)
+        moves = source.read(plies)
+        if len(moves) < plies:
+            raise ValueError('record file is cut short')
+        yield GameRecord(plies, winner or None, reason, tag, moves)
+
+
+def replay(record):
+    """Return a new QuoridorGame with every move of a GameRecord played"""
+    game = QuoridorGame()
+    for code in record.moves:
+        game.push(MOVES[code])
+    return game
+
+
+def replay_file(path):
+    """
+    Replay every game in a file, reading one game at a time.
+
+    :param path: str for the record file
+    :return: generator of (GameRecord, QuoridorGame at the end of the game)
+    """
+    with open(path, 'rb') as source:
+        for record in read_games(source):
+            yield record, replay(record)
+
+
+class RecordFile:
+    """
+    Read games from a record file by game number.  The file is memory
+    mapped, and only the offset of each game is kept in memory, 8 bytes
+    for each game.
+    """
+
+    def __init__(self, path):
+        """Open the file and find where each game starts"""
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        check_header(self._map)
+        self._offsets = self.find_offsets()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def __getitem__(self, index):
+        """Return the GameRecord for a game number"""
+        offset = self._offsets[index]
+        plies, winner, reason, tag = GAME_HEADER.unpack_from(self._map, offset)
+        start = offset + GAME_HEADER.size
+        return GameRecord(plies, winner or None, reason, tag,
+                          self._map[start:start + plies])
+
+    def find_offsets(self):
+        """Return an array of the offset of each game in the file"""
+        offsets = array('Q')
+        offset, end = FILE_HEADER.size, len(self._map)
+        while offset < end:
+            if offset + GAME_HEADER.size > end:
+                raise ValueError('record file is cut short')
+            offsets.append(offset)
+            offset += GAME_HEADER.size + self._map[offset] + \
+                (self._map[offset + 1] << 8)
+        if offset > end:
+            raise ValueError('record file is cut short')
+        return offsets
+
+    def close(self):
+        """Close the memory map and the file"""
+        self._map.close()
+        self._file.close()
@@ -0,0 +1,188 @@
+# Description:  Play many Quoridor games between computer players without
+#               the pygame window.
+# Associated Files: Quoridor.py, agents.py
+
+"""
+Plays N games between two players named by spec strings (see agents.py)
+and streams one GameResult per game to an Aggregator as soon as it is done.
+The games are shared out over a multiprocessing pool; chunksize sets how
+many games each worker takes at a time, larger chunks cost less to send
+between processes.
+
+Command line:
+    python selfplay.py -n 20000 --p1 greedy --p2 random --workers 8
+    python selfplay.py -n 100 --p1 alphabeta:100 --p2 mcts:500 --out games.jsonl
+
+From Python:
+    aggregator = Aggregator()
+    for result in run_games(1000, 'greedy', 'random', workers=4):
+        aggregator.add(result)
+    print(aggregator.summary())
+"""
+
+import argparse
+import json
+import multiprocessing
+import sys
+import time
+from collections import namedtuple
+
+from Quoridor import QuoridorGame
+from agents import make_agent
+
+# Result of one game
+#   winner: int of 1 or 2, None if the game was stopped
+#   reason: 'goal', 'illegal' (the loser tried an illegal move), 'stuck'
+#       (the player to move had no move) or 'max_plies'
+GameResult = namedtuple('GameResult', ['index', 'winner', 'reason', 'plies',
+                                       'p1_fences_used', 'p2_fences_used',
+                                       'seconds'])
+
+# Reason codes written to a GameRecorder, see records.py.  A win at the goal
+# is written by the recorder itself with reason 0.
+REASON_CODES = {'goal': 0, 'illegal': 1, 'stuck': 2, 'max_plies': 3}
+
+
+def play_game(agent1, agent2, index=0, max_plies=400, recorder=None):
+    """
+    Play one game.  Every move is checked with make_move(), so a player
+    that tries an illegal move loses the game.
+
+    :param agent1: player for player 1
+    :param agent2: player for player 2
+    :param index: int to put in the result, such as the game number
+    :param max_plies: int for the most plies before the game is stopped
+    :param recorder: object given to QuoridorGame.set_recorder(), such as
+        a GameRecorder from records.py, or None.  A game that ends without
+        a win at the goal is passed to its finish(winner, reason code), see
+        REASON_CODES.
+    :return: GameResult
+    """
+    start = time.perf_counter()
+    game = QuoridorGame()
+    game.set_recorder(recorder)
+    agents = [None, agent1, agent2]
+    winner, reason = None, 'max_plies'
+    while game.get_ply() < max_plies:
+        player = game.get_turn()
+        move = agents[player].choose_move(game)
+        if move is None:
+            reason = 'stuck'
+            break
+        if game.make_move(player, move) is not True:
+            winner, reason = game.get_opp_player(player), 'illegal'
+            break
+        if game.get_winner() is not None:
+            winner, reason = game.get_winner(), 'goal'
+            break
+    if reason != 'goal' and hasattr(recorder, 'finish'):
+        recorder.finish(winner, REASON_CODES[reason])
+    return GameResult(index, winner, reason, game.get_ply(),
+                      10 - game.get_fence_count(1),
+                      10 - game.get_fence_count(2),
+                      time.perf_counter() - start)
+
+
+def _play_indexed(args):
+    """Play game number index in a worker process"""
+    spec1, spec2, seed, index, max_plies = args
+    agent1 = make_agent(spec1, seed + 2 * index)
+    agent2 = make_agent(spec2, seed + 2 * index + 1)
+    return play_game(agent1, agent2, index, max_plies)
+
+
+def run_games(games, spec1, spec2, workers=1, chunksize=64, seed=0,
+              max_plies=400):
+    """
+    Play games and yield each GameResult as soon as it is done.  Results
+    from a pool come back in the order they finish, not by index.
+
+    :param games: int for the number of games to play
+    :param spec1: str spec for player 1, see agents.py
+    :param spec2: str spec for player 2
+    :param workers: int for the number of processes, 1 plays in this process
+    :param chunksize: int for the number of games sent to a worker at once
+    :param seed: int, game i uses seeds seed + 2i and seed + 2i + 1
+    :param max_plies: int for the most plies in a game
+    """
+    jobs = ((spec1, spec2, seed, index, max_plies) for index in range(games))
+    if workers <= 1:
+        for job in jobs:
+            yield _play_indexed(job)
+        return
+    with multiprocessing.Pool(workers) as pool:
+        for result in pool.imap_unordered(_play_indexed, jobs, chunksize):
+            yield result
+
+
+class Aggregator:
+    """Collect GameResults and summarize them"""
+
+    def __init__(self, out=None):
+        """
+        Create the aggregator.
+
+        :param out: file to write each result to as a line of JSON, or None
+        """
+        self._out = out
+        self._start = time.perf_counter()
+        self._games = 0
+        self._wins = {1: 0, 2: 0, None: 0}
+        self._reasons = {}
+        self._plies = 0
+        self._fences = 0
+
+    def add(self, result):
+        """Count a GameResult and write it out if there is a file"""
+        self._games += 1
+        self._wins[result.winner] += 1
+        self._reasons[result.reason] = self._reasons.get(result.reason, 0) + 1
+        self._plies += result.plies
+        self._fences += result.p1_fences_used + result.p2_fences_used
+        if self._out is not None:
+            self._out.write(json.dumps(result._asdict()) + '\n')
+
+    def summary(self):
+        """Return a dict with the totals and averages so far"""
+        elapsed = time.perf_counter() - self._start
+        games = max(self._games, 1)
+        return {'games': self._games,
+                'p1_wins': self._wins[1],
+                'p2_wins': self._wins[2],
+                'unfinished': self._wins[None],
+                'reasons': dict(self._reasons),
+                'mean_plies': self._plies / games,
+                'mean_fences_used': self._fences / games,
+                'seconds': elapsed,
+                'games_per_minute': self._games * 60 / max(elapsed, 1e-9)}
+
+
+def main(argv=None):
+    """Run games from the command line and print the summary as JSON"""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('-n', '--games', type=int, default=1000)
+    parser.add_argument('--p1', default='greedy', help="player 1 spec")
+    parser.add_argument('--p2', default='random', help="player 2 spec")
+    parser.add_argument('--workers', type=int,
+                        default=multiprocessing.cpu_count())
+    parser.add_argument('--chunksize', type=int, default=64)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-plies', type=int, default=400)
+    parser.add_argument('--out', help="file to write each result to as JSON")
+    args = parser.parse_args(argv)
+
+    out = open(args.out, 'w') if args.out else None
+    try:
+        aggregator = Aggregator(out)
+        for result in run_games(args.games, args.p1, args.p2, args.workers,
+                                args.chunksize, args.seed, args.max_plies):
+            aggregator.add(result)
+    finally:
+        if out is not None:
+            out.close()
+    json.dump(aggregator.summary(), sys.stdout, indent=2)
+    print()
+
+
+if __name__ == '__main__':
+    main()
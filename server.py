@@ -0,0 +1,445 @@
+# Description:  Host many Quoridor games at once over TCP or a Unix socket.
+# Associated Files: Quoridor.py, notation.py, diagnostics.py
+
+"""
+An asyncio server that keeps one QuoridorGame for each session and lets
+two players play it over a connection each.  Messages are one JSON object
+per line.  Moves use the tokens from notation.py, such as 'e2' or 'e3h'.
+
+Client to server:
+    {"op": "join", "session": "name"}   join a session, made if it is new
+    {"op": "move", "move": "e2"}        play a move in the joined session
+
+Server to client:
+    {"type": "joined", "session": ..., "player": 1 or 2, "moves": [...]}
+        moves is every move played so far, to catch up on the position
+    {"type": "start"}                   both players have joined
+    {"type": "delta", "ply": ..., "player": ..., "move": ..., "turn": ...,
+     "winner": ..., "fences_left": [p1, p2]}
+        sent to both players after every move that is played
+    {"type": "rejected", "move": ..., "reason": ...}
+        the move was not played, reason is from diagnostics.py
+    {"type": "opponent_left"}
+    {"type": "evicted"}                 the session was idle for too long
+    {"type": "error", "message": ...}
+
+Moves are checked with move_pawn() and place_fence().  Each connection
+has a bounded queue of lines waiting to be sent.  A client that reads so
+slowly that its queue fills up is disconnected, so one slow client can't
+make the server hold on to more and more memory.  Lines from a client are
+handled one at a time, so a client that sends faster than its moves are
+handled is slowed down by TCP.  Sessions with no moves or joins for
+idle_timeout seconds are removed.
+
+Command line:
+    python server.py --port 7777
+    python server.py --unix /tmp/quoridor.sock --max-sessions 20000
+
+See benchmarks/bench_server.py for a load test.
+"""
+
+import argparse
+import asyncio
+import json
+
+import diagnostics
+import notation
+from Quoridor import QuoridorGame
+
+MAX_LINE = 4096  # Longest line a client may send, in bytes
+
+
+def encode(message):
+    """Return a message dict as one line of JSON bytes"""
+    return (json.dumps(message, separators=(',', ':')) + '\n').encode()
+
+
+class Connection:
+    """One client, with a queue of lines waiting to be sent to it"""
+
+    def __init__(self, writer, queue_size):
+        """
+        Create the connection and start sending its queue.
+
+        :param writer: asyncio.StreamWriter for the client
+        :param queue_size: int for the most lines that can wait to be sent
+        """
+        self._writer = writer
+        self._queue = asyncio.Queue(queue_size)
+        self._session = None
+        self._player = None
+        self._closed = False
+        self._task = asyncio.ensure_future(self._flush())
+
+    async def _flush(self):
+        """Write the queued lines to the client until a None is queued"""
+        try:
+            line = b''
+            while line is not None:
+                line = await self._queue.get()
+                # Write every line that is waiting before draining once
+                while line is not None:
+                    self._writer.write(line)
+                    if self._queue.empty():
+                        break
+                    line = self._queue.get_nowait()
+                await self._writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._writer.close()
+
+    def send(self, line):
+        """
+        Queue a line to be sent.  The client is disconnected if its queue
+        is full.
+
+        :param line: bytes from encode()
+        :return: True if the line was queued, else False
+        """
+        if self._closed:
+            return False
+        try:
+            self._queue.put_nowait(line)
+        except asyncio.QueueFull:
+            self.close()
+            return False
+        return True
+
+    def close(self):
+        """Disconnect the client, dropping any lines not sent yet"""
+        if not self._closed:
+            self._closed = True
+            self._task.cancel()
+
+    async def wait_closed(self):
+        """Send the lines that are queued, then disconnect the client"""
+        if not self._closed:
+            self._closed = True
+            try:
+                self._queue.put_nowait(None)
+            except asyncio.QueueFull:
+                self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+
+    def is_closed(self):
+        """Return True if the client has been disconnected"""
+        return self._closed
+
+    def get_seat(self):
+        """Return the (Session, player) the client has joined, or Nones"""
+        return self._session, self._player
+
+    def set_seat(self, session, player):
+        """Remember the session and player number the client has joined"""
+        self._session = session
+        self._player = player
+
+
+class Session:
+    """One game and the connections of its two players"""
+
+    def __init__(self, name, now):
+        """
+        Create a new game.
+
+        :param name: str the players use to join the session
+        :param now: float for the time, from the event loop's clock
+        """
+        self._name = name
+        self._game = QuoridorGame()
+        self._reasons = diagnostics.RingBufferDiagnostics(size=1)
+        self._game.set_diagnostics(self._reasons)
+        self._players = [None, None, None]
+        self._last_active = now
+
+    def get_name(self):
+        """Return the name of the session"""
+        return self._name
+
+    def get_last_active(self):
+        """Return the time of the last join or move"""
+        return self._last_active
+
+    def get_connections(self):
+        """Return the connections of the players that are still here"""
+        return [conn for conn in self._players[1:] if conn is not None]
+
+    def join(self, conn, now):
+        """
+        Give a connection the first free seat.
+
+        :return: int of 1 or 2 for the player number, None if both are taken
+        """
+        for player in (1, 2):
+            if self._players[player] is None:
+                self._players[player] = conn
+                self._last_active = now
+                return player
+        return None
+
+    def leave(self, player):
+        """Free a player's seat and return the connection of the opponent"""
+        self._players[player] = None
+        return self._players[3 - player]
+
+    def is_full(self):
+        """Return True when both players have joined"""
+        return self._players[1] is not None and self._players[2] is not None
+
+    def get_moves(self):
+        """Return the tokens of every move played so far"""
+        return [notation.format_move(move)
+                for move in self._game.get_history()]
+
+    def play(self, player, move, now):
+        """
+        Play a move for a player.
+
+        :param player: int of 1 or 2 for the player making the move
+        :param move: move tuple, such as ('p', (4, 1))
+        :param now: float for the time, from the event loop's clock
+        :return: None if the move was played, else a reason string
+        """
+        self._last_active = now
+        if self._game.make_move(player, move) is True:
+            return None
+        return self._reasons.get_reasons()[-1]
+
+    def delta(self, player, token):
+        """Return the delta message for the move just played"""
+        game = self._game
+        return {'type': 'delta', 'ply': game.get_ply(), 'player': player,
+                'move': token, 'turn': game.get_turn(),
+                'winner': game.get_winner(),
+                'fences_left': [game.get_fence_count(1),
+                                game.get_fence_count(2)]}
+
+
+class GameServer:
+    """Serve many sessions over TCP or a Unix socket"""
+
+    def __init__(self, max_sessions=10000, idle_timeout=300.0,
+                 queue_size=256):
+        """
+        Create the server.
+
+        :param max_sessions: int for the most sessions kept at once
+        :param idle_timeout: float for the seconds a session may go without
+            a join or a move before it is removed
+        :param queue_size: int for the most lines that can wait to be sent
+            to one client before it is disconnected
+        """
+        self._max_sessions = max_sessions
+        self._idle_timeout = idle_timeout
+        self._queue_size = queue_size
+        self._sessions = {}
+        self._connections = set()
+        self._servers = []
+        self._reaper = None
+        self._stats = {'moves': 0, 'rejected': 0, 'evicted': 0,
+                       'dropped': 0}
+
+    async def start(self, host='127.0.0.1', port=0, path=None):
+        """
+        Start listening for clients.
+
+        :param host: str for the TCP address to listen on
+        :param port: int for the TCP port, 0 picks a free port
+        :param path: str for a Unix socket to listen on instead of TCP
+        :return: the path of the Unix socket, or the (host, port) tuple
+        """
+        if path is not None:
+            server = await asyncio.start_unix_server(self._handle, path,
+                                                     limit=MAX_LINE)
+            address = path
+        else:
+            server = await asyncio.start_server(self._handle, host, port,
+                                                limit=MAX_LINE)
+            address = server.sockets[0].getsockname()[:2]
+        self._servers.append(server)
+        if self._reaper is None:
+            self._reaper = asyncio.ensure_future(self._reap())
+        return address
+
+    async def close(self):
+        """Stop listening and disconnect every client"""
+        if self._reaper is not None:
+            self._reaper.cancel()
+        for server in self._servers:
+            server.close()
+            await server.wait_closed()
+        for conn in list(self._connections):
+            conn.close()
+            await conn.wait_closed()
+
+    def get_session_count(self):
+        """Return the number of sessions kept"""
+        return len(self._sessions)
+
+    def get_stats(self):
+        """Return a dict of moves played, moves rejected, sessions evicted,
+        lines dropped for clients that were gone or reading too slowly, and
+        the sessions and connections kept"""
+        return dict(self._stats, sessions=len(self._sessions),
+                    connections=len(self._connections))
+
+    async def _handle(self, reader, writer):
+        """Read the lines from one client until it disconnects"""
+        conn = Connection(writer, self._queue_size)
+        self._connections.add(conn)
+        try:
+            while not conn.is_closed():
+                line = await reader.readline()
+                if not line:
+                    break
+                self._dispatch(conn, line)
+        except (ValueError, ConnectionError):
+            pass  # the line was too long, or the client went away
+        finally:
+            self._connections.discard(conn)
+            self._leave(conn)
+            await conn.wait_closed()
+
+    def _dispatch(self, conn, line):
+        """Handle one line from a client"""
+        try:
+            message = json.loads(line)
+            op = message['op']
+        except (ValueError, TypeError, KeyError):
+            self._send(conn, {'type': 'error', 'message': 'bad message'})
+            return
+        if op == 'join':
+            self._join(conn, message.get('session'))
+        elif op == 'move':
+            self._move(conn, message.get('move'))
+        else:
+            self._send(conn, {'type': 'error', 'message': 'unknown op'})
+
+    def _send(self, conn, message):
+        """Queue a message for a client, counting it if it is dropped"""
+        if not conn.send(encode(message)):
+            self._stats['dropped'] += 1
+
+    def _join(self, conn, name):
+        """Put a client in a session"""
+        if conn.get_seat()[0] is not None:
+            return self._send(conn, {'type': 'error',
+                                     'message': 'already joined'})
+        if not isinstance(name, str):
+            return self._send(conn, {'type': 'error',
+                                     'message': 'no session name'})
+        now = asyncio.get_running_loop().time()
+        session = self._sessions.get(name)
+        if session is None:
+            if len(self._sessions) >= self._max_sessions:
+                return self._send(conn, {'type': 'error',
+                                         'message': 'server full'})
+            session = self._sessions[name] = Session(name, now)
+        player = session.join(conn, now)
+        if player is None:
+            return self._send(conn, {'type': 'error',
+                                     'message': 'session full'})
+        conn.set_seat(session, player)
+        self._send(conn, {'type': 'joined', 'session': name,
+                          'player': player, 'moves': session.get_moves()})
+        if session.is_full():
+            for other in session.get_connections():
+                self._send(other, {'type': 'start'})
+
+    def _move(self, conn, token):
+        """Play a move and send the delta to both players"""
+        session, player = conn.get_seat()
+        if session is None:
+            return self._send(conn, {'type': 'error', 'message': 'not joined'})
+        try:
+            move = notation.parse_move(token)
+        except (ValueError, TypeError):
+            return self._send(conn, {'type': 'rejected', 'move': token,
+                                     'reason': 'bad_token'})
+        if not session.is_full():
+            return self._send(conn, {'type': 'rejected', 'move': token,
+                                     'reason': 'waiting_for_opponent'})
+        now = asyncio.get_running_loop().time()
+        reason = session.play(player, move, now)
+        if reason is not None:
+            self._stats['rejected'] += 1
+            return self._send(conn, {'type': 'rejected', 'move': token,
+                                     'reason': reason})
+        self._stats['moves'] += 1
+        # Encode the delta once for both players
+        line = encode(session.delta(player, token))
+        for other in session.get_connections():
+            if not other.send(line):
+                self._stats['dropped'] += 1
+
+    def _leave(self, conn):
+        """Take a disconnected client out of its session"""
+        session, player = conn.get_seat()
+        if session is None:
+            return
+        conn.set_seat(None, None)
+        opponent = session.leave(player)
+        if opponent is not None:
+            self._send(opponent, {'type': 'opponent_left'})
+        elif self._sessions.get(session.get_name()) is session:
+            del self._sessions[session.get_name()]
+
+    def evict_idle(self, now=None):
+        """
+        Remove the sessions that have been idle for too long.
+
+        :param now: float for the time, defaults to the event loop's clock
+        :return: int for the number of sessions removed
+        """
+        if now is None:
+            now = asyncio.get_running_loop().time()
+        cutoff = now - self._idle_timeout
+        idle = [session for session in self._sessions.values()
+                if session.get_last_active() < cutoff]
+        for session in idle:
+            del self._sessions[session.get_name()]
+            for conn in session.get_connections():
+                conn.set_seat(None, None)
+                self._send(conn, {'type': 'evicted'})
+        self._stats['evicted'] += len(idle)
+        return len(idle)
+
+    async def _reap(self):
+        """Remove idle sessions every so often"""
+        interval = min(max(self._idle_timeout / 4, 0.05), 30.0)
+        while True:
+            await asyncio.sleep(interval)
+            self.evict_idle()
+
+
+async def serve(args):
+    """Run a server until it is stopped"""
+    server = GameServer(args.max_sessions, args.idle_timeout,
+                        args.queue_size)
+    address = await server.start(args.host, args.port, args.unix)
+    print('listening on %s' % (address,), flush=True)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.close()
+
+
+def main(argv=None):
+    """Run the server from the command line"""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=7777)
+    parser.add_argument('--unix', help="Unix socket path to listen on")
+    parser.add_argument('--max-sessions', type=int, default=10000)
+    parser.add_argument('--idle-timeout', type=float, default=300.0)
+    parser.add_argument('--queue-size', type=int, default=256)
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+# Description:  Compact, immutable snapshot of a Quoridor position.
+# Associated Files: Quoridor.py, bitboard.py
+
+"""
+A GameState holds a whole position packed into one int, so it is cheap to
+keep hundreds of thousands of them, compare them and use them as dict keys
+or set members.  The bits, lowest first, are:
+    0 - 199: the walls mask from bitboard.py with only the fence slots a
+        player can use, horizontal fences in bits 0 - 99 and vertical
+        fences in bits 100 - 199.  The edges of the board are left out.
+    200 - 206: cell number of player 1's pawn
+    207 - 213: cell number of player 2's pawn
+    214 - 217: fences player 1 has left
+    218 - 221: fences player 2 has left
+    222: 1 when it is player 2's turn
+    223 - 224: the winner, 0 for no winner
+
+QuoridorGame.get_state() makes a GameState and set_state() or from_state()
+puts a game back in that position.  See benchmarks/bench_state_memory.py
+for the memory used by each position.
+"""
+
+import bitboard
+
+SLOTS = bitboard.SLOTS_H | bitboard.SLOTS_V << bitboard.V_SHIFT
+P1_SHIFT = 2 * bitboard.V_SHIFT
+P2_SHIFT = P1_SHIFT + 7
+P1_FENCES_SHIFT = P2_SHIFT + 7
+P2_FENCES_SHIFT = P1_FENCES_SHIFT + 4
+TURN_SHIFT = P2_FENCES_SHIFT + 4
+WINNER_SHIFT = TURN_SHIFT + 1
+
+
+class GameState:
+    """A Quoridor position packed into one int"""
+    __slots__ = ('_packed',)
+
+    def __init__(self, packed):
+        """Create a GameState from the int made by pack()"""
+        object.__setattr__(self, '_packed', packed)
+
+    @classmethod
+    def pack(cls, p1, p2, walls, p1_fences, p2_fences, turn, winner):
+        """
+        Create a GameState from the parts of a position.
+
+        :param p1: (x, y) tuple for player 1's pawn
+        :param p2: (x, y) tuple for player 2's pawn
+        :param walls: int for the walls mask from Bitboard.get_walls()
+        :param p1_fences: int for the fences player 1 has left
+        :param p2_fences: int for the fences player 2 has left
+        :param turn: int of 1 or 2 for the player whose turn it is
+        :param winner: int of 1 or 2, None if nobody has won
+        :return: GameState
+        """
+        return cls(walls & SLOTS
+                   | bitboard.cell_index(*p1) << P1_SHIFT
+                   | bitboard.cell_index(*p2) << P2_SHIFT
+                   | p1_fences << P1_FENCES_SHIFT
+                   | p2_fences << P2_FENCES_SHIFT
+                   | (turn - 1) << TURN_SHIFT
+                   | (winner or 0) << WINNER_SHIFT)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('GameState is immutable')
+
+    def __eq__(self, other):
+        if not isinstance(other, GameState):
+            return NotImplemented
+        return self._packed == other._packed
+
+    def __hash__(self):
+        return hash(self._packed)
+
+    def __reduce__(self):
+        return GameState, (self._packed,)
+
+    def __repr__(self):
+        return 'GameState(%#x)' % self._packed
+
+    def get_packed(self):
+        """Return the int holding the position"""
+        return self._packed
+
+    def get_masks(self):
+        """Return the horizontal and vertical fence masks, with the edges"""
+        return (self._packed & bitboard.SLOTS_H | bitboard.BORDER_H,
+                self._packed >> bitboard.V_SHIFT & bitboard.SLOTS_V
+                | bitboard.BORDER_V)
+
+    def get_location(self, player):
+        """Return the (x, y) tuple of a player's pawn"""
+        shift = P1_SHIFT if player == 1 else P2_SHIFT
+        return bitboard.cell_coord(self._packed >> shift & 0x7f)
+
+    def get_fence_count(self, player):
+        """Return the number of fences a player has left"""
+        shift = P1_FENCES_SHIFT if player == 1 else P2_FENCES_SHIFT
+        return self._packed >> shift & 0xf
+
+    def get_turn(self):
+        """Return the player whose turn it is"""
+        return (self._packed >> TURN_SHIFT & 1) + 1
+
+    def get_winner(self):
+        """Return the winner, None if nobody has won"""
+        return (self._packed >> WINNER_SHIFT & 3) or None
@@ -0,0 +1,56 @@
+# Description:  Zobrist hashing for Quoridor positions.
+# Associated Files: Quoridor.py, bitboard.py
+
+"""
+Every part of a position has its own random 64-bit key:
+    PAWN[player][cell] for each pawn square.
+    FENCE_H[bit] and FENCE_V[bit] for each fence slot, using the bit numbers
+        from bitboard.py.
+    FENCES_LEFT[player][count] for the number of fences a player has left.
+    TURN when it is player 2's turn.
+
+The hash of a position is the XOR of the keys for the parts it has, so a
+move changes the hash with a few XORs.  The keys come from a fixed seed so
+the same position has the same hash in every process and every run, which
+lets hashes be stored in files such as an opening book.
+"""
+
+import random
+
+import bitboard
+
+_random = random.Random(0x51550121)
+
+PAWN = [None] + [[_random.getrandbits(64) for cell in range(bitboard.CELLS)]
+                 for player in (1, 2)]
+FENCE_H = [_random.getrandbits(64) for bit in range(bitboard.V_SHIFT)]
+FENCE_V = [_random.getrandbits(64) for bit in range(bitboard.V_SHIFT)]
+FENCES_LEFT = [None] + [[_random.getrandbits(64) for count in range(11)]
+                        for player in (1, 2)]
+TURN = _random.getrandbits(64)
+
+FENCE = {'h': FENCE_H, 'v': FENCE_V}
+
+
+def hash_position(p1, p2, h, v, p1_fences, p2_fences, turn):
+    """
+    Work out the hash of a position from scratch.
+
+    :param p1: (x, y) tuple for player 1's pawn
+    :param p2: (x, y) tuple for player 2's pawn
+    :param h: int for the horizontal fence mask
+    :param v: int for the vertical fence mask
+    :param p1_fences: int for the fences player 1 has left
+    :param p2_fences: int for the fences player 2 has left
+    :param turn: int of 1 or 2 for the player whose turn it is
+    :return: int for the 64-bit hash
+    """
+    key = PAWN[1][bitboard.cell_index(*p1)] ^ PAWN[2][bitboard.cell_index(*p2)]
+    for index in bitboard.iter_bits(h & bitboard.SLOTS_H):
+        key ^= FENCE_H[index]
+    for index in bitboard.iter_bits(v & bitboard.SLOTS_V):
+        key ^= FENCE_V[index]
+    key ^= FENCES_LEFT[1][p1_fences] ^ FENCES_LEFT[2][p2_fences]
+    if turn == 2:
+        key ^= TURN
+    return key